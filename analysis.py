@@ -0,0 +1,278 @@
+import glob
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import numpy as np
+from src.utils.logger import LOG_DTYPE
+from src.utils.replay import read_log_columns
+
+EPISODE_FIELDS = ['session', 'episode', 'first_row', 'length', 'total_reward', 'mean_reward', 'min_reward', 'max_reward']
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of a stream of values in one pass.
+    Chunks and partial results are combined with Chan's parallel update, so a
+    merged result equals one computed over all the data at once. NaNs are
+    skipped, like pandas does.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            mean = values.mean()
+            self._combine(len(values), mean, float(np.sum((values - mean) ** 2)), values.min(), values.max())
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, float(minimum))
+        self.max = max(self.max, float(maximum))
+
+    @property
+    def std(self):
+        # Sample standard deviation, as in DataFrame.describe
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative error guarantee (DDSketch).
+
+    Values are counted in logarithmic buckets, separately for positive and
+    negative values, so every quantile estimate is within relative_accuracy of
+    the true value at that rank. Memory grows with the dynamic range of the
+    values, not with their number; values smaller than min_value in magnitude
+    count as zero.
+    """
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        small = np.abs(values) < self.min_value
+        self.zeros += int(small.sum())
+        self.count += len(values)
+        for store, magnitudes in [(self.positive, values[(values > 0) & ~small]),
+                                  (self.negative, -values[(values < 0) & ~small])]:
+            if not len(magnitudes):
+                continue
+            keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                store[key] = store.get(key, 0) + count
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge quantile sketches of different accuracy")
+        for store, other_store in [(self.positive, other.positive), (self.negative, other.negative)]:
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantiles(self, qs):
+        """
+        Estimates of the given quantiles (in [0, 1]); NaN when empty.
+        """
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        negative = sorted(self.negative, reverse=True)
+        positive = sorted(self.positive)
+        # Bucket representatives in ascending order of value
+        values = np.concatenate([
+            -self._bucket_value(np.array(negative, dtype=np.float64)),
+            [0.0],
+            self._bucket_value(np.array(positive, dtype=np.float64)),
+        ])
+        counts = np.array([self.negative[k] for k in negative] + [self.zeros] + [self.positive[k] for k in positive])
+        ranks = qs * (self.count - 1)
+        return values[np.searchsorted(np.cumsum(counts), ranks, side='right')]
+
+    def _bucket_value(self, keys):
+        # Value within relative_accuracy of everything in bucket (gamma^(k-1), gamma^k]
+        return 2 * np.power(self.gamma, keys) / (self.gamma + 1)
+
+class EpisodeTracker:
+    """
+    Per-episode reward summaries from a stream of (step, reward) chunks. An
+    episode starts at the first row and wherever the logged step counter does
+    not increase, as in ReplayLog. Episodes may span any number of chunks.
+    """
+    def __init__(self):
+        self.rows = 0
+        self._previous_step = None
+        self._current = None   # [first_row, length, total, min, max] of the open episode
+        self._closed = []
+
+    def update(self, steps, rewards):
+        steps = np.asarray(steps)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        if not len(steps):
+            return
+        previous = steps[0] if self._previous_step is None else self._previous_step
+        starts = np.flatnonzero(np.diff(steps, prepend=previous) <= 0)
+        if self._previous_step is None:
+            starts = np.union1d([0], starts)
+        bounds = np.union1d([0], starts)
+        lengths = np.diff(np.append(bounds, len(steps)))
+        totals = np.add.reduceat(rewards, bounds)
+        minimums = np.minimum.reduceat(rewards, bounds)
+        maximums = np.maximum.reduceat(rewards, bounds)
+
+        first = 0
+        if bounds[0] not in starts:
+            # The chunk opens with the rest of the previous chunk's episode
+            current = self._current
+            current[1] += lengths[0]
+            current[2] += totals[0]
+            current[3] = min(current[3], minimums[0])
+            current[4] = max(current[4], maximums[0])
+            first = 1
+        for i in range(first, len(bounds)):
+            if self._current is not None:
+                self._closed.append(self._current)
+            self._current = [self.rows + bounds[i], lengths[i], totals[i], minimums[i], maximums[i]]
+        self._previous_step = steps[-1]
+        self.rows += len(steps)
+
+    def episodes(self):
+        """
+        Columns first_row, length, total_reward, mean_reward, min_reward and
+        max_reward, one row per episode (including the open one).
+        """
+        rows = self._closed + ([self._current] if self._current is not None else [])
+        table = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        return {
+            'first_row': table[:, 0].astype(np.int64),
+            'length': table[:, 1].astype(np.int64),
+            'total_reward': table[:, 2],
+            'mean_reward': table[:, 2] / np.maximum(table[:, 1], 1),
+            'min_reward': table[:, 3],
+            'max_reward': table[:, 4],
+        }
+
+class LogSummary:
+    """
+    Single-pass summary of one or more experiment logs: RunningStats and a
+    QuantileSketch per column and per-episode reward summaries. Summaries of
+    separate sessions merge, in session order.
+    """
+    def __init__(self, columns=LOG_DTYPE.names, relative_accuracy=0.01):
+        self.columns = list(columns)
+        self.stats = {name: RunningStats() for name in self.columns}
+        self.sketches = {name: QuantileSketch(relative_accuracy) for name in self.columns}
+        self.sessions = []
+        self._episodes = []
+
+    def update(self, chunk):
+        """
+        Add a chunk of the current session, a dict of column arrays.
+        """
+        for name in self.columns:
+            self.stats[name].update(chunk[name])
+            self.sketches[name].update(chunk[name])
+        self._tracker.update(chunk['step'], chunk['reward'])
+
+    def start_session(self, name):
+        self.sessions.append(name)
+        self._tracker = EpisodeTracker()
+        self._episodes.append(self._tracker)
+
+    def merge(self, other):
+        for name in self.columns:
+            self.stats[name].merge(other.stats[name])
+            self.sketches[name].merge(other.sketches[name])
+        self.sessions.extend(other.sessions)
+        self._episodes.extend(other._episodes)
+
+    def describe(self, percentiles=(0.25, 0.5, 0.75)):
+        """
+        The table of DataFrame.describe(): count, mean, std, min, percentiles
+        (from the sketches, clamped to the observed range) and max.
+        """
+        import pandas as pd
+        labels = ['count', 'mean', 'std', 'min'] + [f"{p * 100:g}%" for p in percentiles] + ['max']
+        table = {}
+        for name in self.columns:
+            stats = self.stats[name]
+            quantiles = np.clip(self.sketches[name].quantiles(percentiles), stats.min, stats.max)
+            mean = stats.mean if stats.count else math.nan
+            table[name] = [stats.count, mean, stats.std, stats.min if stats.count else math.nan, *quantiles,
+                           stats.max if stats.count else math.nan]
+        return pd.DataFrame(table, index=labels)
+
+    def episodes(self):
+        """
+        DataFrame of per-episode reward summaries with EPISODE_FIELDS columns.
+        """
+        import pandas as pd
+        frames = []
+        for session, tracker in zip(self.sessions, self._episodes):
+            episodes = tracker.episodes()
+            frame = pd.DataFrame(episodes)
+            frame.insert(0, 'episode', np.arange(len(frame)))
+            frame.insert(0, 'session', session)
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=EPISODE_FIELDS)
+        return pd.concat(frames, ignore_index=True)[EPISODE_FIELDS]
+
+def summarize_log(path, chunk_rows=1000000, relative_accuracy=0.01):
+    """
+    LogSummary of one log, streamed in chunks of chunk_rows rows.
+    """
+    summary = LogSummary(relative_accuracy=relative_accuracy)
+    summary.start_session(path)
+    for chunk in read_log_columns(path, summary.columns, chunk_rows):
+        summary.update(chunk)
+    return summary
+
+def summarize_logs(paths, workers=None, chunk_rows=1000000, relative_accuracy=0.01, start_method=None):
+    """
+    Merged LogSummary of many logs (paths or glob patterns), summarized in
+    parallel by a pool of worker processes, one log per task. workers defaults
+    to one per CPU; 0 or 1 summarizes in this process.
+    """
+    expanded = []
+    for pattern in paths:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError(f"No experiment log matches {pattern}")
+        expanded.extend(matches)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(expanded))
+
+    summary = LogSummary(relative_accuracy=relative_accuracy)
+    if workers <= 1:
+        for path in expanded:
+            summary.merge(summarize_log(path, chunk_rows, relative_accuracy))
+        return summary
+    ctx = mp.get_context(start_method) if start_method else None
+    with ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+        for part in pool.map(summarize_log, expanded, [chunk_rows] * len(expanded),
+                             [relative_accuracy] * len(expanded)):
+            summary.merge(part)
+    return summary
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.analysis import summarize_logs
+from src.utils.logger import LOG_DTYPE
+
+def write_logs(directory, sessions, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(sessions):
+        log = np.empty(rows, dtype=LOG_DTYPE)
+        log['timestamp'] = np.arange(rows) * 0.05
+        log['step'] = np.arange(rows) % 1000 + 1
+        log['frequency'] = rng.uniform(1, 100, rows)
+        log['amplitude'] = rng.uniform(0, 3.3, rows)
+        log['response'] = rng.normal(size=rows)
+        log['reward'] = -rng.exponential(size=rows)
+        path = os.path.join(directory, f"session_{i}.csv")
+        pd.DataFrame(log).to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-file pandas describe() vs. streamed single-pass summaries")
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=500000, help="Rows per session")
+    parser.add_argument('--chunk-rows', type=int, default=100000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_logs(directory, args.sessions, args.rows)
+        exact, seconds, peak = measure(lambda: pd.concat([pd.read_csv(p) for p in paths]).describe())
+        print(f"{'method':>20} {'seconds':>8} {'peak MiB':>9}")
+        print(f"{'pandas':>20} {seconds:>8.2f} {peak:>9.1f}")
+        for workers in args.workers:
+            # Peak memory is only traced in this process, so it covers the serial run
+            summary, seconds, peak = measure(lambda: summarize_logs(paths, workers, args.chunk_rows))
+            name = f"streamed, {workers} workers"
+            print(f"{name:>20} {seconds:>8.2f} {peak if workers <= 1 else float('nan'):>9.1f}")
+        streamed = summary.describe()
+        error = np.abs(streamed - exact).loc[['25%', '50%', '75%']] / np.abs(exact).loc[['25%', '50%', '75%']]
+        print(f"\nlargest relative percentile error: {np.nanmax(error.to_numpy()):.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback, CallbackList, CheckpointCallback
+from src.env.bio_env import BioInterfaceEnv
+from src.model.checkpoint import AsyncCheckpointCallback
+
+class StepTimer(BaseCallback):
+    """
+    Time between consecutive steps, including the callbacks before it in the list.
+    """
+    def __init__(self):
+        super().__init__()
+        self.times = []
+        self._last = None
+
+    def _on_rollout_start(self):
+        self._last = time.perf_counter()
+
+    def _on_step(self):
+        now = time.perf_counter()
+        self.times.append(now - self._last)
+        self._last = now
+        return True
+
+def run(config, checkpoint_callback, timesteps):
+    env = BioInterfaceEnv(config)
+    model = PPO("MlpPolicy", env, verbose=0, seed=0, device='cpu')
+    timer = StepTimer()
+    start = time.perf_counter()
+    model.learn(total_timesteps=timesteps, callback=CallbackList([checkpoint_callback, timer]))
+    wall = time.perf_counter() - start
+    env.close()
+    return np.array(timer.times), wall
+
+def main():
+    parser = argparse.ArgumentParser(description="Step-time stall of synchronous vs. asynchronous checkpoints during PPO training")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(__file__), '..', 'config', 'default_config.yaml'))
+    parser.add_argument('--timesteps', type=int, default=4096)
+    parser.add_argument('--save-interval', type=int, default=100)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+
+    print(f"{'checkpoints':>12} {'step p50 ms':>12} {'ckpt p50 ms':>12} {'ckpt max ms':>12} {'wall s':>7} {'files':>6}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ['sync', 'async']:
+            save_path = os.path.join(directory, name)
+            if name == 'sync':
+                callback = CheckpointCallback(args.save_interval, save_path)
+            else:
+                callback = AsyncCheckpointCallback(args.save_interval, save_path, keep=5)
+            times, wall = run(config, callback, args.timesteps)
+            saving = np.zeros(len(times), dtype=bool)
+            saving[args.save_interval - 1::args.save_interval] = True
+            files = sorted(os.listdir(save_path))
+            print(f"{name:>12} {np.median(times[~saving]) * 1e3:>12.3f} {np.median(times[saving]) * 1e3:>12.3f} "
+                  f"{times[saving].max() * 1e3:>12.3f} {wall:>7.2f} {len(files):>6}")
+            # The newest checkpoint must load
+            PPO.load(max((os.path.join(save_path, f) for f in files), key=os.path.getmtime), device='cpu')
+
+if __name__ == "__main__":
+    main()
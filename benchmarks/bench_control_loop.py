@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.env.bio_env import BioInterfaceEnv
+from src.hardware.scheduler import ControlLoopScheduler, MonotonicClock, SimulatedClock
+
+class TimedEnv:
+    """
+    Env whose steps take a fixed simulated time, with an occasional slow step.
+    """
+    def __init__(self, clock, step_time, slow_every, slow_factor=10):
+        self.clock = clock
+        self.step_time = step_time
+        self.slow_every = slow_every
+        self.slow_factor = slow_factor
+        self.n = 0
+
+    def reset(self):
+        return np.zeros(1, dtype=np.float32), {}
+
+    def step(self, action):
+        self.n += 1
+        slow = self.slow_every and self.n % self.slow_every == 0
+        self.clock.advance(self.step_time * (self.slow_factor if slow else 1))
+        return np.zeros(1, dtype=np.float32), 0.0, False, self.n % 1000 == 0, {}
+
+def simulated(period, n_steps, pipelined):
+    # Deterministic run: 2ms steps (20ms every 50th), 3ms inference, 0.1ms wakeup latency
+    clock = SimulatedClock(wakeup=1e-4)
+    env = TimedEnv(clock, 0.002, 50)
+
+    def policy(obs):
+        clock.advance(0.003)
+        return np.zeros(2, dtype=np.float32)
+
+    return ControlLoopScheduler(env, policy, period, clock, pipelined).run(n_steps)
+
+def wall_clock(config, period, n_steps, pipelined, spin):
+    env = BioInterfaceEnv(config)
+    rng = np.random.default_rng(0)
+    weights = rng.normal(0, 0.1, (env.observation_space.shape[0], 2))
+
+    def policy(obs):
+        return np.tanh(obs @ weights)
+
+    stats = ControlLoopScheduler(env, policy, period, MonotonicClock(spin), pipelined).run(n_steps)
+    env.close()
+    return stats
+
+def report(name, stats):
+    jitter, latency = stats['jitter'], stats['latency']
+    print(f"{name:>22} {stats['ticks']:>6} {stats['missed']:>7} {jitter['p50'] * 1e6:>11.1f} {jitter['p99'] * 1e6:>11.1f}"
+          f" {latency['p50'] * 1e6:>12.1f} {latency['p99'] * 1e6:>12.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Control loop jitter and deadline misses, simulated and wall clock")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--period', type=float, default=0.005, help="Wall-clock control period (s)")
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--spin', type=float, default=0.0005)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    print(f"{'loop':>22} {'ticks':>6} {'missed':>7} {'jitter p50us':>11} {'jitter p99us':>11}"
+          f" {'latency p50us':>12} {'latency p99us':>12}")
+    for pipelined in [False, True]:
+        report(f"simulated{' pipelined' if pipelined else ''}", simulated(0.01, args.steps, pipelined))
+    for pipelined in [False, True]:
+        report(f"wall clock{' pipelined' if pipelined else ''}",
+               wall_clock(config, args.period, args.steps, pipelined, args.spin))
+    report("wall clock, no spin", wall_clock(config, args.period, args.steps, True, 0.0))
+
+if __name__ == "__main__":
+    main()
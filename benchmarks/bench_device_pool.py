@@ -0,0 +1,97 @@
+import argparse
+import contextlib
+import copy
+import os
+import sys
+import time
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.env.wrappers import FixedRateWrapper
+from src.env.bio_env import BioInterfaceEnv
+from src.env.device_pool_env import DevicePoolVecEnv
+from src.hardware.emulator import PtySubstrateEmulator
+from src.hardware.scheduler import MonotonicClock, PeriodicTimer
+
+def make_env_fn(period):
+    def make_env(device_config):
+        return FixedRateWrapper(BioInterfaceEnv(device_config, mode='hardware'), PeriodicTimer(period, MonotonicClock()))
+    return make_env
+
+def sequential(configs, period, actions):
+    """
+    Rounds/s stepping one env per device in turn, as a DummyVecEnv would.
+    """
+    envs = [make_env_fn(period)(config) for config in configs]
+    try:
+        for env in envs:
+            env.reset(seed=0)
+        start = time.perf_counter()
+        for action in actions:
+            for env, a in zip(envs, action):
+                env.step(a)
+        return len(actions) / (time.perf_counter() - start)
+    finally:
+        for env in envs:
+            env.close()
+
+def pooled(config, period, actions, fail_at=None, emulator=None):
+    """
+    Rounds/s of the device pool; with fail_at, the emulator is stopped at that
+    round and the masked devices and their infos are reported.
+    """
+    pool = DevicePoolVecEnv(config, make_env_fn(period))
+    try:
+        pool.reset()
+        failed = None
+        start = time.perf_counter()
+        for i, action in enumerate(actions):
+            if i == fail_at:
+                emulator.stop()
+            pool.step_async(action)
+            _, _, _, infos = pool.step_wait()
+            if failed is None and any(info.get('device_failed') for info in infos):
+                failed = i
+        rate = len(actions) / (time.perf_counter() - start)
+        return rate, failed, pool.active.copy(), pool.failures
+    finally:
+        pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs. concurrent stepping of N pty-emulated substrates, and device failure masking")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(__file__), '..', 'config', 'default_config.yaml'))
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--period', type=float, default=0.01, help="Control period of every device (s)")
+    parser.add_argument('--steps', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        base = yaml.safe_load(f)
+    base['experiment']['max_steps'] = args.steps + 1
+
+    print(f"{'devices':>7} {'sequential rounds/s':>20} {'pool rounds/s':>14} {'speedup':>8}")
+    for count in args.devices:
+        with contextlib.ExitStack() as stack:
+            emulators = [stack.enter_context(PtySubstrateEmulator(seed=i)) for i in range(count)]
+            config = copy.deepcopy(base)
+            config['hardware']['devices'] = [emulator.port for emulator in emulators]
+            actions = np.random.default_rng(0).uniform(-1, 1, (args.steps, count, 2)).astype(np.float32)
+            one_by_one = sequential([{**config, 'hardware': {**config['hardware'], 'port': e.port}} for e in emulators],
+                                    args.period, actions)
+            rate, _, _, _ = pooled(config, args.period, actions)
+            print(f"{count:>7} {one_by_one:>20.1f} {rate:>14.1f} {rate / one_by_one:>8.1f}")
+
+    # Unplug one device halfway: it is masked out and the others keep stepping
+    count = max(args.devices)
+    with contextlib.ExitStack() as stack:
+        emulators = [stack.enter_context(PtySubstrateEmulator(seed=i)) for i in range(count)]
+        config = copy.deepcopy(base)
+        config['hardware']['devices'] = [emulator.port for emulator in emulators]
+        actions = np.random.default_rng(0).uniform(-1, 1, (args.steps, count, 2)).astype(np.float32)
+        rate, failed, active, failures = pooled(config, args.period, actions, args.steps // 2, emulators[0])
+    print(f"\nDevice 0 stopped at step {args.steps // 2}: masked at step {failed}, "
+          f"{int(active.sum())}/{count} devices still active, pool at {rate:.1f} rounds/s ({failures[0]})")
+
+if __name__ == "__main__":
+    main()
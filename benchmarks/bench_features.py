@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.features import FeatureExtractor
+
+FS = 20.0
+BANDS = [[0.1, 1.0], [1.0, 5.0]]
+
+def make_extractor(window):
+    return FeatureExtractor(FS, spikes={}, spike_rate={}, band_power={'window': window, 'bands': BANDS})
+
+def naive_step(history, window):
+    # Recompute from the last window samples: median/MAD threshold and an rFFT per sample
+    recent = history[-window:]
+    baseline = np.median(recent, axis=0)
+    deviation = np.median(np.abs(recent - baseline), axis=0)
+    spikes = np.abs(recent[-1] - baseline) > 4 * deviation
+    spectrum = np.abs(np.fft.rfft(recent, axis=0)) ** 2
+    freqs = np.fft.rfftfreq(len(recent), 1 / FS)
+    return spikes, [spectrum[(freqs >= low) & (freqs <= high)].sum(axis=0) for low, high in BANDS]
+
+def time_chunks(fn, data, chunk_size):
+    start = time.perf_counter()
+    for i in range(0, data.shape[-1], chunk_size):
+        fn(data[..., i:i + chunk_size])
+    return (time.perf_counter() - start) / data.size * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming feature extraction cost per sample")
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--chunks', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 64])
+    parser.add_argument('--windows', type=int, nargs='+', default=[64, 512])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'channels':>8} {'window':>7} {'chunk':>6} {'naive ns/sample':>16} {'stream ns/sample':>17}")
+    for channels in args.channels:
+        data = rng.normal(size=(channels, args.samples))
+        for window in args.windows:
+            # Naive per-sample recomputation over a shorter run, it is O(window) per sample
+            naive_samples = min(args.samples, 2000)
+            history = data[:, :naive_samples].T
+            start = time.perf_counter()
+            for t in range(window, naive_samples):
+                naive_step(history[:t + 1], window)
+            naive = (time.perf_counter() - start) / ((naive_samples - window) * channels) * 1e9
+            for chunk in args.chunks:
+                extractor = make_extractor(window)
+                if chunk == 1:
+                    stream = time_chunks(lambda c: extractor.step(c[:, 0]), data, chunk)
+                else:
+                    stream = time_chunks(extractor.process, data, chunk)
+                print(f"{channels:>8} {window:>7} {chunk:>6} {naive:>16.1f} {stream:>17.1f}")
+
+    # Chunked streaming must match sample-by-sample streaming
+    data = rng.normal(size=(4, args.samples))
+    extractor = make_extractor(args.windows[0])
+    stepped = np.stack([extractor.step(data[:, t]) for t in range(data.shape[1])], axis=1)
+    extractor = make_extractor(args.windows[0])
+    chunked = np.concatenate([extractor.process(data[:, i:i + 100]) for i in range(0, data.shape[1], 100)], axis=1)
+    print(f"\nmax |chunked - stepped|: {np.abs(chunked - stepped).max():.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.filters import FilterChain, apply_low_pass, apply_notch_filter, moving_average
+
+FS = 1000.0
+CUTOFF = 30.0
+NOTCH = 50.0
+MA_WINDOW = 5
+
+def legacy_pipeline(chunk):
+    # The per-call functions, applied to every chunk from zero state
+    y = apply_low_pass(chunk, CUTOFF, FS)
+    y = apply_notch_filter(y, NOTCH, FS)
+    return moving_average(y, MA_WINDOW)
+
+def make_chain():
+    return FilterChain(FS).add_low_pass(CUTOFF).add_notch(NOTCH).add_moving_average(MA_WINDOW)
+
+def time_chunks(fn, signal_data, chunk_size):
+    start = time.perf_counter()
+    for i in range(0, signal_data.shape[-1], chunk_size):
+        fn(signal_data[..., i:i + chunk_size])
+    return (time.perf_counter() - start) / signal_data.size * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description="FilterChain vs. the per-call filters.py functions")
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--chunks', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'channels':>8} {'chunk':>6} {'legacy ns/sample':>17} {'chain ns/sample':>16} {'speedup':>8}")
+    for channels in args.channels:
+        data = rng.normal(size=(channels, args.samples))
+        for chunk in args.chunks:
+            if chunk < MA_WINDOW:
+                legacy = float('nan')
+            else:
+                legacy = time_chunks(lambda c: [legacy_pipeline(row) for row in c], data, chunk)
+            chain = make_chain()
+            if chunk == 1:
+                fused = time_chunks(lambda c: chain.step(c[:, 0]), data, chunk)
+            else:
+                fused = time_chunks(chain.process, data, chunk)
+            print(f"{channels:>8} {chunk:>6} {legacy:>17.1f} {fused:>16.1f} {legacy / fused:>8.1f}")
+
+    # Chunked streaming must match filtering the whole signal at once
+    data = rng.normal(size=args.samples)
+    whole = make_chain().process(data)
+    chain = make_chain()
+    streamed = np.concatenate([chain.process(data[i:i + 100]) for i in range(0, len(data), 100)])
+    legacy = np.concatenate([apply_low_pass(data[i:i + 100], CUTOFF, FS) for i in range(0, len(data), 100)])
+    print(f"\nmax |chunked - whole|: FilterChain {np.abs(streamed - whole).max():.2e}, "
+          f"apply_low_pass {np.abs(legacy - apply_low_pass(data, CUTOFF, FS)).max():.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.env.bio_env import BioInterfaceEnv
+from src.env.history import HistoryBuffer
+
+def time_per_call(fn, n_steps):
+    """
+    Mean wall time of fn() in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        fn()
+    return (time.perf_counter() - start) / n_steps * 1e6
+
+def bench_roll_update(window, n_steps):
+    # The history update BioInterfaceEnv.step used before the ring buffer
+    state = {'history': np.zeros(window)}
+
+    def update():
+        history = np.roll(state['history'], -1)
+        history[-1] = 0.5
+        state['history'] = history
+    return time_per_call(update, n_steps)
+
+def bench_ring_update(window, n_steps):
+    history = HistoryBuffer(window)
+
+    def update():
+        history.push(0.5)
+        history.view()
+    return time_per_call(update, n_steps)
+
+def bench_env_step(config, window, n_steps):
+    config['environment']['observation_window'] = window
+    env = BioInterfaceEnv(config)
+    env.reset(seed=0)
+    action = np.zeros(2, dtype=np.float32)
+    latency = time_per_call(lambda: env.step(action), n_steps)
+    env.close()
+    return latency
+
+def main():
+    parser = argparse.ArgumentParser(description="Observation history step latency vs. window size")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--steps', type=int, default=20000)
+    parser.add_argument('--windows', type=int, nargs='+', default=[50, 500, 2000, 10000])
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    config['experiment']['max_steps'] = args.steps + 1
+
+    print(f"{'window':>8} {'np.roll (us)':>14} {'ring (us)':>12} {'env.step (us)':>15}")
+    for window in args.windows:
+        roll = bench_roll_update(window, args.steps)
+        ring = bench_ring_update(window, args.steps)
+        step = bench_env_step(config, window, args.steps)
+        print(f"{window:>8} {roll:>14.2f} {ring:>12.2f} {step:>15.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from stable_baselines3 import PPO, SAC
+from src.model.lstm_policy import LSTMExtractor, RecurrentActor
+from src.env.bio_env import BioInterfaceEnv
+from src.model.inference import export_policy, measure_latency, verify_policy
+from src.model.recurrent import RecurrentAgent
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-observation action latency: model.predict vs. exported actors")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--repeats', type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    env = BioInterfaceEnv(config)
+    # Latency only depends on the network's shape, so untrained models will do
+    models = {
+        'PPO mlp': PPO("MlpPolicy", env, verbose=0, seed=0),
+        'SAC mlp': SAC("MlpPolicy", env, verbose=0, seed=0),
+        'PPO lstm': PPO("MlpPolicy", env, verbose=0, seed=0,
+                        policy_kwargs=dict(features_extractor_class=LSTMExtractor)),
+    }
+    rng = np.random.default_rng(0)
+    observations = rng.uniform(-2, 2, (256,) + env.observation_space.shape).astype(np.float32)
+
+    print(f"{'policy':>14} {'path':>14} {'p50 us':>8} {'p99 us':>8} {'max diff':>10}")
+    for name, model in models.items():
+        latency = measure_latency(lambda o: model.predict(o, deterministic=True), observations[0], args.repeats)
+        print(f"{name:>14} {'model.predict':>14} {latency['p50']:>8.1f} {latency['p99']:>8.1f} {'':>10}")
+        # NumPy would re-scan the LSTM window step by step, slower than model.predict
+        for backend in ['torchscript'] if 'lstm' in name else ['numpy', 'torchscript']:
+            policy = export_policy(model, backend)
+            difference = verify_policy(policy, model, observations)
+            latency = measure_latency(policy.act, observations[0], args.repeats)
+            print(f"{name:>14} {backend:>14} {latency['p50']:>8.1f} {latency['p99']:>8.1f} {difference:>10.2g}")
+
+    # The recurrent mode reads one new sample per action instead of the window
+    agent = RecurrentAgent(env, config)
+    actor = RecurrentActor(agent.policy.extractor, agent.policy.actor)
+    latency = measure_latency(lambda o: actor.act(o[None]), observations[0], args.repeats)
+    print(f"{'recurrent lstm':>14} {'RecurrentActor':>14} {latency['p50']:>8.1f} {latency['p99']:>8.1f} {'':>10}")
+    policy = agent.export()
+    latency = measure_latency(policy.act, observations[0], args.repeats)
+    print(f"{'recurrent lstm':>14} {'numpy':>14} {latency['p50']:>8.1f} {latency['p99']:>8.1f} {'':>10}")
+
+if __name__ == "__main__":
+    main()
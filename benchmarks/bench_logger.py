@@ -0,0 +1,55 @@
+import argparse
+import csv
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.logger import ExperimentLogger
+
+def legacy_log_step(filepath, step, action, response, reward):
+    # ExperimentLogger.log_step before buffering: open, write one row, close
+    timestamp = time.time()
+    frequency, amplitude = action
+    with open(filepath, 'a', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([timestamp, step, frequency, amplitude, response, reward])
+
+def bench_legacy(log_dir, n_rows):
+    filepath = os.path.join(log_dir, 'legacy.csv')
+    start = time.perf_counter()
+    for i in range(n_rows):
+        legacy_log_step(filepath, i, (10.0, 1.0), 0.5, -0.5)
+    return n_rows / (time.perf_counter() - start)
+
+def bench_buffered(log_dir, filename, n_rows):
+    """
+    Rows/s seen by the caller (log_step only) and including the final flush on close.
+    """
+    log = ExperimentLogger(log_dir, filename)
+    start = time.perf_counter()
+    for i in range(n_rows):
+        log.log_step(i, (10.0, 1.0), 0.5, -0.5)
+    logged = time.perf_counter() - start
+    log.close()
+    closed = time.perf_counter() - start
+    return n_rows / logged, n_rows / closed
+
+def main():
+    parser = argparse.ArgumentParser(description="ExperimentLogger throughput, buffered vs. per-row CSV")
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    formats = ['csv', 'npy'] + (['parquet'] if importlib.util.find_spec('pyarrow') is not None else [])
+    with tempfile.TemporaryDirectory() as log_dir:
+        legacy = bench_legacy(log_dir, min(args.rows, 20000))
+        print(f"{'logger':>16} {'log_step rows/s':>16} {'incl. close rows/s':>19}")
+        print(f"{'legacy csv':>16} {legacy:>16.0f} {legacy:>19.0f}")
+        for fmt in formats:
+            steps, total = bench_buffered(log_dir, f"data_log.{fmt}", args.rows)
+            print(f"{'buffered ' + fmt:>16} {steps:>16.0f} {total:>19.0f}")
+
+if __name__ == "__main__":
+    main()
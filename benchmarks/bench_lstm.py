@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import torch
+from gymnasium import spaces
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model.lstm_policy import LSTMExtractor, truncated_bptt
+
+def latency_us(fn, repeats):
+    # Median wall time of one call, in microseconds
+    for _ in range(10):
+        fn()
+    times = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - start
+    return np.median(times) * 1e6
+
+def bench_inference(window, batch_size, repeats):
+    extractor = LSTMExtractor(spaces.Box(-1, 1, (window,), np.float32))
+    observations = torch.randn(batch_size, window)
+    state = extractor.initial_state(batch_size)
+    starts = torch.zeros(batch_size, dtype=torch.bool)
+    with torch.no_grad():
+        rescan = latency_us(lambda: extractor(observations), repeats)
+        recurrent = latency_us(lambda: extractor.step(observations[:, -1], state, starts), repeats)
+    return rescan, recurrent
+
+def bench_training(window, batch_size, steps, bptt, episode_length, rescan_updates):
+    """
+    Env steps learnt per second: window mode on SB3-style minibatches of
+    windows, and recurrent mode with truncated BPTT over whole rollouts.
+    """
+    extractor = LSTMExtractor(spaces.Box(-1, 1, (window,), np.float32))
+    optimizer = torch.optim.Adam(extractor.parameters())
+
+    windows = torch.randn(batch_size, window)
+    start = time.perf_counter()
+    for _ in range(rescan_updates):
+        loss = extractor(windows).pow(2).mean()
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    rescan = rescan_updates * batch_size / (time.perf_counter() - start)
+
+    rollouts = torch.randn(batch_size, max(steps // batch_size, bptt))
+    episode_starts = torch.zeros(rollouts.shape, dtype=torch.bool)
+    episode_starts[:, ::episode_length] = True
+    start = time.perf_counter()
+    truncated_bptt(extractor, rollouts, episode_starts, lambda f, a, b: f.pow(2).mean(), optimizer, bptt=bptt)
+    recurrent = rollouts.numel() / (time.perf_counter() - start)
+    return rescan, recurrent
+
+def main():
+    parser = argparse.ArgumentParser(description="LSTMExtractor: full-window re-scan vs. recurrent state")
+    parser.add_argument('--windows', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64])
+    parser.add_argument('--repeats', type=int, default=300)
+    parser.add_argument('--train-steps', type=int, default=65536, help="Env steps per truncated BPTT measurement")
+    parser.add_argument('--rescan-updates', type=int, default=20, help="Minibatch updates per window-mode measurement")
+    parser.add_argument('--bptt', type=int, default=32)
+    parser.add_argument('--episode-length', type=int, default=1000)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    print(f"torch {torch.__version__}, {torch.get_num_threads()} thread(s)")
+    print(f"{'window':>7} {'batch':>6} {'re-scan us':>11} {'recurrent us':>13} {'speedup':>8}")
+    for window in args.windows:
+        for batch_size in args.batch_sizes:
+            rescan, recurrent = bench_inference(window, batch_size, args.repeats)
+            print(f"{window:>7} {batch_size:>6} {rescan:>11.0f} {recurrent:>13.0f} {rescan / recurrent:>8.1f}")
+
+    print(f"\n{'window':>7} {'batch':>6} {'re-scan steps/s':>16} {'tbptt steps/s':>14} {'speedup':>8}")
+    for window in args.windows:
+        rescan, recurrent = bench_training(window, 64, args.train_steps, args.bptt, args.episode_length,
+                                            args.rescan_updates)
+        print(f"{window:>7} {64:>6} {rescan:>16.0f} {recurrent:>14.0f} {recurrent / rescan:>8.1f}")
+
+if __name__ == "__main__":
+    main()
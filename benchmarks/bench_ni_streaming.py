@@ -0,0 +1,52 @@
+import argparse
+import copy
+import os
+import sys
+import time
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.hardware import fake_nidaqmx
+from src.hardware.ni_driver import NIDaqDriver
+
+def run(config, mode, n_steps):
+    """
+    Drive NIDaqDriver against the fake DAQ on a simulated clock, so only the
+    host-side Python cost is measured. Returns (us per step, samples per step).
+    """
+    config = copy.deepcopy(config)
+    config['hardware']['ni_mode'] = mode
+    clock = fake_nidaqmx.SimulatedClock()
+    fake_nidaqmx.reset_devices(clock=clock, sleep=clock.sleep, seed=0)
+    driver = NIDaqDriver(config, daq_module=fake_nidaqmx)
+    start = time.perf_counter()
+    for i in range(n_steps):
+        driver.apply_stimulation(10.0 + i % 50, 1.0)
+        driver.read_response()
+        if mode == 'on_demand':
+            # Software-timed steps advance the device clock themselves
+            clock.sleep(driver.samples_per_step / driver.sample_rate)
+    elapsed = time.perf_counter() - start
+    driver.close()
+    samples = driver.samples_per_step if mode == 'streaming' else 1
+    return elapsed / n_steps * 1e6, samples
+
+def main():
+    parser = argparse.ArgumentParser(description="NIDaqDriver on-demand vs. streaming host cost (fake DAQ)")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--sample-rates', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    print(f"{'S/s':>7} {'mode':>10} {'us/step':>9} {'samples/step':>13} {'us/sample':>10}")
+    for rate in args.sample_rates:
+        config['hardware']['sample_rate'] = rate
+        for mode in ('on_demand', 'streaming'):
+            per_step, samples = run(config, mode, args.steps)
+            print(f"{rate:>7} {mode:>10} {per_step:>9.1f} {samples:>13} {per_step / samples:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.logger import LOG_DTYPE
+from src.utils.plotting import load_columns, plot_training_results, plot_training_results_decimated
+
+def write_log(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    log = np.empty(rows, dtype=LOG_DTYPE)
+    log['timestamp'] = np.arange(rows) * 0.05
+    log['step'] = np.arange(rows) % 1000 + 1
+    log['frequency'] = rng.uniform(1, 100, rows)
+    log['amplitude'] = rng.uniform(0, 3.3, rows)
+    log['response'] = np.cumsum(rng.normal(0, 0.05, rows))
+    log['reward'] = -np.abs(log['response'])
+    np.save(path, log)
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless PNG render time of the full and decimated training plots")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000, 5000000])
+    parser.add_argument('--full-limit', type=int, default=10000, help="Largest log drawn in full, it takes minutes beyond")
+    parser.add_argument('--buckets', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'full s':>8} {'decimated s':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'plot.png')
+        for rows in args.rows:
+            path = os.path.join(directory, f"log_{rows}.npy")
+            write_log(path, rows)
+            full = float('nan')
+            if rows <= args.full_limit:
+                start = time.perf_counter()
+                plot_training_results(load_columns(path), output)
+                full = time.perf_counter() - start
+            start = time.perf_counter()
+            plot_training_results_decimated(path, output, args.buckets)
+            decimated = time.perf_counter() - start
+            print(f"{rows:>10} {full:>8.2f} {decimated:>12.2f}")
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
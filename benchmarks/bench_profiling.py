@@ -0,0 +1,65 @@
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.env.bio_env import BioInterfaceEnv
+from src.env.vec_bio_env import BioInterfaceVecEnv
+from src.utils.profiling import configure_profiling
+
+def steps_per_second(env, actions, vectorized):
+    env.reset()
+    start = time.perf_counter()
+    for action in actions:
+        if vectorized:
+            env.step_async(action)
+            env.step_wait()
+        else:
+            env.step(action)
+    return len(actions) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Env step rate with profiling off, with phase timers, and with the stack sampler")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(__file__), '..', 'config', 'default_config.yaml'))
+    parser.add_argument('--num-envs', type=int, nargs='+', default=[1, 64])
+    parser.add_argument('--steps', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        base = yaml.safe_load(f)
+    base['experiment']['max_steps'] = args.steps + 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings = [('off', {'enabled': False}),
+                    ('timers', {'enabled': True, 'output_dir': directory, 'dump_interval': 1.0}),
+                    ('timers + sampler', {'enabled': True, 'output_dir': directory, 'dump_interval': 1.0,
+                                          'sampler': {'enabled': True, 'interval': 0.005}})]
+        print(f"{'num_envs':>8} {'profiling':>17} {'steps/s':>10} {'overhead':>9}")
+        for num_envs in args.num_envs:
+            rng = np.random.default_rng(0)
+            shape = (args.steps, num_envs, 2) if num_envs > 1 else (args.steps, 2)
+            actions = rng.uniform(-1, 1, shape).astype(np.float32)
+            baseline = None
+            for name, section in settings:
+                config = copy.deepcopy(base)
+                config['profiling'] = section
+                profiler = configure_profiling(config)
+                env = BioInterfaceVecEnv(config, num_envs) if num_envs > 1 else BioInterfaceEnv(config)
+                rate = max(steps_per_second(env, actions, num_envs > 1) for _ in range(args.repeats))
+                env.close()
+                if profiler is not None:
+                    phases = profiler.snapshot()
+                configure_profiling({})
+                baseline = baseline or rate
+                print(f"{num_envs:>8} {name:>17} {rate:>10.0f} {baseline / rate - 1:>8.1%}")
+            print("  per-phase p50/p99 us: " + ", ".join(
+                f"{phase} {s['p50'] * 1e6:.1f}/{s['p99'] * 1e6:.1f}" for phase, s in phases.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import copy
+import os
+import sys
+import time
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.hardware.emulator import PtySubstrateEmulator
+from src.hardware.stimulator import SerialStimulator
+
+def measure(config, protocol_name, duration, emulator_kwargs):
+    """
+    Stream from a pty-emulated device for `duration` seconds and return link statistics.
+    """
+    config = copy.deepcopy(config)
+    config['hardware']['protocol'] = protocol_name
+    config['hardware']['async_io'] = True
+    with PtySubstrateEmulator(**emulator_kwargs) as emulator:
+        config['hardware']['port'] = emulator.port
+        stim = SerialStimulator(config)
+        try:
+            received = 0
+            start = time.monotonic()
+            while time.monotonic() - start < duration:
+                stim.apply_stimulation(10.0, 1.0)
+                _, values = stim.read_samples()
+                received += len(values)
+                time.sleep(0.005)
+            elapsed = time.monotonic() - start
+            bytes_sent = emulator.bytes_sent
+            decoder = stim.decoder
+        finally:
+            stim.close()
+    return {
+        'protocol': stim.protocol,
+        'samples_per_s': received / elapsed,
+        'bytes_per_sample': bytes_sent / max(received, 1),
+        'crc_errors': getattr(decoder, 'crc_errors', 0),
+        'dropped_frames': getattr(decoder, 'dropped_frames', 0),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="ASCII vs. binary stimulator link throughput over a pty emulator")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--sample-rate', type=float, default=5000.0)
+    parser.add_argument('--frame-samples', type=int, default=32)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    scenarios = [
+        ('auto', 'legacy fw', dict(binary=False)),
+        ('auto', 'unthrottled', dict(binary=True)),
+        ('ascii', '115200 baud', dict(binary=False, baud_rate=115200)),
+        ('auto', '115200 baud', dict(binary=True, baud_rate=115200)),
+        ('auto', '1% corrupted', dict(binary=True, corrupt_rate=0.01)),
+    ]
+    print(f"{'requested':>9} {'link':>13} {'negotiated':>10} {'samples/s':>10} {'bytes/sample':>12} {'crc errors':>10} {'dropped':>8}")
+    for requested, link, kwargs in scenarios:
+        kwargs = dict(kwargs, sample_rate=args.sample_rate, frame_samples=args.frame_samples, seed=0)
+        stats = measure(config, requested, args.duration, kwargs)
+        print(f"{requested:>9} {link:>13} {stats['protocol']:>10} {stats['samples_per_s']:>10.0f} "
+              f"{stats['bytes_per_sample']:>12.2f} {stats['crc_errors']:>10} {stats['dropped_frames']:>8}")
+
+if __name__ == "__main__":
+    main()
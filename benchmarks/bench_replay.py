@@ -0,0 +1,81 @@
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.env.dataset import TransitionDataset
+from src.hardware.replay import ReplayStimulator
+from src.utils.logger import LOG_DTYPE, NpyAppendWriter
+from src.utils.replay import ReplayLog
+
+def write_session(path, n_rows, episode_length, rng, chunk_rows=1000000):
+    # Synthetic ExperimentLogger output, written in chunks so large logs fit in memory
+    writer = NpyAppendWriter(path, LOG_DTYPE)
+    for start in range(0, n_rows, chunk_rows):
+        rows = np.empty(min(chunk_rows, n_rows - start), dtype=LOG_DTYPE)
+        index = np.arange(start, start + len(rows))
+        rows['timestamp'] = index * 0.05
+        rows['step'] = index % episode_length + 1
+        rows['frequency'] = rng.uniform(1.0, 100.0, len(rows))
+        rows['amplitude'] = rng.uniform(0.0, 3.3, len(rows))
+        rows['response'] = np.sin(rows['frequency'] / 10.0) * rows['amplitude']
+        rows['reward'] = -np.abs(rows['response'] - 1.0)
+        writer.write(rows)
+    writer.close()
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay log open/index time and step/batch throughput")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--rows', type=int, default=5000000, help="Total logged steps")
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--steps', type=int, default=50000, help="ReplayStimulator steps to time")
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        for s in range(args.sessions):
+            write_session(os.path.join(log_dir, f"session_{s}.npy"), args.rows // args.sessions,
+                          config['experiment']['max_steps'], rng)
+        config['replay']['logs'] = [os.path.join(log_dir, "session_*.npy")]
+        size = sum(os.path.getsize(os.path.join(log_dir, name)) for name in os.listdir(log_dir))
+        print(f"{len(os.listdir(log_dir))} sessions, {args.rows} steps, {size / 1e6:.0f} MB on disk")
+
+        log, opened = timed(lambda: ReplayLog.from_config(config))
+        print(f"open + episode scan: {opened:.2f} s ({len(log.episode_starts)} episodes)")
+        _, indexed = timed(lambda: log.rows_in_bin(0))
+        print(f"bin index build:     {indexed:.2f} s ({len(log) / indexed / 1e6:.1f} M rows/s)")
+
+        stimulator = ReplayStimulator(config, log=log)
+        frequency = rng.uniform(1.0, 100.0, args.steps)
+        amplitude = rng.uniform(0.0, 3.3, args.steps)
+        def replay_steps():
+            for f, a in zip(frequency.tolist(), amplitude.tolist()):
+                stimulator.apply_stimulation(f, a)
+                stimulator.read_response()
+        _, stepped = timed(replay_steps)
+        print(f"ReplayStimulator:    {stepped / args.steps * 1e6:.1f} us/step")
+
+        dataset = TransitionDataset(log, config, seed=0)
+        n_batches = 200
+        _, sampled = timed(lambda: [dataset.sample(args.batch_size) for _ in range(n_batches)])
+        print(f"random batches:      {n_batches * args.batch_size / sampled / 1e3:.0f} k transitions/s")
+        batches = itertools.islice(dataset.iter_batches(args.batch_size * 64, shuffle=False), n_batches)
+        streamed_rows, streamed = timed(lambda: sum(len(batch['rewards']) for batch in batches))
+        print(f"sequential batches:  {streamed_rows / streamed / 1e6:.2f} M transitions/s")
+
+if __name__ == "__main__":
+    main()
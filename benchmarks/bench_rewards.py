@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.env.history import HistoryBuffer
+from src.model.rewards import RewardFunctions, SinusoidalTracking, Stability
+
+def legacy_stability(num_envs, window, responses):
+    # RewardFunctions.stability per env over its history window: O(window) per reward
+    history = HistoryBuffer(window, batch_size=num_envs)
+    start = time.perf_counter()
+    for response in responses:
+        history.push(response)
+        view = history.view()
+        [RewardFunctions.stability(view[i]) for i in range(num_envs)]
+    return len(responses) * num_envs / (time.perf_counter() - start)
+
+def pipelined(term, responses):
+    steps = np.zeros(responses.shape[1], dtype=np.int64)
+    start = time.perf_counter()
+    for response in responses:
+        steps += 1
+        term(response, steps)
+    return len(responses) * responses.shape[1] / (time.perf_counter() - start)
+
+def legacy_sinusoidal(responses):
+    start = time.perf_counter()
+    for step, response in enumerate(responses):
+        [RewardFunctions.sinusoidal_tracking(r, step) for r in response]
+    return responses.size / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Reward evaluation throughput, per-env functions vs. batched pipeline terms")
+    parser.add_argument('--num-envs', type=int, nargs='+', default=[1, 1024])
+    parser.add_argument('--windows', type=int, nargs='+', default=[50, 500])
+    parser.add_argument('--steps', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'reward':>12} {'envs':>6} {'window':>7} {'legacy rewards/s':>17} {'pipeline rewards/s':>19}")
+    for num_envs in args.num_envs:
+        # Fewer legacy steps with many envs, it loops over them in Python
+        legacy_steps = max(args.steps // num_envs, 20)
+        responses = rng.normal(size=(args.steps, num_envs))
+        for window in args.windows:
+            legacy = legacy_stability(num_envs, window, responses[:legacy_steps])
+            batched = pipelined(Stability(num_envs, window), responses)
+            print(f"{'stability':>12} {num_envs:>6} {window:>7} {legacy:>17.0f} {batched:>19.0f}")
+        legacy = legacy_sinusoidal(responses[:legacy_steps])
+        batched = pipelined(SinusoidalTracking(100), responses)
+        print(f"{'sinusoidal':>12} {num_envs:>6} {'':>7} {legacy:>17.0f} {batched:>19.0f}")
+
+if __name__ == "__main__":
+    main()
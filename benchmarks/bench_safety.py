@@ -0,0 +1,68 @@
+import argparse
+import copy
+import logging
+import os
+import sys
+import time
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.hardware.safety_monitor import SafetyMonitor
+
+def legacy_clamp(monitor, amplitudes):
+    # The previous per-float API: check and clamp one channel at a time
+    max_v = float(monitor.max_voltage)
+    out = []
+    for v in amplitudes.ravel().tolist():
+        if abs(v) > max_v:
+            monitor.violation_count += 1
+        out.append(max(-max_v, min(v, max_v)))
+    return out
+
+def time_calls(fn, n_calls):
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        fn()
+    return (time.perf_counter() - start) / n_calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="SafetyMonitor.enforce cost vs. per-float clamping")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--shapes', nargs='+', default=['scalar', '64', '64x16', '256x64'],
+                        help="Action shapes as NxC, or 'scalar' for the single-channel env")
+    args = parser.parse_args()
+    # Even rate-limited, warnings would clutter the table
+    logging.disable(logging.WARNING)
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    full = copy.deepcopy(config)
+    full['hardware']['safety_limits'].update(
+        electrode_impedance=10000.0, max_slew=1.0, max_charge_density=50000.0, electrode_area=0.01)
+
+    rng = np.random.default_rng(0)
+    print(f"{'shape':>8} {'legacy us':>10} {'voltage us':>11} {'all limits us':>14} {'10% over us':>12} {'ns/channel':>11}")
+    for spec in args.shapes:
+        shape = () if spec == 'scalar' else tuple(int(n) for n in spec.split('x'))
+        frequency = rng.uniform(1.0, 100.0, size=shape)
+        amplitudes = rng.uniform(0.0, 3.3, size=shape)
+        # A tenth of the channels over the voltage limit
+        violating = np.where(rng.random(shape) < 0.1, 5.5, amplitudes)
+        if spec == 'scalar':
+            frequency, amplitudes, violating = frequency[()], amplitudes[()], np.float64(5.5)
+
+        monitor = SafetyMonitor(config)
+        legacy = time_calls(lambda: legacy_clamp(monitor, np.asarray(violating)),
+                            max(10, min(args.calls, 2000000 // np.size(violating))))
+        clamp = time_calls(lambda: monitor.enforce(frequency, amplitudes), args.calls)
+        monitor = SafetyMonitor(full)
+        limited = time_calls(lambda: monitor.enforce(frequency, amplitudes), args.calls)
+        monitor = SafetyMonitor(full)
+        over = time_calls(lambda: monitor.enforce(frequency, violating), args.calls)
+        print(f"{spec:>8} {legacy:>10.2f} {clamp:>11.2f} {limited:>14.2f} {over:>12.2f} "
+              f"{over * 1e3 / np.size(violating):>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import copy
+import os
+import sys
+import time
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.env.bio_env import BioInterfaceEnv
+from src.hardware.emulator import PtySubstrateEmulator
+
+def run_steps(config, n_steps, interval):
+    """
+    Step a hardware-mode env and return per-step latencies (s) and the responses.
+    Sleeping `interval` between steps stands in for policy inference.
+    """
+    env = BioInterfaceEnv(config, mode='hardware')
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    latencies = np.empty(n_steps)
+    responses = np.empty(n_steps)
+    try:
+        for i in range(n_steps):
+            action = rng.uniform(-1, 1, 2).astype(np.float32)
+            start = time.perf_counter()
+            _, _, _, _, info = env.step(action)
+            latencies[i] = time.perf_counter() - start
+            responses[i] = info['response']
+            time.sleep(interval)
+    finally:
+        env.close()
+    return latencies, responses
+
+def report(name, latencies, responses, interval):
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1e6
+    zeros = np.mean(responses == 0.0) * 100
+    print(f"{name:<8} p50={p50:8.1f}us p90={p90:8.1f}us p99={p99:8.1f}us "
+          f"max={latencies.max() * 1e6:8.1f}us zero-responses={zeros:5.1f}% (step interval {interval * 1e3:.1f} ms)")
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end step latency against a pty-emulated stimulator")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--sample-rate', type=float, default=1000.0)
+    parser.add_argument('--interval', type=float, default=0.002, help='Idle time between steps, standing in for policy inference')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        base_config = yaml.safe_load(f)
+    base_config['experiment']['max_steps'] = args.steps + 1
+
+    for name, async_io in (('sync', False), ('async', True)):
+        config = copy.deepcopy(base_config)
+        config['hardware']['async_io'] = async_io
+        with PtySubstrateEmulator(sample_rate=args.sample_rate, seed=0) as emulator:
+            config['hardware']['port'] = emulator.port
+            latencies, responses = run_steps(config, args.steps, args.interval)
+        report(name, latencies, responses, args.interval)
+
+if __name__ == "__main__":
+    main()
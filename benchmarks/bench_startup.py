@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+from src.utils.daemon import submit
+
+# Everything the entry points used to import up front
+EAGER_IMPORTS = "import torch, stable_baselines3, gymnasium, scipy.signal, pandas, matplotlib.pyplot, seaborn"
+
+def wall_time(command, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def wait_for(socket_path, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if submit(socket_path, {'command': 'ping'}, timeout=1.0).get('status') == 'ok':
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Daemon at {socket_path} did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description="Entry point start-up times, and cold vs. warm (daemon) experiment jobs")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--train-steps', type=int, default=2048)
+    parser.add_argument('--episodes', type=int, default=2)
+    args = parser.parse_args()
+
+    python = sys.executable
+    print(f"{'command':>38} {'seconds':>8}")
+    print(f"{'eager imports':>38} {wall_time([python, '-c', EAGER_IMPORTS], args.repeats):>8.2f}")
+    for script in ['main.py', 'scripts/calibrate_electrodes.py', 'scripts/analyze_data.py', 'scripts/daemon.py']:
+        print(f"{script + ' --help':>38} {wall_time([python, script, '--help'], args.repeats):>8.2f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        model = os.path.join(directory, 'model')
+        jobs = [('train', {'command': 'train', 'steps': args.train_steps, 'save_path': model}),
+                ('evaluate', {'command': 'evaluate', 'model': model, 'episodes': args.episodes})]
+        print(f"\n{'job':>10} {'cold s':>8} {'warm first s':>13} {'warm next s':>12}")
+        cold = {}
+        for name, job in jobs:
+            cold[name] = wall_time([python, 'scripts/daemon.py', 'run', json.dumps(job)], 1)
+
+        socket_path = os.path.join(directory, 'daemon.sock')
+        daemon = subprocess.Popen([python, 'scripts/daemon.py', '--socket', socket_path, 'serve'], cwd=ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(socket_path)
+            for name, job in jobs:
+                times = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    response = submit(socket_path, job)
+                    if response['status'] != 'ok':
+                        raise RuntimeError(response['error'])
+                    times.append(time.perf_counter() - start)
+                print(f"{name:>10} {cold[name]:>8.2f} {times[0]:>13.2f} {times[1]:>12.2f}")
+            submit(socket_path, {'command': 'shutdown'})
+        finally:
+            daemon.wait(timeout=30)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.hardware.stimulator import BatchMockStimulator
+from src.hardware.surrogate import SurrogateStimulator
+from src.model.surrogate import SurrogateModel
+
+def random_model(hidden, config, seed=0):
+    # Throughput only depends on the model's shape, not on fitted values
+    rng = np.random.default_rng(seed)
+    stimulation = config['stimulation']
+    model = SurrogateModel(np.zeros(4 + 2 * 4 + 1), 4, 2, 3,
+                           (stimulation['min_frequency'], stimulation['max_frequency']), noise_std=0.05)
+    model.coefficients = rng.normal(0, 0.1, model.n_features)
+    sizes = [model.n_features, *hidden, 1]
+    model.mlp_weights = []
+    for i in range(len(sizes) - 1):
+        model.mlp_weights += [rng.normal(0, 0.1, (sizes[i], sizes[i + 1])), np.zeros(sizes[i + 1])]
+    return model
+
+def steps_per_second(stimulator, num_envs, n_steps, rng):
+    frequency = rng.uniform(1.0, 100.0, num_envs)
+    amplitude = rng.uniform(0.0, 3.3, num_envs)
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        stimulator.apply_stimulation(frequency, amplitude)
+        stimulator.read_response()
+    return n_steps * num_envs / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched surrogate substrate throughput")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--model', help="Fitted .npz to time instead of random linear/MLP models")
+    parser.add_argument('--num-envs', type=int, nargs='+', default=[1, 64, 1024, 8192])
+    parser.add_argument('--env-steps', type=int, default=2000000, help="Substrate steps per measurement")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    if args.model:
+        models = {os.path.basename(args.model): SurrogateModel.load(args.model)}
+    else:
+        models = {'arx': random_model([], config), 'arx + mlp 32x32': random_model([32, 32], config)}
+
+    rng = np.random.default_rng(0)
+    print(f"{'model':>16} {'envs':>6} {'env-steps/s':>12}")
+    for num_envs in args.num_envs:
+        n_steps = max(100, args.env_steps // num_envs // 10)
+        mock = steps_per_second(BatchMockStimulator(config, num_envs, seed=0), num_envs, n_steps, rng)
+        print(f"{'mock':>16} {num_envs:>6} {mock:>12.3g}")
+        for name, model in models.items():
+            stimulator = SurrogateStimulator(config, num_envs, seed=0, model=model)
+            rate = steps_per_second(stimulator, num_envs, n_steps, rng)
+            print(f"{name:>16} {num_envs:>6} {rate:>12.3g}")
+
+if __name__ == "__main__":
+    main()
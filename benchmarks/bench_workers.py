@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+from functools import partial
+import numpy as np
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from src.env.bio_env import BioInterfaceEnv
+from src.env.shm_vec_env import make_shared_memory_env
+from src.env.vec_bio_env import BioInterfaceVecEnv
+
+def steps_per_second(env, n_steps, seed=0):
+    # Env steps/s for a fixed random action batch, after a short warm-up
+    rng = np.random.default_rng(seed)
+    actions = rng.uniform(-1, 1, (env.num_envs,) + env.action_space.shape).astype(np.float32)
+    env.reset()
+    for _ in range(10):
+        env.step(actions)
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        env.step(actions)
+    elapsed = time.perf_counter() - start
+    env.close()
+    return n_steps * env.num_envs / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation steps/s against worker process count")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--num-envs', type=int, default=64)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--env-steps', type=int, default=500000, help="Env steps per measurement")
+    parser.add_argument('--subproc', action='store_true',
+                        help="Also time SB3's SubprocVecEnv (one BioInterfaceEnv per process, pickled pipes)")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    n_steps = max(args.env_steps // args.num_envs, 1)
+    print(f"{os.cpu_count()} cores, {args.num_envs} envs")
+    print(f"{'env':>24} {'workers':>8} {'steps/s':>12} {'speedup':>8}")
+
+    baseline = steps_per_second(BioInterfaceVecEnv(config, args.num_envs), n_steps)
+    print(f"{'in-process vec env':>24} {0:>8} {baseline:>12.0f} {1.0:>8.2f}")
+    for workers in args.workers:
+        if workers > args.num_envs:
+            continue
+        rate = steps_per_second(make_shared_memory_env(config, args.num_envs, workers), n_steps)
+        print(f"{'shared memory':>24} {workers:>8} {rate:>12.0f} {rate / baseline:>8.2f}")
+    if args.subproc:
+        # One process per env, so it is capped at the core count
+        num_envs = min(args.num_envs, os.cpu_count())
+        env = SubprocVecEnv([partial(BioInterfaceEnv, config) for _ in range(num_envs)])
+        rate = steps_per_second(env, max(args.env_steps // num_envs // 10, 1))
+        print(f"{'SubprocVecEnv':>24} {num_envs:>8} {rate:>12.0f} {rate / baseline:>8.2f}")
+
+if __name__ == "__main__":
+    main()
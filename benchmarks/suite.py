@@ -0,0 +1,254 @@
+import argparse
+import copy
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import yaml
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCHMARKS, '..')
+sys.path.append(ROOT)
+RESULTS = os.path.join(BENCHMARKS, 'results')
+
+# name -> function(config, quick) returning {metric: (value, unit, higher_is_better)}
+CASES = {}
+
+def case(name):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+def rate(fn, count):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+@case('env_step')
+def bench_env_step(config, quick):
+    from src.env.bio_env import BioInterfaceEnv
+    from src.env.vec_bio_env import BioInterfaceVecEnv
+    steps = 2000 if quick else 20000
+    config['experiment']['max_steps'] = steps + 1
+    rng = np.random.default_rng(0)
+    results = {}
+    for window in [10, 50, 200]:
+        config['environment']['observation_window'] = window
+        env = BioInterfaceEnv(config)
+        actions = rng.uniform(-1, 1, (steps, 2)).astype(np.float32)
+
+        def run():
+            env.reset(seed=0)
+            for action in actions:
+                env.step(action)
+        results[f"window_{window}"] = (rate(run, steps), 'steps/s', True)
+        env.close()
+
+    num_envs = 64
+    env = BioInterfaceVecEnv(config, num_envs, seed=0)
+    actions = rng.uniform(-1, 1, (steps // 10, num_envs, 2)).astype(np.float32)
+
+    def run_vec():
+        env.reset()
+        for action in actions:
+            env.step_async(action)
+            env.step_wait()
+    results[f"vec_{num_envs}_envs"] = (rate(run_vec, len(actions) * num_envs), 'env steps/s', True)
+    env.close()
+    return results
+
+@case('serial_round_trip')
+def bench_serial_round_trip(config, quick):
+    """
+    STIM command to decoded reply through SerialStimulator and a pty-emulated device.
+    """
+    from src.hardware.emulator import PtySubstrateEmulator
+    from src.hardware.stimulator import SerialStimulator
+    count = 200 if quick else 2000
+    results = {}
+    for protocol in ['ascii', 'binary']:
+        config['hardware']['protocol'] = protocol
+        config['hardware']['async_io'] = False
+        with PtySubstrateEmulator(mode='reply', seed=0) as emulator:
+            config['hardware']['port'] = emulator.port
+            stimulator = SerialStimulator(config)
+            latencies = np.empty(count)
+            try:
+                for i in range(count):
+                    start = time.perf_counter()
+                    stimulator.apply_stimulation(10.0, 1.0)
+                    deadline = start + 1.0
+                    while not stimulator.ser.in_waiting and time.perf_counter() < deadline:
+                        pass
+                    stimulator.read_response()
+                    latencies[i] = time.perf_counter() - start
+            finally:
+                stimulator.close()
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+        results[f"{protocol}_p50"] = (p50, 'us', False)
+        results[f"{protocol}_p99"] = (p99, 'us', False)
+    return results
+
+@case('filters')
+def bench_filters(config, quick):
+    from bench_filters import make_chain, time_chunks
+    samples = 2000 if quick else 20000
+    data = np.random.default_rng(0).normal(size=(64, samples))
+    results = {}
+    chain = make_chain()
+    results['step_1_channel'] = (time_chunks(lambda c: chain.step(c[0, 0]), data[:1], 1), 'ns/sample', False)
+    chain = make_chain()
+    results['chunk_1000_64_channels'] = (time_chunks(chain.process, data, 1000), 'ns/sample', False)
+    return results
+
+@case('logger')
+def bench_logger(config, quick):
+    from bench_logger import bench_buffered
+    rows = 20000 if quick else 200000
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir:
+        for fmt in ['csv', 'npy']:
+            _, total = bench_buffered(log_dir, f"data_log.{fmt}", rows)
+            results[fmt] = (total, 'rows/s', True)
+    return results
+
+@case('rewards')
+def bench_rewards(config, quick):
+    from bench_rewards import pipelined
+    from src.model.rewards import SinusoidalTracking, Stability
+    steps = 500 if quick else 5000
+    rng = np.random.default_rng(0)
+    results = {}
+    for num_envs in [1, 1024]:
+        responses = rng.normal(size=(steps, num_envs))
+        results[f"stability_{num_envs}_envs"] = (pipelined(Stability(num_envs, 50), responses), 'rewards/s', True)
+        results[f"sinusoidal_{num_envs}_envs"] = (pipelined(SinusoidalTracking(100), responses), 'rewards/s', True)
+    return results
+
+@case('ppo')
+def bench_ppo(config, quick):
+    """
+    End-to-end PPO learning rate in simulation mode, rollouts and updates included.
+    """
+    from stable_baselines3 import PPO
+    from src.env.bio_env import BioInterfaceEnv
+    timesteps = 2048 if quick else 8192
+    config['experiment']['max_steps'] = 1000
+    env = BioInterfaceEnv(config)
+    model = PPO("MlpPolicy", env, verbose=0, learning_rate=config['rl_agent']['learning_rate'],
+                gamma=config['rl_agent']['gamma'], batch_size=config['rl_agent']['batch_size'], seed=0, device='cpu')
+    # The first rollout pays for torch's lazy initialization
+    model.learn(total_timesteps=model.n_steps)
+    timesteps_per_second = rate(lambda: model.learn(total_timesteps=timesteps, reset_num_timesteps=False), timesteps)
+    env.close()
+    return {'timesteps': (timesteps_per_second, 'timesteps/s', True)}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(config, names, quick, repeats):
+    """
+    Run every case `repeats` times and keep the best value of each metric,
+    the least noisy estimate on a shared machine.
+    """
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for metric, (value, unit, higher) in CASES[name](copy.deepcopy(config), quick).items():
+                key = f"{name}.{metric}"
+                if key in results:
+                    value = (max if higher else min)(value, results[key]['value'])
+                results[key] = {'value': float(value), 'unit': unit, 'higher_is_better': higher}
+        print(f"{name} done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return {
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'quick': quick,
+        'repeats': repeats,
+        'results': results,
+    }
+
+def compare(current, baseline, tolerance):
+    """
+    Print every metric next to its baseline; returns the metrics that got
+    worse by more than tolerance (a fraction).
+    """
+    regressions = []
+    print(f"{'metric':<40} {'value':>12} {'baseline':>12} {'change':>8}  unit")
+    for metric, result in current['results'].items():
+        value = result['value']
+        base = (baseline or {}).get('results', {}).get(metric)
+        if base is None or not base['value']:
+            print(f"{metric:<40} {value:>12.4g} {'':>12} {'':>8}  {result['unit']}")
+            continue
+        change = value / base['value'] - 1
+        # Positive when better, whichever way the metric goes
+        gain = change if result['higher_is_better'] else -change
+        flag = ''
+        if gain < -tolerance:
+            flag = '  REGRESSION'
+            regressions.append(metric)
+        print(f"{metric:<40} {value:>12.4g} {base['value']:>12.4g} {change:>+8.1%}  {result['unit']}{flag}")
+    return regressions
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite: env, serial driver, filters, logger, rewards and PPO "
+                                                 "throughput, saved as JSON and compared against a baseline")
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config', 'default_config.yaml'))
+    parser.add_argument('--only', nargs='+', default=['*'], help=f"Cases to run (glob patterns): {', '.join(CASES)}")
+    parser.add_argument('--quick', action='store_true', help="Smaller sizes, for a fast sanity check")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs of every case; the best value counts")
+    parser.add_argument('--output', default=os.path.join(RESULTS, 'latest.json'))
+    parser.add_argument('--baseline', default=os.path.join(RESULTS, 'baseline.json'),
+                        help="Results to compare against; skipped if the file does not exist")
+    parser.add_argument('--save-baseline', action='store_true', help="Make these results the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="Fraction a metric may get worse before it counts as a regression")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if any(fnmatch.fnmatch(name, pattern) for pattern in args.only)]
+    if not names:
+        parser.error(f"No cases match {args.only}; available: {', '.join(CASES)}")
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+
+    current = run_suite(config, names, args.quick, args.repeats)
+    write_json(args.output, current)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('quick') != args.quick:
+            print("Baseline was run with different sizes (--quick); changes are not comparable", file=sys.stderr)
+    regressions = compare(current, baseline, args.tolerance)
+    print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%} against {args.baseline}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,85 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 import logging
-from src.hardware.stimulator import MockStimulator, SerialStimulator
+from src.env.history import HistoryBuffer
+from src.hardware.replay import ReplayStimulator
+from src.hardware.safety_monitor import SafetyMonitor
+from src.hardware.surrogate import SurrogateStimulator
+from src.model.rewards import make_reward
+from src.utils.features import FeatureExtractor
+from src.utils.filters import FilterChain
+from src.utils.profiling import get_profiler
+from src.hardware.stimulator import MockStimulator, SerialStimulator, channel_counts
+
+def make_response_filter(config):
+    """
+    Streaming filter for the substrate response, or None when not configured.
+    """
+    filter_config = config['environment'].get('response_filter')
+    if not filter_config or not filter_config.get('enabled', True):
+        return None
+    return FilterChain.from_config(filter_config)
+
+def make_feature_extractor(config):
+    """
+    Streaming response features appended to the observation, or None when not
+    configured.
+    """
+    feature_config = config['environment'].get('features')
+    if not feature_config or not feature_config.get('enabled', True):
+        return None
+    return FeatureExtractor.from_config(feature_config)
+
+def unscale_action(freq_norm, amp_norm, config):
+    """
+    Map normalized [-1, 1] actions to stimulation frequency and amplitude.
+    Works element-wise, so it accepts scalars or arrays of actions.
+    """
+    min_f = config['stimulation']['min_frequency']
+    max_f = config['stimulation']['max_frequency']
+    min_a = config['stimulation']['min_amplitude']
+    max_a = config['stimulation']['max_amplitude']
+
+    # Map [-1, 1] to [min, max]
+    frequency = min_f + (max_f - min_f) * ((freq_norm + 1) / 2)
+    amplitude = min_a + (max_a - min_a) * ((amp_norm + 1) / 2)
+    return frequency, amplitude
+
+def scale_action(frequency, amplitude, config):
+    """
+    Inverse of unscale_action: stimulation frequency and amplitude to [-1, 1].
+    """
+    min_f = config['stimulation']['min_frequency']
+    max_f = config['stimulation']['max_frequency']
+    min_a = config['stimulation']['min_amplitude']
+    max_a = config['stimulation']['max_amplitude']
+
+    freq_norm = 2 * (frequency - min_f) / (max_f - min_f) - 1
+    amp_norm = 2 * (amplitude - min_a) / (max_a - min_a) - 1
+    return freq_norm, amp_norm
+
+def make_spaces(config):
+    """
+    Action and observation spaces for C stimulation and M recording electrodes.
+    A single electrode pair keeps the original flat shapes: action (2,) and
+    observation (window,); otherwise the action is (C, 2) [frequency, amplitude]
+    rows and the observation is (window, M). With F streaming features each
+    recorded sample is observed with its features, as (window, M * (1 + F))
+    columns grouped by channel. sample_shape is the shape of one response.
+    """
+    stim_channels, record_channels = channel_counts(config)
+    window = config['environment']['observation_window']
+    if stim_channels == 1 and record_channels == 1:
+        action_shape, sample_shape = (2,), ()
+    else:
+        action_shape, sample_shape = (stim_channels, 2), (record_channels,)
+    action_space = spaces.Box(low=-1, high=1, shape=action_shape, dtype=np.float32)
+    observed_shape = sample_shape
+    features = make_feature_extractor(config)
+    if features is not None:
+        observed_shape = (record_channels * (1 + len(features)),)
+    observation_space = spaces.Box(low=-5, high=5, shape=(window,) + observed_shape, dtype=np.float32)
+    return action_space, observation_space, sample_shape
 
 class BioInterfaceEnv(gym.Env):
     """
@@ -18,54 +96,81 @@ class BioInterfaceEnv(gym.Env):
         self.logger = logging.getLogger(__name__)
 
         # Define action and observation space
-        # Action: [Frequency, Amplitude]
+        # Action: [Frequency, Amplitude] per stimulation channel
         # Normalized to [-1, 1] for stable baselines
-        self.action_space = spaces.Box(low=-1, high=1, shape=(2,), dtype=np.float32)
-
-        # Observation: History of responses
+        # Observation: History of responses per recording channel
         # We keep a window of past readings
         self.obs_window = config['environment']['observation_window']
-        self.observation_space = spaces.Box(low=-5, high=5, shape=(self.obs_window,), dtype=np.float32)
+        self.action_space, self.observation_space, sample_shape = make_spaces(config)
 
         # Initialize hardware interface
         if mode == 'hardware':
-            self.stimulator = SerialStimulator(config)
+            if config['hardware'].get('driver', 'serial') == 'ni':
+                from src.hardware.ni_driver import NIDaqDriver
+                self.stimulator = NIDaqDriver(config)
+            else:
+                self.stimulator = SerialStimulator(config)
+        elif mode == 'replay':
+            self.stimulator = ReplayStimulator(config)
+        elif config['environment'].get('simulator', 'mock') == 'surrogate':
+            self.stimulator = SurrogateStimulator(config)
         else:
             self.stimulator = MockStimulator(config)
 
-        self.history = np.zeros(self.obs_window)
+        self.safety = SafetyMonitor(config)
+        self.history = HistoryBuffer(self.obs_window, sample_shape=self.observation_space.shape[1:])
+        # Filter and feature state follow the substrate signal, so they survive episode resets
+        self.response_filter = make_response_filter(config)
+        self.features = make_feature_extractor(config)
+        self.reward = make_reward(config, sample_shape=sample_shape)
         self.steps = 0
         self.max_steps = config['experiment']['max_steps']
+        self.profiler = get_profiler()
 
     def step(self, action):
         self.steps += 1
-        
-        # Unscale action
-        freq_norm, amp_norm = action
-        
-        min_f = self.config['stimulation']['min_frequency']
-        max_f = self.config['stimulation']['max_frequency']
-        min_a = self.config['stimulation']['min_amplitude']
-        max_a = self.config['stimulation']['max_amplitude']
+        profiler = self.profiler
+        if profiler is not None:
+            t = profiler.now()
 
-        # Map [-1, 1] to [min, max]
-        frequency = min_f + (max_f - min_f) * ((freq_norm + 1) / 2)
-        amplitude = min_a + (max_a - min_a) * ((amp_norm + 1) / 2)
+        # Unscale action
+        action = np.asarray(action)
+        freq_norm, amp_norm = action[..., 0], action[..., 1]
+        frequency, amplitude = unscale_action(freq_norm, amp_norm, self.config)
+        amplitude = self.safety.enforce(frequency, amplitude)
+        if profiler is not None:
+            t = profiler.lap('env.action', t)
 
         # Apply action
         self.stimulator.apply_stimulation(frequency, amplitude)
+        if profiler is not None:
+            t = profiler.lap('env.apply_stimulation', t)
 
         # Read response
         response = self.stimulator.read_response()
+        if profiler is not None:
+            t = profiler.lap('env.read_response', t)
+        raw_response = response
+        if self.response_filter is not None:
+            response = self.response_filter.step(response)
+            if profiler is not None:
+                t = profiler.lap('env.filter', t)
 
         # Update history
-        self.history = np.roll(self.history, -1)
-        self.history[-1] = response
+        if self.features is None:
+            self.history.push(response)
+        else:
+            features = self.features.step(response)
+            self.history.push(np.concatenate([np.reshape(response, features.shape[:-1] + (1,)), features], axis=-1).ravel())
+        if profiler is not None:
+            t = profiler.lap('env.history', t)
 
         # Calculate reward
         # Goal: Maximize response (just a placeholder objective)
         # Or match a target pattern
         reward = self._calculate_reward(response)
+        if profiler is not None:
+            profiler.lap('env.reward', t)
 
         # Check done
         terminated = False
@@ -78,14 +183,17 @@ class BioInterfaceEnv(gym.Env):
             "amplitude": amplitude,
             "response": response
         }
+        if self.response_filter is not None:
+            info["raw_response"] = raw_response
 
-        return self.history, reward, terminated, truncated, info
+        return self.history.view(), reward, terminated, truncated, info
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         self.steps = 0
-        self.history = np.zeros(self.obs_window)
-        return self.history, {}
+        self.history.reset()
+        self.reward.reset()
+        return self.history.view(), {}
 
     def render(self, mode='human'):
         pass
@@ -94,7 +202,5 @@ class BioInterfaceEnv(gym.Env):
         self.stimulator.close()
 
     def _calculate_reward(self, current_response):
-        # Example reward: Keep response close to 1.0
-        target = 1.0
-        error = abs(current_response - target)
-        return -error
+        # Reward pipeline chosen by environment.target_response_pattern
+        return self.reward(current_response, self.steps)
@@ -0,0 +1,76 @@
+import numpy as np
+
+class HistoryBuffer:
+    """
+    Preallocated circular buffer holding the last `window` samples of a signal.
+
+    Every sample is written twice, at `pos` and `pos + window` of a double-length
+    array, so the most recent `window` samples (oldest first) are always one
+    contiguous slice. view() is therefore zero-copy and push() never allocates.
+
+    With batch_size set, the buffer tracks one history per env along axis 0 and
+    view() returns a (batch_size, window, *sample_shape) array.
+    """
+    def __init__(self, window, batch_size=None, sample_shape=(), dtype=np.float32):
+        self.window = window
+        self.batch_size = batch_size
+        self.sample_shape = tuple(sample_shape)
+
+        if batch_size is None:
+            shape = (2 * window,) + self.sample_shape
+        else:
+            shape = (batch_size, 2 * window) + self.sample_shape
+
+        # Two buffers are kept so that reset() can swap to a clean one: a view
+        # handed out just before an episode ends (e.g. a terminal observation)
+        # then stays intact until the following reset.
+        self._buffers = [np.zeros(shape, dtype=dtype), np.zeros(shape, dtype=dtype)]
+        self._views = [self._make_views(data) for data in self._buffers]
+        self._active = 0
+        self._data = self._buffers[0]
+        self._pos = 0
+
+    def _make_views(self, data):
+        # One read-only view per write position, built once so view() is free
+        views = []
+        for pos in range(self.window):
+            if self.batch_size is None:
+                view = data[pos + 1:pos + 1 + self.window]
+            else:
+                view = data[:, pos + 1:pos + 1 + self.window]
+            view.flags.writeable = False
+            views.append(view)
+        return views
+
+    def push(self, sample):
+        """
+        Append one sample (or one sample per env when batched), dropping the oldest.
+        """
+        pos = self._pos
+        if self.batch_size is None:
+            self._data[pos] = sample
+            self._data[pos + self.window] = sample
+        else:
+            self._data[:, pos] = sample
+            self._data[:, pos + self.window] = sample
+        self._pos = pos + 1 if pos + 1 < self.window else 0
+
+    def view(self):
+        """
+        Return the current history, oldest sample first, without copying.
+        The view is read-only and reflects later pushes, so callers that need
+        to keep an observation across steps must copy it.
+        """
+        return self._views[self._active][self._pos - 1]
+
+    def reset(self, indices=None):
+        """
+        Clear the history. For a batched buffer, indices selects the envs to clear.
+        """
+        if indices is None:
+            self._active = 1 - self._active
+            self._data = self._buffers[self._active]
+            self._data.fill(0)
+            self._pos = 0
+        else:
+            self._data[indices] = 0
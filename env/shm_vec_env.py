@@ -0,0 +1,227 @@
+import logging
+import multiprocessing as mp
+from functools import partial
+from multiprocessing import shared_memory
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+
+def worker_seeds(seed, num_workers):
+    """
+    One independent integer seed per worker, derived from a base seed (e.g.
+    experiment.seed) so that neighbouring base seeds never share a worker stream.
+    """
+    children = np.random.SeedSequence(seed).spawn(num_workers)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+def _buffer_layout(num_envs, observation_space, action_space):
+    # (shape, dtype) of every shared buffer: two alternating observation
+    # buffers, then actions, rewards and dones
+    return [
+        ((2, num_envs) + observation_space.shape, observation_space.dtype),
+        ((num_envs,) + action_space.shape, action_space.dtype),
+        ((num_envs,), np.float32),
+        ((num_envs,), np.bool_),
+    ]
+
+def _views(blocks, layout):
+    return [np.ndarray(shape, dtype=dtype, buffer=block.buf) for block, (shape, dtype) in zip(blocks, layout)]
+
+def _worker(remote, parent_remote, env_fn_wrapper):
+    parent_remote.close()
+    venv = env_fn_wrapper.var()
+    blocks = []
+    try:
+        remote.send((venv.num_envs, venv.observation_space, venv.action_space))
+        names, layout, offset = remote.recv()
+        blocks = [shared_memory.SharedMemory(name=name) for name in names]
+        rows = slice(offset, offset + venv.num_envs)
+        observations, actions, rewards, dones = _views(blocks, layout)
+        observations, actions, rewards, dones = observations[:, rows], actions[rows], rewards[rows], dones[rows]
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                # The actions stay untouched until this worker replies
+                venv.step_async(actions)
+                obs, rewards[:], dones[:], infos = venv.step_wait()
+                observations[data] = obs
+                remote.send(infos)
+            elif cmd == "reset":
+                index, seeds, options = data
+                # Seeds and options set on the parent apply to this worker's envs at this reset
+                venv._seeds = seeds
+                venv._options = options
+                observations[index] = venv.reset()
+                remote.send(venv.reset_infos)
+            elif cmd == "get_attr":
+                remote.send(venv.get_attr(*data))
+            elif cmd == "set_attr":
+                remote.send(venv.set_attr(*data))
+            elif cmd == "seed":
+                remote.send(venv.seed(data))
+            elif cmd == "env_method":
+                name, args, kwargs, indices = data
+                remote.send(venv.env_method(name, *args, indices=indices, **kwargs))
+            elif cmd == "env_is_wrapped":
+                remote.send(venv.env_is_wrapped(*data))
+            elif cmd == "close":
+                break
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        venv.close()
+        # Drop the views before closing the blocks they point into
+        observations = actions = rewards = dones = None
+        for block in blocks:
+            block.close()
+        remote.close()
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    Steps vectorized envs in worker processes, for simulations that outgrow one core.
+    Every worker runs its own VecEnv (built by one of worker_fns) over a contiguous
+    slice of the envs. Actions, observations, rewards and dones live in
+    shared-memory buffers that workers read and write in place; the pipes only
+    carry a short command and the per-env info dicts.
+
+    Like BioInterfaceVecEnv, observations are handed out from two alternating
+    buffers, so the previous observation stays valid for one more step.
+    """
+    def __init__(self, worker_fns, start_method=None):
+        self.logger = logging.getLogger(__name__)
+        self.waiting = False
+        self.closed = False
+        self._blocks = []
+
+        if start_method is None:
+            # Same default as SB3's SubprocVecEnv: fork is not thread safe
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in worker_fns])
+        self.processes = []
+        for work_remote, remote, worker_fn in zip(work_remotes, self.remotes, worker_fns):
+            process = ctx.Process(target=_worker, args=(work_remote, remote, CloudpickleWrapper(worker_fn)), daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        sizes, observation_spaces, action_spaces = zip(*[remote.recv() for remote in self.remotes])
+        self.worker_sizes = list(sizes)
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int).tolist()
+        num_envs = self.offsets[-1]
+        observation_space, action_space = observation_spaces[0], action_spaces[0]
+
+        layout = _buffer_layout(num_envs, observation_space, action_space)
+        for shape, dtype in layout:
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            self._blocks.append(shared_memory.SharedMemory(create=True, size=size))
+        self._obs_buffers, self._actions, self._rewards, self._dones = _views(self._blocks, layout)
+        names = [block.name for block in self._blocks]
+        for remote, offset in zip(self.remotes, self.offsets):
+            remote.send((names, layout, offset))
+        self._obs_index = 0
+
+        self.render_mode = None
+        super().__init__(num_envs, observation_space, action_space)
+        self.logger.info(f"Stepping {num_envs} envs in {len(self.remotes)} worker processes ({start_method})")
+
+    def step_async(self, actions):
+        np.copyto(self._actions, np.asarray(actions).reshape(self._actions.shape), casting='unsafe')
+        self._obs_index = 1 - self._obs_index
+        for remote in self.remotes:
+            remote.send(("step", self._obs_index))
+        self.waiting = True
+
+    def step_wait(self):
+        infos = []
+        for remote in self.remotes:
+            infos.extend(remote.recv())
+        self.waiting = False
+        return self._obs_buffers[self._obs_index], self._rewards.copy(), self._dones.copy(), infos
+
+    def reset(self):
+        self._obs_index = 1 - self._obs_index
+        for w, remote in enumerate(self.remotes):
+            start, stop = self.offsets[w], self.offsets[w + 1]
+            remote.send(("reset", (self._obs_index, self._seeds[start:stop], self._options[start:stop])))
+        self.reset_infos = []
+        for remote in self.remotes:
+            self.reset_infos.extend(remote.recv())
+        self._reset_seeds()
+        self._reset_options()
+        return self._obs_buffers[self._obs_index]
+
+    def seed(self, seed=None):
+        """
+        Reseed every worker with its worker_seeds() share of seed, as
+        make_shared_memory_env does, instead of SB3's seed + env index (which
+        SB3 applies when a model is given seed=...).
+        """
+        for remote, worker_seed in zip(self.remotes, worker_seeds(seed, len(self.remotes))):
+            remote.send(("seed", worker_seed))
+        seeds = []
+        for remote in self.remotes:
+            seeds.extend(remote.recv())
+        return seeds
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self._obs_buffers = self._actions = self._rewards = self._dones = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self.closed = True
+
+    def _worker_indices(self, indices):
+        # (worker, local indices) pairs covering the requested global env indices
+        indices = self._get_indices(indices)
+        workers = np.searchsorted(self.offsets, indices, side='right') - 1
+        for w in range(len(self.remotes)):
+            local = [i - self.offsets[w] for i, worker in zip(indices, workers) if worker == w]
+            if local:
+                yield w, local
+
+    def _call(self, cmd, make_args, indices):
+        targets = list(self._worker_indices(indices))
+        for w, local in targets:
+            self.remotes[w].send((cmd, make_args(local)))
+        results = []
+        for w, _ in targets:
+            results.extend(self.remotes[w].recv() or [])
+        return results
+
+    def get_attr(self, attr_name, indices=None):
+        return self._call("get_attr", lambda local: (attr_name, local), indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._call("set_attr", lambda local: (attr_name, value, local), indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._call("env_method", lambda local: (method_name, method_args, method_kwargs, local), indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return self._call("env_is_wrapped", lambda local: (wrapper_class, local), indices)
+
+def make_shared_memory_env(config, num_envs, num_workers, start_method=None):
+    """
+    Split num_envs simulated substrates over num_workers processes, each running a
+    BioInterfaceVecEnv seeded from experiment.seed and its worker rank.
+    """
+    from src.env.vec_bio_env import BioInterfaceVecEnv
+
+    if not 1 <= num_workers <= num_envs:
+        raise ValueError(f"Need between 1 and num_envs ({num_envs}) workers, got {num_workers}")
+    sizes = [len(part) for part in np.array_split(np.arange(num_envs), num_workers)]
+    seeds = worker_seeds(config['experiment'].get('seed'), num_workers)
+    worker_fns = [partial(BioInterfaceVecEnv, config, size, seed=seed) for size, seed in zip(sizes, seeds)]
+    return SharedMemoryVecEnv(worker_fns, start_method=start_method)
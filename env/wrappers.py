@@ -47,3 +47,23 @@ class DiscreteActionWrapper(gym.ActionWrapper):
         amp_cont = -1 + (2 * amp_idx / (self.bins - 1))
         
         return np.array([freq_cont, amp_cont], dtype=np.float32)
+
+class FixedRateWrapper(gym.Wrapper):
+    """
+    Paces step() to a fixed control period with a PeriodicTimer
+    (src/hardware/scheduler.py), so training on hardware sees the same timing
+    as deployment. Each reset starts a new grid of deadlines; pauses between
+    steps, such as policy updates, count as missed deadlines.
+    """
+    def __init__(self, env, timer):
+        super().__init__(env)
+        self.timer = timer
+
+    def reset(self, **kwargs):
+        result = self.env.reset(**kwargs)
+        self.timer.start()
+        return result
+
+    def step(self, action):
+        self.timer.wait()
+        return self.env.step(action)
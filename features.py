@@ -0,0 +1,336 @@
+import numpy as np
+
+def _smoothing(fs, time_constant):
+    # Per-sample weight of an exponential average with the given time constant
+    return 1.0 - np.exp(-1.0 / (fs * time_constant))
+
+def _ewma(data, alpha, previous):
+    """
+    Exponential average of data (time along axis 0) continuing from the
+    previous average, one value per channel: y[n] = (1 - alpha) y[n-1] + alpha x[n].
+    """
+    from scipy import signal
+    y, _ = signal.lfilter([alpha], [1.0, alpha - 1.0], data, axis=0, zi=((1.0 - alpha) * previous)[None])
+    return y
+
+class SpikeDetector:
+    """
+    Online spike detection with an adaptive threshold.
+
+    Each channel keeps an exponentially weighted baseline mean and mean absolute
+    deviation with the given time constant. A sample further from the baseline
+    than `threshold` deviations (as they stood before that sample) is a spike,
+    unless it comes within `refractory` seconds of the previous spike on its
+    channel. Nothing is detected during the first time_constant seconds of a
+    channel, while its baseline settles.
+    """
+    def __init__(self, fs, threshold=4.0, time_constant=5.0, refractory=0.5):
+        self.fs = fs
+        self.threshold = threshold
+        self.alpha = _smoothing(fs, time_constant)
+        self.warmup = int(np.ceil(fs * time_constant))
+        self.refractory = int(round(refractory * fs))
+        self._mean = None
+
+    def _init_state(self, first_sample):
+        self._mean = np.array(first_sample, dtype=np.float64)
+        self._deviation = np.zeros_like(self._mean)
+        self._count = np.zeros(self._mean.shape, dtype=np.int64)
+        # Samples since the last spike, past the refractory period at first
+        self._since_spike = np.full(self._mean.shape, self.refractory, dtype=np.int64)
+
+    def process(self, data):
+        """
+        Spike flags for a chunk shaped (time, channels).
+        """
+        if self._mean is None:
+            self._init_state(data[0])
+        alpha = self.alpha
+        mean = _ewma(data, alpha, self._mean)
+        # Baseline before each sample
+        before = np.concatenate([self._mean[None], mean[:-1]])
+        distance = np.abs(data - before)
+        deviation = _ewma(distance, alpha, self._deviation)
+        limit = self.threshold * np.concatenate([self._deviation[None], deviation[:-1]])
+        count = self._count + np.arange(len(data))[:, None]
+        spikes = (distance > limit) & (count >= self.warmup)
+
+        if self.refractory:
+            # Candidates are rare, so the refractory period is enforced per candidate
+            last = -1 - self._since_spike  # Position of the previous spike (negative: earlier chunk)
+            times, channels = np.nonzero(spikes)
+            for t, c in zip(times.tolist(), channels.tolist()):
+                if t - last[c] <= self.refractory:
+                    spikes[t, c] = False
+                else:
+                    last[c] = t
+            self._since_spike = len(data) - 1 - last
+        self._mean = mean[-1]
+        self._deviation = deviation[-1]
+        self._count += len(data)
+        return spikes
+
+    def step(self, sample):
+        """
+        Spike flags for one sample per channel, shaped (channels,).
+        """
+        if self._mean is None:
+            self._init_state(sample)
+        distance = np.abs(sample - self._mean)
+        spikes = (distance > self.threshold * self._deviation) & (self._count >= self.warmup)
+        if self.refractory:
+            self._since_spike += 1
+            spikes &= self._since_spike > self.refractory
+            self._since_spike[spikes] = 0
+        self._mean += self.alpha * (sample - self._mean)
+        self._deviation += self.alpha * (distance - self._deviation)
+        self._count += 1
+        return spikes
+
+    def reset(self, index=None):
+        if self._mean is None:
+            return
+        if index is None:
+            self._mean = None
+        else:
+            # Detection on the channel waits for its baseline to settle again
+            self._count[index] = 0
+            self._deviation[index] = 0.0
+            self._since_spike[index] = self.refractory
+
+class SpikeRate:
+    """
+    Spike rate in spikes per second, an exponential average of the spike
+    flags with the given time constant.
+    """
+    def __init__(self, fs, time_constant=10.0):
+        self.fs = fs
+        self.alpha = _smoothing(fs, time_constant)
+        self._rate = None
+
+    def process(self, spikes):
+        if self._rate is None:
+            self._rate = np.zeros(spikes.shape[1:])
+        rate = _ewma(spikes * self.fs, self.alpha, self._rate)
+        self._rate = rate[-1]
+        return rate
+
+    def step(self, spikes):
+        if self._rate is None:
+            self._rate = np.zeros(np.shape(spikes))
+        self._rate += self.alpha * (spikes * self.fs - self._rate)
+        return self._rate.copy()
+
+    def reset(self, index=None):
+        if self._rate is not None:
+            if index is None:
+                self._rate = None
+            else:
+                self._rate[index] = 0.0
+
+class BandPower:
+    """
+    Rolling signal power in frequency bands over the last `window` samples.
+
+    The DFT bins of each band are tracked with a sliding DFT (the sliding
+    Goertzel recursion X_k <- w_k (X_k + x[n] - x[n - window])), so a sample
+    costs O(bins) whatever the window. The bins are recomputed exactly from the
+    ring of recent samples once per window, so rounding errors do not build up.
+    A band's power is the mean-square amplitude of its bins (one-sided, so a
+    sine of amplitude A in the band gives A^2 / 2); before the window has
+    filled, the missing samples count as zeros.
+    """
+    def __init__(self, fs, bands, window=64):
+        self.fs = fs
+        self.window = window
+        self.bands = [tuple(band) for band in bands]
+        bins, members = [], []
+        for low, high in self.bands:
+            band_bins = [k for k in range(window // 2 + 1) if low <= k * fs / window <= high]
+            if not band_bins:
+                # Narrower than the bin spacing: use the nearest bin
+                band_bins = [min(int(round((low + high) / 2 * window / fs)), window // 2)]
+            members.append(band_bins)
+            bins.extend(k for k in band_bins if k not in bins)
+        self.bins = np.array(bins)
+        # One-sided mean-square power per bin, summed over the bins of each band
+        one_sided = np.where((self.bins == 0) | (2 * self.bins == window), 1.0, 2.0) / window ** 2
+        self._weights = np.zeros((len(bins), len(self.bands)))
+        for j, band_bins in enumerate(members):
+            for k in band_bins:
+                i = bins.index(k)
+                self._weights[i, j] = one_sided[i]
+        self._rotation = np.exp(2j * np.pi * self.bins / window)
+        # DFT of the window, oldest sample first, for the exact refresh
+        self._basis = np.exp(-2j * np.pi * np.outer(np.arange(window), self.bins) / window)
+        self._spectrum = None
+
+    def _init_state(self, channels):
+        self._ring = np.zeros((self.window, channels))
+        self._pos = 0
+        self._since_refresh = 0
+        self._spectrum = np.zeros((channels, len(self.bins)), dtype=np.complex128)
+
+    def process(self, data):
+        """
+        Band power for each sample of a chunk shaped (time, channels), shaped
+        (time, channels, bands).
+        """
+        if self._spectrum is None:
+            self._init_state(data.shape[1])
+        length, window = len(data), self.window
+        # Samples leaving the window: from the ring, then from the chunk itself
+        delayed = np.empty_like(data)
+        from_ring = min(length, window)
+        delayed[:from_ring] = self._ring[(self._pos + np.arange(from_ring)) % window]
+        delayed[from_ring:] = data[:max(length - window, 0)]
+        change = data - delayed
+
+        # Closed form of the recursion over the chunk: X[n] = w^(n+1) (X[-1] + sum_m<=n d[m] w^-m)
+        steps = np.arange(length)[:, None] * self.bins
+        unwind = np.exp(-2j * np.pi * (steps % window) / window)
+        spectrum = np.cumsum(change[:, :, None] * unwind[:, None, :], axis=0)
+        spectrum += self._spectrum
+        spectrum *= (self._rotation * unwind.conj())[:, None, :]
+
+        kept = data[-window:]
+        self._ring[(self._pos + np.arange(length - len(kept), length)) % window] = kept
+        self._pos = (self._pos + length) % window
+        self._spectrum = spectrum[-1]
+        self._since_refresh += length
+        if self._since_refresh >= window:
+            self._refresh()
+        return (spectrum.real ** 2 + spectrum.imag ** 2) @ self._weights
+
+    def step(self, sample):
+        """
+        Band power for one sample per channel, shaped (channels, bands).
+        """
+        if self._spectrum is None:
+            self._init_state(len(sample))
+        change = sample - self._ring[self._pos]
+        self._ring[self._pos] = sample
+        self._pos = (self._pos + 1) % self.window
+        spectrum = self._spectrum
+        spectrum += change[:, None]
+        spectrum *= self._rotation
+        self._since_refresh += 1
+        if self._since_refresh >= self.window:
+            self._refresh()
+        return (spectrum.real ** 2 + spectrum.imag ** 2) @ self._weights
+
+    def _refresh(self):
+        recent = np.roll(self._ring, -self._pos, axis=0)
+        self._spectrum[:] = recent.T @ self._basis
+        self._since_refresh = 0
+
+    def reset(self, index=None):
+        if self._spectrum is None:
+            return
+        if index is None:
+            self._spectrum = None
+        else:
+            self._ring[:, index] = 0.0
+            self._spectrum[index] = 0.0
+
+class FeatureExtractor:
+    """
+    Streaming features of a response signal, computed per channel in O(1)
+    amortized time per sample:
+    - spikes: 1.0 where SpikeDetector flags a spike, else 0.0,
+    - spike_rate: SpikeRate of those spikes, in spikes per second,
+    - one BandPower value per band.
+
+    Like FilterChain, process() takes a chunk along `axis` and step() a single
+    sample per channel, and both continue the same state, so a signal can be
+    fed in chunks of any size. Features go along a new last axis, in the order
+    of `names`. The channel layout is fixed by the first call.
+
+    Example:
+        extractor = FeatureExtractor(fs=20, spikes={'threshold': 4.0}, band_power={'bands': [[0.1, 1.0]]})
+        features = extractor.step(response)
+    """
+    def __init__(self, fs, spikes=None, spike_rate=None, band_power=None):
+        self.fs = fs
+        self.names = []
+        self.detector = self.rate = self.band_power = None
+        if spikes is not None or spike_rate is not None:
+            # The rate needs spikes, with default detection if not configured
+            self.detector = SpikeDetector(fs, **(spikes or {}))
+            if spikes is not None:
+                self.names.append('spikes')
+        if spike_rate is not None:
+            self.rate = SpikeRate(fs, **spike_rate)
+            self.names.append('spike_rate')
+        if band_power is not None:
+            self.band_power = BandPower(fs, **band_power)
+            self.names.extend(f"power_{low:g}-{high:g}Hz" for low, high in self.band_power.bands)
+        self._emit_spikes = spikes is not None
+        self._channel_shape = None
+
+    @classmethod
+    def from_config(cls, feature_config):
+        """
+        Build an extractor from a config block with fs and optional spikes,
+        spike_rate and band_power entries.
+        """
+        return cls(feature_config['fs'], spikes=feature_config.get('spikes'),
+                   spike_rate=feature_config.get('spike_rate'), band_power=feature_config.get('band_power'))
+
+    def __len__(self):
+        return len(self.names)
+
+    def process(self, data, axis=-1):
+        """
+        Features of a chunk of samples along axis, shaped like the chunk with the
+        features along a new last axis.
+        """
+        data = np.moveaxis(np.asarray(data, dtype=np.float64), axis, 0)
+        if self._channel_shape is None:
+            self._channel_shape = data.shape[1:]
+        flat = data.reshape(len(data), -1)
+        features = []
+        if self.detector is not None:
+            spikes = self.detector.process(flat)
+            if self._emit_spikes:
+                features.append(spikes[:, :, None])
+            if self.rate is not None:
+                features.append(self.rate.process(spikes)[:, :, None])
+        if self.band_power is not None:
+            features.append(self.band_power.process(flat))
+        features = np.concatenate(features, axis=-1).reshape(data.shape + (len(self),))
+        return np.moveaxis(features, 0, axis if axis >= 0 else axis - 1)
+
+    def step(self, sample):
+        """
+        Features of a single sample per channel (a scalar or an array of
+        channels), shaped (*channels, features).
+        """
+        if self._channel_shape is None:
+            self._channel_shape = np.shape(sample)
+        flat = np.ravel(sample).astype(np.float64)
+        features = np.empty((len(flat), len(self)))
+        column = 0
+        if self.detector is not None:
+            spikes = self.detector.step(flat)
+            if self._emit_spikes:
+                features[:, column] = spikes
+                column += 1
+            if self.rate is not None:
+                features[:, column] = self.rate.step(spikes)
+                column += 1
+        if self.band_power is not None:
+            features[:, column:] = self.band_power.step(flat)
+        return features.reshape(self._channel_shape + (len(self),))
+
+    def reset(self, index=None):
+        """
+        Clear the feature state, or only that of channel `index` (along the first
+        channel axis).
+        """
+        if index is not None and self._channel_shape is not None and len(self._channel_shape) > 1:
+            # Flat channel positions of that slice of the channel layout
+            index = np.arange(int(np.prod(self._channel_shape))).reshape(self._channel_shape)[index].ravel()
+        for stage in (self.detector, self.rate, self.band_power):
+            if stage is not None:
+                stage.reset(index)
@@ -1,5 +1,47 @@
+import functools
 import numpy as np
-from scipy import signal
+
+# scipy.signal takes about a second to import, so it is imported where it is
+# used: building envs without a filter never loads it
+
+@functools.lru_cache(maxsize=64)
+def design_low_pass(cutoff, fs, order=5, output='ba'):
+    """
+    Butterworth low-pass design, cached so repeated calls do not redesign it.
+    Returns read-only (b, a) or, with output='sos', second-order sections.
+    """
+    from scipy import signal
+    nyq = 0.5 * fs
+    normal_cutoff = cutoff / nyq
+    return _read_only(signal.butter(order, normal_cutoff, btype='low', analog=False, output=output))
+
+@functools.lru_cache(maxsize=64)
+def design_notch(notch_freq, fs, quality_factor=30, output='ba'):
+    """
+    IIR notch design, cached. Returns read-only (b, a) or second-order sections.
+    """
+    from scipy import signal
+    nyq = 0.5 * fs
+    freq = notch_freq / nyq
+    b, a = signal.iirnotch(freq, quality_factor)
+    if output == 'sos':
+        return _read_only(signal.tf2sos(b, a))
+    return _read_only((b, a))
+
+@functools.lru_cache(maxsize=64)
+def design_moving_average(window_size):
+    """
+    Causal moving average of window_size samples as second-order sections.
+    """
+    from scipy import signal
+    return _read_only(signal.tf2sos(np.ones(window_size) / window_size, [1.0]))
+
+def _read_only(design):
+    # Cached designs are shared between callers, so guard them against mutation
+    arrays = design if isinstance(design, tuple) else (design,)
+    for array in arrays:
+        array.flags.writeable = False
+    return design
 
 def apply_low_pass(data, cutoff, fs, order=5):
     """
@@ -11,9 +53,8 @@ def apply_low_pass(data, cutoff, fs, order=5):
     :param order: Order of the filter
     :return: Filtered signal
     """
-    nyq = 0.5 * fs
-    normal_cutoff = cutoff / nyq
-    b, a = signal.butter(order, normal_cutoff, btype='low', analog=False)
+    from scipy import signal
+    b, a = design_low_pass(cutoff, fs, order)
     y = signal.lfilter(b, a, data)
     return y
 
@@ -27,9 +68,8 @@ def apply_notch_filter(data, notch_freq, fs, quality_factor=30):
     :param quality_factor: Quality factor (higher = narrower notch)
     :return: Filtered signal
     """
-    nyq = 0.5 * fs
-    freq = notch_freq / nyq
-    b, a = signal.iirnotch(freq, quality_factor)
+    from scipy import signal
+    b, a = design_notch(notch_freq, fs, quality_factor)
     y = signal.lfilter(b, a, data)
     return y
 
@@ -38,3 +78,188 @@ def moving_average(data, window_size=5):
     Simple moving average filter for smoothing.
     """
     return np.convolve(data, np.ones(window_size)/window_size, mode='valid')
+
+
+class FilterChain:
+    """
+    Streaming filter that fuses low-pass, notch and moving-average stages into a
+    single cascade of second-order sections (SOS).
+
+    Designs are computed once when a stage is added, and the filter state is kept
+    between calls, so filtering a signal chunk by chunk gives the same output as
+    filtering it in one go, without edge transients at chunk boundaries.
+    Channels are filtered independently: process() filters a chunk along `axis`,
+    and step() filters one sample per channel through an equivalent state-space
+    form that shares the same state. The channel layout is fixed by the first call.
+
+    Example:
+        chain = FilterChain(fs=1000).add_low_pass(30).add_notch(50).add_moving_average(5)
+        filtered = chain.process(chunk)
+    """
+    def __init__(self, fs, steady_state=False):
+        self.fs = fs
+        self.steady_state = steady_state
+        self.sos = np.zeros((0, 6))
+        self._zi = None
+        self._channel_shape = None
+        self._build_state_space()
+
+    @classmethod
+    def from_config(cls, filter_config):
+        """
+        Build a chain from a config block with fs and optional low_pass, notch
+        and moving_average entries.
+        """
+        chain = cls(filter_config['fs'], steady_state=filter_config.get('steady_state', False))
+        if filter_config.get('low_pass'):
+            chain.add_low_pass(**filter_config['low_pass'])
+        if filter_config.get('notch'):
+            chain.add_notch(**filter_config['notch'])
+        if filter_config.get('moving_average'):
+            chain.add_moving_average(filter_config['moving_average'])
+        return chain
+
+    def add_low_pass(self, cutoff, order=5):
+        return self._add_sections(design_low_pass(cutoff, self.fs, order, output='sos'))
+
+    def add_notch(self, freq, quality_factor=30):
+        return self._add_sections(design_notch(freq, self.fs, quality_factor, output='sos'))
+
+    def add_moving_average(self, window_size):
+        if window_size > 1:
+            self._add_sections(design_moving_average(window_size))
+        return self
+
+    def _add_sections(self, sos):
+        self.sos = np.vstack([self.sos, sos])
+        self._build_state_space()
+        # The state layout depends on the sections, so start over
+        self._zi = None
+        return self
+
+    def _build_state_space(self):
+        # Series connection of the transposed direct-form II sections that
+        # sosfilt uses, so both paths share one state vector
+        n = len(self.sos)
+        A = np.zeros((2 * n, 2 * n))
+        B = np.zeros(2 * n)
+        C_in = np.zeros(2 * n)   # Section input as a function of the state ...
+        D_in = 1.0               # ... and of the chain input
+        for i, (b0, b1, b2, a0, a1, a2) in enumerate(self.sos):
+            b0, b1, b2, a1, a2 = b0 / a0, b1 / a0, b2 / a0, a1 / a0, a2 / a0
+            rows = slice(2 * i, 2 * i + 2)
+            A[rows, :] += np.outer([b1 - a1 * b0, b2 - a2 * b0], C_in)
+            A[rows, rows] += [[-a1, 1.0], [-a2, 0.0]]
+            B[rows] = np.array([b1 - a1 * b0, b2 - a2 * b0]) * D_in
+            # This section's output feeds the next one
+            C_in = b0 * C_in
+            C_in[2 * i] += 1.0
+            D_in = b0 * D_in
+        self._A, self._B, self._C, self._D = A, B, C_in, D_in
+        self._block_cache = {}
+        # Augmented form: [state'; y] = M @ [state; u], a single matmul per sample
+        self._M = np.zeros((2 * n + 1, 2 * n + 1))
+        self._M[:-1, :-1] = A
+        self._M[:-1, -1] = B
+        self._M[-1, :-1] = C_in
+        self._M[-1, -1] = D_in
+
+    def _init_state(self, channel_shape, first_sample):
+        n = len(self.sos)
+        self._channel_shape = channel_shape
+        channels = int(np.prod(channel_shape))
+        # The state vector plus a trailing input row; sosfilt's state along axis 0,
+        # (n_sections, 2, *channels), is a view of the state rows
+        self._augmented = np.zeros((2 * n + 1, channels))
+        self._scratch = np.empty_like(self._augmented)
+        self._zi = self._augmented[:-1].reshape((n, 2) + channel_shape)
+        if self.steady_state:
+            from scipy import signal
+            zi = signal.sosfilt_zi(self.sos).reshape((n, 2) + (1,) * len(channel_shape))
+            self._zi[:] = zi * np.asarray(first_sample)
+
+    # Chunks up to this length are filtered with cached block matrices, which
+    # avoids sosfilt's per-call overhead; longer chunks go through sosfilt
+    block_limit = 128
+
+    def _block_matrices(self, length):
+        """
+        Matrices mapping (state, chunk of inputs) to (chunk of outputs, next state).
+        """
+        if length not in self._block_cache:
+            A, B, C, D = self._A, self._B, self._C, self._D
+            n = len(B)
+            observe = np.empty((length, n))      # Output response to the initial state
+            impulse = np.empty(length)           # Output response to an input impulse
+            power = np.eye(n)
+            impulse[0] = D
+            for k in range(length):
+                observe[k] = C @ power
+                if k + 1 < length:
+                    impulse[k + 1] = C @ power @ B
+                power = A @ power
+            toeplitz = np.zeros((length, length))
+            for k in range(length):
+                toeplitz[k, :k + 1] = impulse[k::-1]
+            # Contribution of each input of the chunk to the next state
+            control = np.empty((n, length))
+            column = B.copy()
+            for j in range(length - 1, -1, -1):
+                control[:, j] = column
+                column = A @ column
+            if len(self._block_cache) >= 16:
+                self._block_cache.clear()
+            self._block_cache[length] = (observe, toeplitz, power, control)
+        return self._block_cache[length]
+
+    def process(self, data, axis=-1):
+        """
+        Filter a chunk of samples along axis and return the filtered chunk.
+        """
+        data = np.moveaxis(np.asarray(data, dtype=np.float64), axis, 0)
+        if not len(self.sos):
+            return np.moveaxis(data.copy(), 0, axis)
+        if not len(data):
+            return np.moveaxis(data.copy(), 0, axis)
+        if self._zi is None:
+            self._init_state(data.shape[1:], data[0])
+        if len(data) > self.block_limit:
+            from scipy import signal
+            y, self._zi[:] = signal.sosfilt(self.sos, data, axis=0, zi=self._zi)
+            return np.moveaxis(y, 0, axis)
+
+        observe, toeplitz, transition, control = self._block_matrices(len(data))
+        u = data.reshape(len(data), -1)
+        state = self._augmented[:-1]
+        y = observe @ state
+        y += toeplitz @ u
+        state[:] = transition @ state + control @ u
+        return np.moveaxis(y.reshape(data.shape), 0, axis)
+
+    def step(self, sample):
+        """
+        Filter a single sample per channel (a scalar or an array of channels).
+        """
+        if not len(self.sos):
+            return sample
+        if self._zi is None:
+            self._init_state(np.shape(sample), sample)
+        augmented = self._augmented
+        augmented[-1] = sample if not self._channel_shape else np.ravel(sample)
+        np.matmul(self._M, augmented, out=self._scratch)
+        augmented[:-1] = self._scratch[:-1]
+        if not self._channel_shape:
+            return float(self._scratch[-1, 0])
+        return self._scratch[-1].reshape(self._channel_shape).copy()
+
+    def reset(self, index=None):
+        """
+        Clear the filter state, or only that of channel `index` (along the first
+        channel axis).
+        """
+        if self._zi is None:
+            return
+        if index is None:
+            self._zi = None
+        else:
+            self._zi[:, :, index] = 0.0
@@ -0,0 +1,275 @@
+"""
+Minimal stand-in for the `nidaqmx` package, for running NIDaqDriver without NI
+hardware or drivers. Pass the module as `daq_module` to NIDaqDriver.
+
+Each device has a sample clock driven by `clock` (time.monotonic by default, or a
+SimulatedClock for deterministic runs). Continuous AO output is consumed at the
+sample rate and looped back through a first-order low-pass "substrate" into the
+AI channel, so streamed stimulation shows up in the acquired response.
+"""
+import threading
+import time
+import types
+import numpy as np
+from scipy import signal
+
+class SimulatedClock:
+    """
+    Manually advanced clock; sleep() advances time instead of blocking.
+    """
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(seconds, 0.0)
+
+class DaqError(Exception):
+    pass
+
+constants = types.SimpleNamespace(
+    AcquisitionType=types.SimpleNamespace(FINITE='FINITE', CONTINUOUS='CONTINUOUS'),
+    RegenerationMode=types.SimpleNamespace(ALLOW_REGENERATION='ALLOW', DONT_ALLOW_REGENERATION='DONT_ALLOW'),
+)
+
+class FakeDevice:
+    """
+    Shared state of one simulated DAQ device: the AO queue, the loopback substrate
+    and the AI sample clock.
+    """
+    def __init__(self, name, clock=time.monotonic, sleep=time.sleep, time_constant=0.05, noise_std=0.01, seed=None):
+        self.name = name
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = np.random.default_rng(seed)
+        self.noise_std = noise_std
+        self.lock = threading.Lock()
+
+        self.sample_rate = None
+        self.start_time = None
+        self.ao_queue = []
+        self.ao_level = 0.0
+        self.ao_consumed = 0
+        self.underflows = 0
+        self.time_constant = time_constant
+        self._zi = None
+        # Acquired but not yet read AI samples, bounded by the AI buffer size
+        self.ai_samples = np.empty(0)
+        self.ai_capacity = None
+        self.ai_generated = 0
+        self.overflows = 0
+
+    def start(self, sample_rate):
+        with self.lock:
+            if self.start_time is None:
+                self.sample_rate = sample_rate
+                self.start_time = self.clock()
+                alpha = np.exp(-1.0 / (self.time_constant * sample_rate))
+                self._b, self._a = [1 - alpha], [1, -alpha]
+                self._zi = np.zeros(1)
+
+    def clock_index(self):
+        if self.start_time is None:
+            return 0
+        return int((self.clock() - self.start_time) * self.sample_rate)
+
+    def queued_ao(self):
+        return sum(len(chunk) for chunk in self.ao_queue)
+
+    def advance(self):
+        """
+        Run the device up to the current clock tick: consume AO, generate AI.
+        """
+        with self.lock:
+            target = self.clock_index()
+            n = target - self.ai_generated
+            if n <= 0:
+                return
+            drive = np.empty(n)
+            filled = 0
+            while filled < n and self.ao_queue:
+                chunk = self.ao_queue[0]
+                take = min(len(chunk), n - filled)
+                drive[filled:filled + take] = chunk[:take]
+                self.ao_level = chunk[take - 1]
+                if take == len(chunk):
+                    self.ao_queue.pop(0)
+                else:
+                    self.ao_queue[0] = chunk[take:]
+                filled += take
+            if filled < n and self.start_time is not None:
+                # Output buffer ran dry; a real DAC holds its last value
+                self.underflows += 1
+                drive[filled:] = self.ao_level
+            self.ao_consumed += n
+            response, self._zi = signal.lfilter(self._b, self._a, np.abs(drive), zi=self._zi)
+            response += self.rng.normal(0, self.noise_std, n)
+            self.ai_samples = np.concatenate([self.ai_samples, response])
+            if self.ai_capacity is not None and len(self.ai_samples) > self.ai_capacity:
+                # Unread samples were overwritten in the circular input buffer
+                self.overflows += 1
+                self.ai_samples = self.ai_samples[-self.ai_capacity:]
+            self.ai_generated = target
+
+    def take_ai(self, n):
+        with self.lock:
+            samples = self.ai_samples[:n]
+            self.ai_samples = self.ai_samples[n:]
+            return samples
+
+_devices = {}
+_device_defaults = {}
+
+def reset_devices(clock=time.monotonic, sleep=time.sleep, **kwargs):
+    """
+    Forget all simulated devices; new ones use the given clock and substrate settings.
+    """
+    _devices.clear()
+    _device_defaults.clear()
+    _device_defaults.update(clock=clock, sleep=sleep, **kwargs)
+
+def get_device(name):
+    if name not in _devices:
+        _devices[name] = FakeDevice(name, **_device_defaults)
+    return _devices[name]
+
+class _Channels:
+    def __init__(self, task):
+        self._task = task
+
+    def add_ao_voltage_chan(self, physical_channel, **kwargs):
+        self._task._add_channel(physical_channel, 'ao')
+
+    def add_ai_voltage_chan(self, physical_channel, **kwargs):
+        self._task._add_channel(physical_channel, 'ai')
+
+class _Timing:
+    def __init__(self, task):
+        self._task = task
+
+    def cfg_samp_clk_timing(self, rate, source="", active_edge=None, sample_mode='FINITE', samps_per_chan=1000):
+        self._task.sample_rate = rate
+        self._task.sample_mode = sample_mode
+        self._task.buffer_size = samps_per_chan
+
+class _InStream:
+    def __init__(self, task):
+        self._task = task
+
+    @property
+    def avail_samp_per_chan(self):
+        device = self._task.device
+        device.advance()
+        return len(device.ai_samples)
+
+class _OutStream:
+    def __init__(self, task):
+        self._task = task
+        self.regen_mode = constants.RegenerationMode.ALLOW_REGENERATION
+
+class Task:
+    def __init__(self, new_task_name=""):
+        self.name = new_task_name
+        self.device = None
+        self.kind = None
+        self.channels = 0
+        self.sample_rate = None
+        self.sample_mode = None
+        self.buffer_size = None
+        self.running = False
+        self.ao_channels = _Channels(self)
+        self.ai_channels = _Channels(self)
+        self.timing = _Timing(self)
+        self.in_stream = _InStream(self)
+        self.out_stream = _OutStream(self)
+
+    def _add_channel(self, physical_channel, kind):
+        # "Dev1/ai0" adds one channel, "Dev1/ai0:3" a range of four
+        device_name, lines = physical_channel.split('/')
+        self.device = get_device(device_name)
+        self.kind = kind
+        first, _, last = lines.lstrip('aio').partition(':')
+        self.channels += int(last or first) - int(first) + 1
+
+    def start(self):
+        self.running = True
+        if self.sample_mode == constants.AcquisitionType.CONTINUOUS:
+            if self.kind == 'ai':
+                self.device.ai_capacity = self.buffer_size
+            self.device.start(self.sample_rate)
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.running = False
+
+    def write(self, data, auto_start=True, timeout=10.0):
+        # On-demand (software timed) output sets the DAC level immediately;
+        # with several AO channels the loopback sees their mean
+        with self.device.lock:
+            self.device.ao_level = float(np.mean(data))
+        return 1
+
+    def read(self, number_of_samples_per_channel=None, timeout=10.0):
+        device = self.device
+        if self.channels > 1:
+            values = device.ao_level + device.rng.normal(0, device.noise_std, self.channels)
+            return values.tolist()
+        value = device.ao_level + device.rng.normal(0, device.noise_std)
+        if number_of_samples_per_channel is None:
+            return value
+        return [value] * number_of_samples_per_channel
+
+class AnalogSingleChannelWriter:
+    def __init__(self, task_out_stream, auto_start=False):
+        self._task = task_out_stream._task
+        self.auto_start = auto_start
+
+    def write_many_sample(self, data, timeout=10.0):
+        task = self._task
+        device = task.device
+        if task.running:
+            device.advance()
+        # Block like the driver does while the output buffer is full
+        deadline = device.clock() + timeout
+        while task.running and device.queued_ao() + len(data) > task.buffer_size:
+            if device.clock() >= deadline:
+                raise DaqError("Timed out waiting for space in the output buffer")
+            missing = device.queued_ao() + len(data) - task.buffer_size
+            device.sleep(missing / task.sample_rate)
+            device.advance()
+        with device.lock:
+            device.ao_queue.append(np.array(data, dtype=np.float64))
+        if self.auto_start and not task.running:
+            task.start()
+        return len(data)
+
+class AnalogSingleChannelReader:
+    def __init__(self, task_in_stream):
+        self._task = task_in_stream._task
+
+    def read_many_sample(self, data, number_of_samples_per_channel=-1, timeout=10.0):
+        task = self._task
+        device = task.device
+        if number_of_samples_per_channel < 0:
+            number_of_samples_per_channel = len(data)
+        if data.shape != (number_of_samples_per_channel,):
+            # Like the driver, which fills the whole array or refuses
+            raise DaqError(f"Read cannot be performed because the NumPy array passed into this function is not "
+                           f"shaped correctly: expected ({number_of_samples_per_channel},), got {data.shape}")
+        deadline = device.clock() + timeout
+        device.advance()
+        while len(device.ai_samples) < number_of_samples_per_channel:
+            if device.clock() >= deadline:
+                raise DaqError("Timed out waiting for samples")
+            missing = number_of_samples_per_channel - len(device.ai_samples)
+            device.sleep(missing / task.sample_rate)
+            device.advance()
+        data[:] = device.take_ai(number_of_samples_per_channel)
+        return number_of_samples_per_channel
+
+stream_writers = types.SimpleNamespace(AnalogSingleChannelWriter=AnalogSingleChannelWriter)
+stream_readers = types.SimpleNamespace(AnalogSingleChannelReader=AnalogSingleChannelReader)
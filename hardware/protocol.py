@@ -0,0 +1,171 @@
+import binascii
+import struct
+import time
+import numpy as np
+
+# Binary frame layout (little-endian):
+#   sync (2 bytes, A5 5A) | type (u8) | seq (u16) | payload length (u16) | payload | crc16 (u16)
+# The CRC-16/CCITT covers everything between the sync word and the CRC itself.
+SYNC = b"\xa5\x5a"
+HEADER = struct.Struct("<2sBHH")
+CRC = struct.Struct("<H")
+STIM_PAYLOAD = struct.Struct("<ff")
+
+FRAME_STIM = 0x01     # host -> device: frequency, amplitude (float32) per stimulation channel
+FRAME_SAMPLES = 0x02  # device -> host: up to MAX_SAMPLES float32 response samples,
+                      # channel-interleaved when there are several recording channels
+
+MAX_SAMPLES = 256
+MAX_PAYLOAD = MAX_SAMPLES * 4
+MAX_STIM_CHANNELS = MAX_PAYLOAD // STIM_PAYLOAD.size
+FRAME_OVERHEAD = HEADER.size + CRC.size
+
+# Negotiation: the host asks for the binary protocol with an ASCII line that legacy
+# firmware ignores; capable firmware acknowledges and switches after the ack line.
+PROTOCOL_REQUEST = b"PROTO:BIN1\n"
+PROTOCOL_ACK = b"PROTO:BIN1:OK"
+
+def crc16(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+def encode_frame(frame_type, seq, payload):
+    header = HEADER.pack(SYNC, frame_type, seq & 0xFFFF, len(payload))
+    body = header[2:] + payload
+    return header + payload + CRC.pack(crc16(body))
+
+def encode_stim(seq, frequency, amplitude):
+    if np.ndim(frequency) == 0:
+        return encode_frame(FRAME_STIM, seq, STIM_PAYLOAD.pack(frequency, amplitude))
+    # One (frequency, amplitude) pair per stimulation channel
+    if len(frequency) > MAX_STIM_CHANNELS:
+        raise ValueError(f"At most {MAX_STIM_CHANNELS} stimulation channels fit in one frame, got {len(frequency)}")
+    pairs = np.empty((len(frequency), 2), dtype='<f4')
+    pairs[:, 0] = frequency
+    pairs[:, 1] = amplitude
+    return encode_frame(FRAME_STIM, seq, pairs.tobytes())
+
+def encode_samples(seq, values):
+    values = np.asarray(values, dtype='<f4')
+    if len(values) > MAX_SAMPLES:
+        raise ValueError(f"At most {MAX_SAMPLES} samples fit in one frame, got {len(values)}")
+    return encode_frame(FRAME_SAMPLES, seq, values.tobytes())
+
+class FrameDecoder:
+    """
+    Incremental decoder for binary frames arriving in arbitrary chunks.
+    Corrupted frames (bad CRC or impossible length) are skipped by resyncing on
+    the next sync word, and gaps in the per-type sequence numbers are counted as
+    dropped frames.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._last_seq = {}
+        self.frames = 0
+        self.crc_errors = 0
+        self.dropped_frames = 0
+
+    def feed(self, data):
+        """
+        Add received bytes and return the complete frames as (type, seq, payload) tuples.
+        """
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        pos = 0
+        while True:
+            start = buffer.find(SYNC, pos)
+            if start < 0:
+                # Keep a trailing byte in case it is the first half of a sync word
+                pos = max(pos, len(buffer) - 1)
+                break
+            if len(buffer) - start < HEADER.size:
+                pos = start
+                break
+            _, frame_type, seq, length = HEADER.unpack_from(buffer, start)
+            if length > MAX_PAYLOAD:
+                self.crc_errors += 1
+                pos = start + 1
+                continue
+            end = start + HEADER.size + length + CRC.size
+            if len(buffer) < end:
+                pos = start
+                break
+            (crc,) = CRC.unpack_from(buffer, end - CRC.size)
+            if crc != crc16(bytes(buffer[start + 2:end - CRC.size])):
+                self.crc_errors += 1
+                pos = start + 1
+                continue
+            payload = bytes(buffer[start + HEADER.size:end - CRC.size])
+            self._track_seq(frame_type, seq)
+            frames.append((frame_type, seq, payload))
+            pos = end
+        del buffer[:pos]
+        return frames
+
+    def _track_seq(self, frame_type, seq):
+        self.frames += 1
+        last = self._last_seq.get(frame_type)
+        if last is not None:
+            self.dropped_frames += (seq - last - 1) & 0xFFFF
+        self._last_seq[frame_type] = seq
+
+class BinarySampleDecoder(FrameDecoder):
+    """
+    Host-side decoder that turns sample frames into a flat list of response values,
+    or of (channels,) arrays when there are several recording channels.
+    """
+    def __init__(self, channels=1):
+        super().__init__()
+        self.channels = channels
+
+    def feed(self, data):
+        values = []
+        for frame_type, _, payload in super().feed(data):
+            if frame_type == FRAME_SAMPLES:
+                samples = np.frombuffer(payload, dtype='<f4')
+                if self.channels == 1:
+                    values.extend(samples.tolist())
+                else:
+                    values.extend(samples.reshape(-1, self.channels))
+        return values
+
+class LineDecoder:
+    """
+    Decoder for the legacy ASCII protocol: one float per newline-terminated line,
+    or comma-separated values, one per recording channel.
+    """
+    def __init__(self, channels=1):
+        self._buffer = b""
+        self.channels = channels
+        self.parse_errors = 0
+
+    def feed(self, data):
+        *lines, self._buffer = (self._buffer + data).split(b"\n")
+        values = []
+        for line in lines:
+            try:
+                if self.channels == 1:
+                    values.append(float(line))
+                else:
+                    sample = np.array(line.split(b","), dtype=float)
+                    if sample.shape != (self.channels,):
+                        raise ValueError(f"Expected {self.channels} channels, got {sample.size}")
+                    values.append(sample)
+            except ValueError:
+                self.parse_errors += 1
+        return values
+
+def negotiate(ser, timeout=0.5):
+    """
+    Ask the device for the binary protocol. Returns 'binary' if it acknowledges
+    within timeout, otherwise 'ascii' so legacy firmware keeps working.
+    Samples a streaming device sends meanwhile are discarded.
+    """
+    ser.reset_input_buffer()
+    ser.write(PROTOCOL_REQUEST)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        line = ser.readline()
+        if line.strip() == PROTOCOL_ACK:
+            return 'binary'
+    return 'ascii'
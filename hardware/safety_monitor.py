@@ -1,36 +1,222 @@
 import logging
+import time
+import numpy as np
 
 class SafetyMonitor:
     """
     Independent safety monitor to ensure the RL agent doesn't fry the mushroom.
+
+    enforce() is the single safety layer between the policy and the stimulator:
+    it clamps a whole array of stimulation amplitudes at once, whatever its shape
+    ((), (C,), (N,) or (N, C)), against
+    - the voltage limit, tightened by max_current * electrode_impedance when the
+      impedance is known,
+    - max_slew, the largest amplitude change between consecutive steps,
+    - max_charge_density, a leaky-bucket budget of delivered charge per electrode
+      area (uC/cm^2) that drains with time constant charge_window.
+    Limits are scalars or per-channel lists broadcast along the last axis. Slew and
+    charge state are kept per element of the first array enforced. Warnings are
+    rate-limited to one per warning_interval seconds.
     """
     def __init__(self, config):
-        self.max_voltage = config['hardware']['safety_limits']['max_voltage']
-        self.max_current = config['hardware']['safety_limits']['max_current']
+        limits = config['hardware']['safety_limits']
+        self.max_voltage = np.asarray(limits['max_voltage'], dtype=float)
+        self.max_current = np.asarray(limits['max_current'], dtype=float)
+        self.impedance = limits.get('electrode_impedance')
+        self.max_slew = limits.get('max_slew')
+        self.max_charge_density = limits.get('max_charge_density')
+        self.warning_interval = limits.get('warning_interval', 1.0)
         self.logger = logging.getLogger(__name__)
         self.violation_count = 0
+        self.clamp_counts = {'voltage': 0, 'slew': 0, 'charge': 0}
+
+        # Amplitude limit combining the voltage and, through the impedance, current limits
+        if self.impedance is None:
+            self.amplitude_limit = self.max_voltage
+        else:
+            self.amplitude_limit = np.minimum(self.max_voltage, self.max_current * self.impedance)
+
+        if self.max_charge_density is not None:
+            if self.impedance is None:
+                raise ValueError("max_charge_density requires safety_limits.electrode_impedance")
+            step_duration = config['hardware'].get('step_duration', 0.05)
+            pulse_width = config['stimulation'].get('pulse_width', 0.01)
+            area = limits.get('electrode_area', 1.0)
+            # Charge density (uC/cm^2) delivered in one step per volt and per Hz:
+            # current (V / R) * pulse width * pulses per step / area
+            self._charge_per_volt_hz = 1e6 * pulse_width * step_duration / (self.impedance * area)
+            self._charge_decay = np.exp(-step_duration / limits.get('charge_window', 1.0))
+
+        # Scalar limits allow the pure-Python single-channel path
+        self._scalar_limits = self.amplitude_limit.ndim == 0
+        self._limit = float(self.amplitude_limit) if self._scalar_limits else None
+        self.reset()
+        self._last_warning = -np.inf
+        self._suppressed = 0
+
+    def enforce(self, frequency, amplitude):
+        """
+        Return the amplitudes clamped to every limit, in one pass of array operations.
+        """
+        if self._scalar_limits and isinstance(amplitude, (float, np.floating)):
+            return self._enforce_scalar(frequency, amplitude)
+        requested = np.asarray(amplitude, dtype=float)
+        if self._previous is None or self._previous.shape != requested.shape:
+            self._allocate(requested.shape)
+        # Scratch buffers are reused, so the step path never allocates
+        safe, scratch, over = self._safe, self._scratch, self._over
+        limit = self.amplitude_limit
+
+        np.minimum(requested, limit, out=safe)
+        np.maximum(safe, -limit, out=safe)
+        clamped = None
+        np.not_equal(safe, requested, out=over)
+        if over.any():
+            clamped = 'voltage'
+            self.clamp_counts['voltage'] += 1
+
+        if self.max_slew is not None:
+            previous = self._previous
+            np.subtract(safe, previous, out=scratch)
+            np.abs(scratch, out=scratch)
+            np.greater(scratch, self.max_slew, out=over)
+            if over.any():
+                np.clip(safe, previous - self.max_slew, previous + self.max_slew, out=safe)
+                clamped = clamped or 'slew'
+                self.clamp_counts['slew'] += 1
+
+        if self.max_charge_density is not None:
+            charge = self._charge
+            charge *= self._charge_decay
+            # scratch <- charge this step would deliver
+            np.abs(safe, out=scratch)
+            scratch *= np.abs(frequency)
+            scratch *= self._charge_per_volt_hz
+            charge += scratch
+            np.greater(charge, self.max_charge_density, out=over)
+            if over.any():
+                # Cut the amplitude by the fraction of this step's charge that
+                # exceeds the budget, so the remaining budget is exactly used up
+                cut = self._cut
+                np.subtract(charge, self.max_charge_density, out=cut)
+                np.divide(cut, scratch, out=cut, where=over)
+                # Channels within the budget keep their amplitude
+                cut *= over
+                np.subtract(1.0, cut, out=cut)
+                safe *= cut
+                np.minimum(charge, self.max_charge_density, out=charge)
+                clamped = clamped or 'charge'
+                self.clamp_counts['charge'] += 1
+
+        if self.max_slew is not None:
+            # Slew is limited relative to what was actually delivered
+            np.copyto(self._previous, safe)
+        if clamped is not None:
+            self.violation_count += 1
+            if self._warning_due():
+                self._warn("SAFETY VIOLATION: %s limit clamped %d channel(s), largest request %.2fV",
+                           clamped, np.count_nonzero(safe != requested), np.max(np.abs(requested)))
+
+        if safe.ndim == 0:
+            return float(safe)
+        return safe.copy()
+
+    def _enforce_scalar(self, frequency, amplitude):
+        # Single-channel fast path: the same limits on Python floats, which is
+        # several times cheaper than NumPy calls on 0-d arrays
+        requested = float(amplitude)
+        limit = self._limit
+        safe = min(max(requested, -limit), limit)
+        clamped = None
+        if safe != requested:
+            clamped = 'voltage'
+            self.clamp_counts['voltage'] += 1
+
+        if self.max_slew is not None:
+            previous = self._previous_scalar
+            if abs(safe - previous) > self.max_slew:
+                safe = min(max(safe, previous - self.max_slew), previous + self.max_slew)
+                clamped = clamped or 'slew'
+                self.clamp_counts['slew'] += 1
+
+        if self.max_charge_density is not None:
+            delivered = abs(safe) * abs(frequency) * self._charge_per_volt_hz
+            charge = self._charge_scalar * self._charge_decay + delivered
+            if charge > self.max_charge_density:
+                safe *= 1.0 - (charge - self.max_charge_density) / delivered
+                charge = self.max_charge_density
+                clamped = clamped or 'charge'
+                self.clamp_counts['charge'] += 1
+            self._charge_scalar = float(charge)
+        self._previous_scalar = safe
+
+        if clamped is not None:
+            self.violation_count += 1
+            if self._warning_due():
+                self._warn("SAFETY VIOLATION: %s limit clamped %d channel(s), largest request %.2fV",
+                           clamped, 1, abs(requested))
+        return safe
+
+    def _allocate(self, shape):
+        self._previous = np.zeros(shape)
+        self._charge = np.zeros(shape)
+        self._safe = np.empty(shape)
+        self._scratch = np.empty(shape)
+        self._cut = np.empty(shape)
+        self._over = np.empty(shape, dtype=bool)
+
+    def reset(self):
+        """
+        Forget the slew and charge history, e.g. after the stimulator was idle.
+        """
+        self._previous = None
+        self._charge = None
+        self._previous_scalar = 0.0
+        self._charge_scalar = 0.0
 
     def check_stimulation(self, voltage, current=None):
         """
-        Returns True if stimulation is safe, False otherwise.
+        Returns True if stimulation is safe on every channel, False otherwise.
         """
         is_safe = True
-        
-        if abs(voltage) > self.max_voltage:
-            self.logger.warning(f"SAFETY VIOLATION: Voltage {voltage:.2f}V exceeds limit {self.max_voltage}V")
+
+        if np.any(np.abs(voltage) > self.max_voltage):
+            if self._warning_due():
+                self._warn("SAFETY VIOLATION: Voltage %.2fV exceeds limit %sV",
+                           np.max(np.abs(voltage)), self.max_voltage)
             is_safe = False
-            
-        if current is not None and abs(current) > self.max_current:
-            self.logger.warning(f"SAFETY VIOLATION: Current {current:.4f}A exceeds limit {self.max_current}A")
+
+        if current is not None and np.any(np.abs(current) > self.max_current):
+            if self._warning_due():
+                self._warn("SAFETY VIOLATION: Current %.4fA exceeds limit %sA",
+                           np.max(np.abs(current)), self.max_current)
             is_safe = False
-            
+
         if not is_safe:
             self.violation_count += 1
-            
+
         return is_safe
 
     def get_safe_voltage(self, voltage):
         """
-        Clamps the voltage to the safe range.
+        Clamps the voltage to the safe range, channel by channel.
         """
-        return max(-self.max_voltage, min(voltage, self.max_voltage))
+        safe = np.clip(voltage, -self.max_voltage, self.max_voltage)
+        if np.ndim(safe) == 0:
+            return float(safe)
+        return safe
+
+    def _warning_due(self):
+        # At most one warning per interval; the rest are counted and reported with the next one
+        now = time.monotonic()
+        if now - self._last_warning < self.warning_interval:
+            self._suppressed += 1
+            return False
+        self._last_warning = now
+        return True
+
+    def _warn(self, message, *args):
+        if self._suppressed:
+            message += f" ({self._suppressed} similar warnings suppressed)"
+        self.logger.warning(message, *args)
+        self._suppressed = 0
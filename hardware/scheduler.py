@@ -0,0 +1,216 @@
+import logging
+import time
+import numpy as np
+
+class MonotonicClock:
+    """
+    Wall clock for the control loop: time.perf_counter, which is monotonic, and a
+    sleep that wakes up slightly early and busy-waits the last `spin` seconds,
+    because OS sleeps overshoot by up to a scheduler tick.
+    """
+    def __init__(self, spin=0.0005):
+        self.spin = spin
+
+    def now(self):
+        return time.perf_counter()
+
+    def sleep_until(self, deadline):
+        remaining = deadline - time.perf_counter()
+        if remaining > self.spin:
+            time.sleep(remaining - self.spin)
+        while time.perf_counter() < deadline:
+            pass
+
+class SimulatedClock:
+    """
+    Deterministic stand-in for MonotonicClock: time only moves when the loop
+    sleeps or when advance() models time spent computing, e.g. from inside a
+    fake env or policy. Sleeping wakes up exactly on the deadline, plus `wakeup`
+    seconds of simulated OS latency.
+    """
+    def __init__(self, start=0.0, wakeup=0.0):
+        self.time = start
+        self.wakeup = wakeup
+
+    def now(self):
+        return self.time
+
+    def sleep_until(self, deadline):
+        if deadline > self.time:
+            self.time = deadline + self.wakeup
+
+    def advance(self, seconds):
+        self.time += seconds
+
+class TimingStats:
+    """
+    Running count, mean and max of a timing series, with the latest `window`
+    samples kept in a preallocated ring for percentiles.
+    """
+    def __init__(self, window=100000):
+        self._samples = np.empty(window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self._samples[self.count % len(self._samples)] = value
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def summary(self):
+        """
+        mean, p50, p99 and max in seconds (NaN before the first sample).
+        """
+        if not self.count:
+            return {'mean': float('nan'), 'p50': float('nan'), 'p99': float('nan'), 'max': float('nan')}
+        recent = self._samples[:min(self.count, len(self._samples))]
+        p50, p99 = np.percentile(recent, [50, 99])
+        return {'mean': self.total / self.count, 'p50': float(p50), 'p99': float(p99), 'max': self.max}
+
+class PeriodicTimer:
+    """
+    Fixed-rate ticks on a monotonic clock. Deadlines are start + k * period,
+    never last wakeup + period, so wakeup errors do not accumulate into drift.
+    When the work of a tick overruns past the next deadline, that deadline is
+    counted as missed and the timer skips ahead to the next one still in the
+    future instead of firing a burst of late ticks.
+    """
+    def __init__(self, period, clock=None):
+        if period <= 0:
+            raise ValueError(f"Control period must be positive, got {period}")
+        self.period = period
+        self.clock = clock or MonotonicClock()
+        self.jitter = TimingStats()
+        self.missed = 0
+        self.ticks = 0
+        self._start = None
+        self._index = 0
+        self._started = False
+
+    def start(self):
+        """
+        Start a new grid of deadlines now. Statistics keep accumulating.
+        """
+        self._start = self.clock.now()
+        self._index = 0
+        self._started = True
+
+    @property
+    def deadline(self):
+        return self._start + self._index * self.period
+
+    def wait(self):
+        """
+        Sleep until the next deadline and return it. The first call after start()
+        returns immediately.
+        """
+        if self._start is None:
+            self.start()
+        now = self.clock.now()
+        if self._started:
+            self._started = False
+        else:
+            self._index += 1
+            if now > self.deadline:
+                # Overran: skip every deadline already in the past
+                late = int((now - self.deadline) // self.period) + 1
+                self.missed += late
+                self._index += late
+        deadline = self.deadline
+        self.clock.sleep_until(deadline)
+        self.jitter.add(self.clock.now() - deadline)
+        self.ticks += 1
+        return deadline
+
+    def stats(self):
+        return {'ticks': self.ticks, 'missed': self.missed, 'jitter': self.jitter.summary()}
+
+class ControlLoopScheduler:
+    """
+    Runs env steps at a fixed period for closed-loop control on hardware.
+
+    Every tick steps the env with the policy's action for the latest
+    observation. Without pipelining, the policy runs at the tick, so inference
+    delays the stimulation. With pipelined=True, the action for tick t+1 is
+    computed right after the step of tick t, from its observation, while
+    waiting for the next deadline; ticks then only do the time-critical I/O, at
+    the cost of one period of observation age.
+
+    The timer records wakeup jitter and missed deadlines. latency is the time
+    from a deadline to the start of the env step, and busy is the work time of a
+    tick (inference plus step). reset_policy, if given, is called whenever the
+    env is reset, e.g. NumpyPolicy.reset for a recurrent policy.
+    """
+    def __init__(self, env, policy, period, clock=None, pipelined=False, reset_policy=None):
+        self.env = env
+        self.policy = policy
+        self.reset_policy = reset_policy
+        self.timer = PeriodicTimer(period, clock)
+        self.clock = self.timer.clock
+        self.pipelined = pipelined
+        self.latency = TimingStats()
+        self.busy = TimingStats()
+        self.episodes = 0
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls, env, policy, config, clock=None, reset_policy=None):
+        """
+        Build from hardware.control_loop: period (default hardware.step_duration)
+        and pipelined.
+        """
+        hardware = config['hardware']
+        loop = hardware.get('control_loop', {})
+        period = loop.get('period') or hardware.get('step_duration', 0.05)
+        if clock is None:
+            clock = MonotonicClock(loop.get('spin', 0.0005))
+        return cls(env, policy, period, clock, loop.get('pipelined', False), reset_policy)
+
+    def run(self, n_steps, callback=None):
+        """
+        Run n_steps ticks, resetting the env whenever an episode ends.
+        callback(obs, reward, terminated, truncated, info) runs after each step,
+        off the critical path. Returns stats().
+        """
+        obs, _ = self._reset()
+        action = self.policy(obs) if self.pipelined else None
+        self.timer.start()
+        for _ in range(n_steps):
+            deadline = self.timer.wait()
+            woke = self.clock.now()
+            if not self.pipelined:
+                action = self.policy(obs)
+            stepped = self.clock.now()
+            obs, reward, terminated, truncated, info = self.env.step(action)
+            self.latency.add(stepped - deadline)
+            if terminated or truncated:
+                obs, _ = self._reset()
+                self.episodes += 1
+            if self.pipelined:
+                action = self.policy(obs)
+            self.busy.add(self.clock.now() - woke)
+            if callback is not None:
+                callback(obs, reward, terminated, truncated, info)
+        stats = self.stats()
+        if stats['missed']:
+            self.logger.warning(f"Control loop missed {stats['missed']} of {stats['ticks']} deadlines "
+                                f"(busy p99 {stats['busy']['p99'] * 1e3:.2f}ms, period {self.timer.period * 1e3:.2f}ms)")
+        return stats
+
+    def _reset(self):
+        if self.reset_policy is not None:
+            self.reset_policy()
+        return self.env.reset()
+
+    def stats(self):
+        """
+        Ticks, missed deadlines, and jitter/latency/busy summaries in seconds.
+        """
+        stats = self.timer.stats()
+        stats['latency'] = self.latency.summary()
+        stats['busy'] = self.busy.summary()
+        stats['episodes'] = self.episodes
+        return stats
@@ -0,0 +1,74 @@
+import numpy as np
+
+class WaveformSynthesizer:
+    """
+    Synthesizes one step's worth of stimulation waveform into a preallocated buffer.
+
+    Modulations:
+    - 'pwm': rectangular pulses of `pulse_width` seconds repeating at `frequency`
+    - 'fm':  sine wave at `frequency`
+    - 'am':  carrier at `carrier_frequency` (default: a quarter of the sample rate)
+             whose envelope oscillates at `frequency`
+    - 'dc':  constant level, as the on-demand driver mode outputs
+
+    Phases carry over between calls so consecutive chunks join without
+    discontinuities when the action changes. The returned array is reused by the
+    next call.
+    """
+    modulations = ('pwm', 'fm', 'am', 'dc')
+
+    def __init__(self, sample_rate, n_samples, modulation='pwm', pulse_width=0.01, carrier_frequency=None):
+        if modulation not in self.modulations:
+            raise ValueError(f"Unknown modulation: {modulation}")
+        if carrier_frequency is None:
+            carrier_frequency = sample_rate / 4.0
+        if carrier_frequency >= sample_rate / 2.0:
+            raise ValueError(f"Carrier {carrier_frequency} Hz is above the Nyquist frequency of {sample_rate} S/s")
+        self.sample_rate = sample_rate
+        self.n_samples = n_samples
+        self.modulation = modulation
+        self.pulse_width = pulse_width
+        self.carrier_frequency = carrier_frequency
+
+        # Sample offsets within a chunk, in seconds
+        self._t = np.arange(n_samples) / sample_rate
+        self._phase = np.empty(n_samples)
+        self._scratch = np.empty(n_samples)
+        self.buffer = np.zeros(n_samples)
+        # Phases in cycles at the start of the next chunk
+        self._cycles = 0.0
+        self._carrier_cycles = 0.0
+
+    def synthesize(self, frequency, amplitude):
+        out = self.buffer
+        if self.modulation == 'dc':
+            out.fill(amplitude)
+            return out
+
+        # phase (cycles) = start phase + f * t
+        np.multiply(self._t, frequency, out=self._phase)
+        self._phase += self._cycles
+        self._cycles = (self._cycles + frequency * self.n_samples / self.sample_rate) % 1.0
+
+        if self.modulation == 'pwm':
+            duty = min(max(self.pulse_width * frequency, 0.0), 1.0)
+            np.mod(self._phase, 1.0, out=self._scratch)
+            np.less(self._scratch, duty, out=self._scratch, casting='unsafe')
+            np.multiply(self._scratch, amplitude, out=out)
+        elif self.modulation == 'fm':
+            self._phase *= 2 * np.pi
+            np.sin(self._phase, out=out)
+            out *= amplitude
+        else:
+            # Envelope in [0, amplitude] so the output never exceeds the commanded level
+            self._phase *= 2 * np.pi
+            np.sin(self._phase, out=out)
+            out += 1.0
+            out *= 0.5 * amplitude
+            np.multiply(self._t, self.carrier_frequency, out=self._scratch)
+            self._scratch += self._carrier_cycles
+            self._scratch *= 2 * np.pi
+            np.sin(self._scratch, out=self._scratch)
+            out *= self._scratch
+            self._carrier_cycles = (self._carrier_cycles + self.carrier_frequency * self.n_samples / self.sample_rate) % 1.0
+        return out
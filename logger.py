@@ -1,31 +1,250 @@
+import atexit
 import csv
-import time
 import os
+import queue
+import struct
+import threading
+import time
 import logging
+import weakref
+import numpy as np
+
+LOG_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('step', '<i8'),
+    ('frequency', '<f8'),
+    ('amplitude', '<f8'),
+    ('response', '<f8'),
+    ('reward', '<f8'),
+])
+
+class CsvWriter:
+    def __init__(self, filepath, dtype):
+        new_file = not os.path.exists(filepath)
+        self.file = open(filepath, 'a', newline='')
+        self.writer = csv.writer(self.file)
+        if new_file:
+            self.writer.writerow(dtype.names)
+
+    def write(self, rows):
+        self.writer.writerows(rows.tolist())
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class NpyAppendWriter:
+    """
+    Append-only .npy file of structured rows. The header reserves room for the row
+    count, which is rewritten after every flush, so the file is always loadable
+    (np.load(path, mmap_mode='r')) with every flushed row. A row cut short by a
+    crash is trimmed when the file is reopened.
+    """
+    header_size = 256
+
+    def __init__(self, filepath, dtype):
+        self.dtype = dtype
+        if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+            self.file = open(filepath, 'r+b')
+            version = np.lib.format.read_magic(self.file)
+            if version == (1, 0):
+                _, _, file_dtype = np.lib.format.read_array_header_1_0(self.file)
+            else:
+                _, _, file_dtype = np.lib.format.read_array_header_2_0(self.file)
+            if file_dtype != dtype:
+                raise ValueError(f"{filepath} holds {file_dtype}, cannot append {dtype}")
+            self.header_size = self.file.tell()
+            self.file.seek(0, os.SEEK_END)
+            self.rows = (self.file.tell() - self.header_size) // dtype.itemsize
+            self.file.truncate(self.header_size + self.rows * dtype.itemsize)
+        else:
+            self.file = open(filepath, 'w+b')
+            self.rows = 0
+        self._write_header()
+        self.file.seek(0, os.SEEK_END)
+
+    def _write_header(self):
+        header = {'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': (self.rows,)}
+        text = repr(header).encode('latin1')
+        # Magic string, version 1.0 and header length take the first 10 bytes
+        padding = self.header_size - 10 - len(text) - 1
+        if padding < 0:
+            raise ValueError("Log header does not fit the reserved header space")
+        self.file.seek(0)
+        self.file.write(np.lib.format.MAGIC_PREFIX + b'\x01\x00')
+        self.file.write(struct.pack('<H', self.header_size - 10))
+        self.file.write(text + b' ' * padding + b'\n')
+
+    def write(self, rows):
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(rows.tobytes())
+        self.rows += len(rows)
+        self._write_header()
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ParquetWriter:
+    """
+    Parquet output, one row group per flush. Requires pyarrow; the file footer is
+    written on close, so prefer .npy when runs may be killed abruptly.
+    """
+    def __init__(self, filepath, dtype):
+        # Imported here, so loggers of other formats do not pay for pyarrow
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet logs requires the pyarrow package")
+        self._pa = pa
+        self.schema = pa.schema([(name, pa.from_numpy_dtype(dtype[name])) for name in dtype.names])
+        self.writer = pq.ParquetWriter(filepath, self.schema)
+
+    def write(self, rows):
+        pa = self._pa
+        table = pa.Table.from_arrays([pa.array(rows[name]) for name in rows.dtype.names], schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+WRITERS = {'.csv': CsvWriter, '.npy': NpyAppendWriter, '.parquet': ParquetWriter}
+
+# Loggers still open at interpreter exit are closed then; the set does not keep them alive
+_open_loggers = weakref.WeakSet()
+
+@atexit.register
+def _close_open_loggers():
+    for experiment_logger in list(_open_loggers):
+        experiment_logger.close()
 
 class ExperimentLogger:
-    def __init__(self, log_dir, filename="data_log.csv"):
+    """
+    Buffered experiment log. Rows are collected in preallocated NumPy buffers and
+    written by a background thread once buffer_size rows are pending. The thread
+    also wakes every flush_interval seconds and takes whatever has been logged
+    since, so rows reach the disk even when steps stop coming. log_step never
+    touches the filesystem.
+    The output format follows the file extension: .csv, .npy (append-only,
+    memory-mappable) or .parquet (needs pyarrow). Pending rows are flushed on
+    close(), when used as a context manager, when the logger is garbage
+    collected, and at interpreter exit. Logging to a closed logger raises.
+    """
+    def __init__(self, log_dir, filename="data_log.csv", buffer_size=4096, flush_interval=1.0):
         self.log_dir = log_dir
         self.filepath = os.path.join(log_dir, filename)
         self.logger = logging.getLogger(__name__)
-        
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
         os.makedirs(log_dir, exist_ok=True)
-        
-        # Initialize CSV with headers if it doesn't exist
-        if not os.path.exists(self.filepath):
-            with open(self.filepath, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp', 'step', 'frequency', 'amplitude', 'response', 'reward'])
+
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in WRITERS:
+            raise ValueError(f"Unsupported log format '{extension}', expected one of {sorted(WRITERS)}")
+        new_file = not os.path.exists(self.filepath)
+        self.writer = WRITERS[extension](self.filepath, LOG_DTYPE)
+        if new_file:
             self.logger.info(f"Created new data log at {self.filepath}")
 
+        # Filled buffers go to the flusher thread and come back through the free list
+        self._free = queue.Queue()
+        self._pending = queue.Queue()
+        self._buffer = np.empty(buffer_size, dtype=LOG_DTYPE)
+        self._count = 0
+        # Guards the buffer swap against the flusher handing over partial buffers
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._closed = False
+        # The thread only holds a weak reference, so an unreferenced logger can still be collected
+        self._flusher = threading.Thread(target=self._flush_loop, name="experiment-logger", daemon=True,
+                                         args=(weakref.ref(self), self._pending, self._free, self.writer, self.filepath))
+        self._flusher.start()
+        _open_loggers.add(self)
+
     def log_step(self, step, action, response, reward):
         """
         Log a single step of the experiment.
         action: tuple or list [frequency, amplitude]
         """
-        timestamp = time.time()
         frequency, amplitude = action
-        
-        with open(self.filepath, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([timestamp, step, frequency, amplitude, response, reward])
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Data log {self.filepath} is closed")
+            self._buffer[self._count] = (time.time(), step, frequency, amplitude, response, reward)
+            self._count += 1
+            if self._count == self.buffer_size:
+                self._hand_over()
+
+    def flush(self, wait=False):
+        """
+        Hand the buffered rows to the background writer. With wait=True, block
+        until everything handed over so far is on disk.
+        """
+        with self._lock:
+            self._hand_over()
+        if wait:
+            self._pending.join()
+
+    def _hand_over(self):
+        if self._count:
+            self._pending.put((self._buffer, self._count))
+            try:
+                self._buffer = self._free.get_nowait()
+            except queue.Empty:
+                self._buffer = np.empty(self.buffer_size, dtype=LOG_DTYPE)
+            self._count = 0
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def _flush_loop(ref, pending, free, writer, filepath):
+        while True:
+            timeout = None
+            experiment_logger = ref()
+            if experiment_logger is not None and experiment_logger.flush_interval:
+                timeout = max(experiment_logger._last_flush + experiment_logger.flush_interval - time.monotonic(), 0.0)
+            del experiment_logger
+            try:
+                item = pending.get(timeout=timeout)
+            except queue.Empty:
+                # Nothing filled up within flush_interval: take the partial buffer
+                experiment_logger = ref()
+                if experiment_logger is not None:
+                    experiment_logger.flush()
+                del experiment_logger
+                continue
+            try:
+                if item is None:
+                    writer.close()
+                    return
+                buffer, count = item
+                writer.write(buffer[:count])
+                free.put(buffer)
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Failed to write data log {filepath}: {e}")
+            finally:
+                pending.task_done()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._hand_over()
+        # The flusher writes what is pending, closes the writer and exits
+        self._pending.put(None)
+        if threading.current_thread() is not self._flusher:
+            self._flusher.join()
+        _open_loggers.discard(self)
+
+    def __del__(self):
+        # Partially built loggers have nothing to flush
+        if hasattr(self, '_flusher'):
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,11 +1,11 @@
 import argparse
 import yaml
 import logging
-from src.env.bio_env import BioInterfaceEnv
-from src.model.agent import RLAgent
-from stable_baselines3.common.monitor import Monitor
 import os
 
+# torch, stable_baselines3 and the envs are imported in main(), once the
+# arguments are valid, so --help and argument errors return immediately
+
 def load_config(config_path):
     with open(config_path, 'r') as file:
         return yaml.safe_load(file)
@@ -22,10 +22,20 @@ def setup_logging():
 
 def main():
     parser = argparse.ArgumentParser(description="MycoRL: Organic Intelligence Interface")
-    parser.add_argument('--mode', type=str, default='simulation', choices=['simulation', 'hardware'], help='Operation mode')
+    parser.add_argument('--mode', type=str, default='simulation', choices=['simulation', 'hardware', 'replay'], help='Operation mode')
     parser.add_argument('--config', type=str, default='config/default_config.yaml', help='Path to configuration file')
+    parser.add_argument('--num-envs', type=int, default=1, help='Number of simulated substrates stepped in parallel (simulation mode only)')
+    parser.add_argument('--num-workers', type=int, default=None, help='Worker processes stepping the substrates over shared memory (default: experiment.num_workers, 0 steps them in this process)')
+    parser.add_argument('--export', choices=['numpy', 'torchscript'], help='Also export the trained actor for low-latency inference')
     args = parser.parse_args()
 
+    if args.num_envs < 1:
+        parser.error("--num-envs must be at least 1")
+    if args.num_envs > 1 and args.mode != 'simulation':
+        parser.error("--num-envs > 1 is only supported in simulation mode")
+    if args.num_workers is not None and args.num_workers < 0:
+        parser.error("--num-workers must not be negative")
+
     setup_logging()
     logger = logging.getLogger(__name__)
     
@@ -34,12 +44,68 @@ def main():
     # Load configuration
     config = load_config(args.config)
 
+    recurrent = (config['rl_agent'].get('recurrent') or {}).get('enabled', False)
+    if recurrent and args.export == 'torchscript':
+        parser.error("rl_agent.recurrent policies export with --export numpy")
+
+    num_workers = args.num_workers if args.num_workers is not None else config['experiment'].get('num_workers', 0)
+    if num_workers > 0 and args.mode != 'simulation':
+        parser.error("Worker processes are only supported in simulation mode")
+    num_workers = min(num_workers, args.num_envs)
+
+    # Before the envs and the agent are built, which pick the profiler up
+    from src.utils.profiling import configure_profiling
+    profiler = configure_profiling(config)
+
+    from stable_baselines3.common.monitor import Monitor
+    from stable_baselines3.common.vec_env import VecMonitor
+    from src.model.agent import RLAgent
+
     # Create environment
-    env = BioInterfaceEnv(config, mode=args.mode)
-    env = Monitor(env, filename=f"./logs/{config['experiment']['name']}")
+    if args.mode == 'hardware' and config['hardware'].get('devices'):
+        from src.env.wrappers import FixedRateWrapper
+        from src.env.bio_env import BioInterfaceEnv
+        from src.env.device_pool_env import DevicePoolVecEnv
+        from src.hardware.scheduler import MonotonicClock, PeriodicTimer
+        control_loop = config['hardware'].get('control_loop', {})
+        period = control_loop.get('period') or config['hardware'].get('step_duration', 0.05)
+
+        def make_device_env(device_config):
+            # Every device keeps its own fixed-rate clock, on its own thread
+            timer = PeriodicTimer(period, MonotonicClock(control_loop.get('spin', 0.0005)))
+            return FixedRateWrapper(BioInterfaceEnv(device_config, mode='hardware'), timer)
+        env = DevicePoolVecEnv(config, make_device_env)
+        env = VecMonitor(env, filename=f"./logs/{config['experiment']['name']}")
+        logger.info(f"Stepping {env.num_envs} substrates concurrently in a device pool")
+    elif num_workers > 0:
+        from src.env.shm_vec_env import make_shared_memory_env
+        env = make_shared_memory_env(config, args.num_envs, num_workers)
+        env = VecMonitor(env, filename=f"./logs/{config['experiment']['name']}")
+        logger.info(f"Simulating {args.num_envs} substrates in {num_workers} worker processes")
+    elif args.num_envs > 1:
+        from src.env.vec_bio_env import BioInterfaceVecEnv
+        env = BioInterfaceVecEnv(config, num_envs=args.num_envs)
+        env = VecMonitor(env, filename=f"./logs/{config['experiment']['name']}")
+        logger.info(f"Simulating {args.num_envs} substrates in a vectorized env")
+    else:
+        from src.env.bio_env import BioInterfaceEnv
+        env = BioInterfaceEnv(config, mode=args.mode)
+        if args.mode == 'hardware':
+            from src.env.wrappers import FixedRateWrapper
+            from src.hardware.scheduler import MonotonicClock, PeriodicTimer
+            # Step the substrate at a fixed rate rather than as fast as the agent runs
+            control_loop = config['hardware'].get('control_loop', {})
+            period = control_loop.get('period') or config['hardware'].get('step_duration', 0.05)
+            env = FixedRateWrapper(env, PeriodicTimer(period, MonotonicClock(control_loop.get('spin', 0.0005))))
+        env = Monitor(env, filename=f"./logs/{config['experiment']['name']}")
 
     # Initialize Agent
-    agent = RLAgent(env, config)
+    if recurrent:
+        from src.model.recurrent import RecurrentAgent
+        agent = RecurrentAgent(env, config)
+        logger.info("Training an LSTM policy in its recurrent mode")
+    else:
+        agent = RLAgent(env, config)
 
     # Train
     logger.info("Starting training...")
@@ -51,11 +117,17 @@ def main():
         # Save final model
         save_path = f"models/{config['experiment']['name']}_final"
         os.makedirs("models", exist_ok=True)
-        agent.save(save_path)
+        save_path = agent.save(save_path)
         logger.info(f"Model saved to {save_path}")
+        if args.export:
+            extension = '.npz' if args.export == 'numpy' else '.pt'
+            agent.export(f"models/{config['experiment']['name']}_actor{extension}", backend=args.export)
         
         env.close()
         logger.info("Environment closed.")
+        if profiler is not None:
+            profiler.close()
+            logger.info(f"Profile written to {profiler.output_dir}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,318 @@
+import logging
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class NumpyPolicy:
+    """
+    Deterministic actor of a trained SB3 policy as plain NumPy arrays, for the
+    hardware loop: no torch, no autograd, no SB3 wrappers. act() of a single
+    observation runs on preallocated float32 buffers and allocates nothing.
+
+    Layers are ('linear', W, b), ('tanh',), ('relu',) or ('lstm', input_dim,
+    W_ih, W_hh, b, ...) for the recurrent mode of LSTMExtractor: it reads only
+    the newest sample of each observation and carries the (h, c) state of
+    every LSTM layer from one act() to the next, so call reset() when an
+    episode starts. Recurrent policies act on single observations only. The
+    output is clipped to the action space, or tanh-squashed and rescaled to it
+    for squashing policies (SAC), like model.predict(deterministic=True).
+    """
+    def __init__(self, layers, observation_shape, action_low, action_high, squash=False):
+        self.layers = layers
+        self.observation_shape = tuple(observation_shape)
+        self.action_low = np.asarray(action_low, dtype=np.float32)
+        self.action_high = np.asarray(action_high, dtype=np.float32)
+        self.squash = squash
+        self.action_shape = self.action_low.shape
+        self.recurrent = any(layer[0] == 'lstm' for layer in layers)
+        # Buffers for single observations, one per layer
+        input_size = layers[0][1] if self.recurrent else int(np.prod(self.observation_shape))
+        self._input = np.zeros((1, input_size), dtype=np.float32)
+        self._buffers = self._allocate()
+
+    def _allocate(self):
+        buffers = []
+        for layer in self.layers:
+            if layer[0] == 'linear':
+                buffers.append(np.empty((1, layer[1].shape[1]), dtype=np.float32))
+            elif layer[0] == 'lstm':
+                _, input_dim, *weights = layer
+                hidden = weights[1].shape[0]
+                layers = len(weights) // 3
+                buffers.append({
+                    'gates': np.empty((1, 4 * hidden), dtype=np.float32),
+                    'recurrent': np.empty((1, 4 * hidden), dtype=np.float32),
+                    'h': np.zeros((layers, 1, hidden), dtype=np.float32),
+                    'c': np.zeros((layers, 1, hidden), dtype=np.float32),
+                    'tmp': np.empty((1, hidden), dtype=np.float32),
+                })
+            else:
+                buffers.append(None)
+        return buffers
+
+    def reset(self):
+        """
+        Zero the recurrent state, for the first observation of an episode.
+        """
+        for buffers in self._buffers:
+            if isinstance(buffers, dict):
+                buffers['h'].fill(0.0)
+                buffers['c'].fill(0.0)
+
+    def act(self, observation):
+        """
+        Deterministic action for one observation, or a batch of them.
+        """
+        observation = np.asarray(observation, dtype=np.float32)
+        if observation.shape == self.observation_shape:
+            # The recurrent mode only reads the newest sample of the window
+            np.copyto(self._input, (observation[-1] if self.recurrent else observation).reshape(self._input.shape))
+            return self._forward(self._input, self._buffers)[0].reshape(self.action_shape).copy()
+        if self.recurrent:
+            raise ValueError(f"A recurrent policy acts on one {self.observation_shape} observation at a time, "
+                             f"got {observation.shape}")
+        x = observation.reshape(observation.shape[0], -1)
+        return self._forward(x, [None] * len(self.layers)).reshape((-1,) + self.action_shape)
+
+    def _forward(self, x, buffers):
+        for layer, out in zip(self.layers, buffers):
+            kind = layer[0]
+            if kind == 'linear':
+                x = np.dot(x, layer[1], out=out)
+                x += layer[2]
+            elif kind == 'tanh':
+                x = np.tanh(x, out=x)
+            elif kind == 'relu':
+                x = np.maximum(x, 0, out=x)
+            elif kind == 'lstm':
+                x = self._lstm(x, layer, out)
+        if self.squash:
+            x = np.tanh(x, out=x)
+            return self.action_low + 0.5 * (x + 1.0) * (self.action_high - self.action_low)
+        return np.clip(x, self.action_low, self.action_high, out=x)
+
+    @staticmethod
+    def _lstm(x, layer, buffers):
+        # One step per LSTM layer. Gates are stored as (i, f, o, g) with the
+        # sigmoid gates pre-scaled by 1/2, so one tanh yields every gate:
+        # sigmoid(z) = (tanh(z / 2) + 1) / 2
+        _, input_dim, *weights = layer
+        hidden = weights[1].shape[0]
+        gates, recurrent, tmp = buffers['gates'], buffers['recurrent'], buffers['tmp']
+        sigmoid = slice(0, 3 * hidden)
+        for k, (w_ih, w_hh, b) in enumerate(zip(weights[0::3], weights[1::3], weights[2::3])):
+            h, c = buffers['h'][k], buffers['c'][k]
+            np.dot(x, w_ih, out=gates)
+            gates += np.dot(h, w_hh, out=recurrent)
+            gates += b
+            np.tanh(gates, out=gates)
+            gates[:, sigmoid] *= 0.5
+            gates[:, sigmoid] += 0.5
+            # c = f * c + i * g; h = o * tanh(c)
+            c *= gates[:, hidden:2 * hidden]
+            np.multiply(gates[:, :hidden], gates[:, 3 * hidden:], out=tmp)
+            c += tmp
+            np.tanh(c, out=tmp)
+            np.multiply(gates[:, 2 * hidden:3 * hidden], tmp, out=h)
+            x = h
+        return x
+
+    def save(self, path):
+        arrays = {'observation_shape': np.array(self.observation_shape), 'action_low': self.action_low,
+                  'action_high': self.action_high, 'squash': self.squash,
+                  'kinds': np.array([layer[0] for layer in self.layers])}
+        for i, layer in enumerate(self.layers):
+            for j, value in enumerate(layer[1:]):
+                arrays[f"layer_{i}_{j}"] = value
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            layers = []
+            for i, kind in enumerate(data['kinds'].tolist()):
+                count = sum(k.startswith(f"layer_{i}_") for k in data.files)
+                params = [data[f"layer_{i}_{j}"] for j in range(count)]
+                if kind == 'lstm':
+                    params[0] = int(params[0])
+                layers.append((kind, *params))
+            return cls(layers, tuple(data['observation_shape']), data['action_low'], data['action_high'],
+                       bool(data['squash']))
+
+class TorchScriptPolicy:
+    """
+    Deterministic actor of a trained SB3 policy as a frozen TorchScript module,
+    run single-threaded under inference mode from a preallocated input tensor.
+    Supports any extractor torch can trace, including LSTMExtractor windows.
+    Note that torch's thread count is process-wide.
+    """
+    def __init__(self, module, observation_shape, action_shape):
+        import torch
+        self.torch = torch
+        torch.set_num_threads(1)
+        self.module = module
+        self.observation_shape = tuple(observation_shape)
+        self.action_shape = tuple(action_shape)
+        self._input = torch.zeros((1,) + self.observation_shape)
+        self._input_array = self._input.numpy()
+
+    def act(self, observation):
+        """
+        Deterministic action for one observation, or a batch of them.
+        """
+        observation = np.asarray(observation, dtype=np.float32)
+        with self.torch.inference_mode():
+            if observation.shape == self.observation_shape:
+                np.copyto(self._input_array[0], observation)
+                return self.module(self._input)[0].numpy().reshape(self.action_shape)
+            return self.module(self.torch.from_numpy(observation)).numpy()
+
+    def save(self, path):
+        self.module.save(path)
+
+    @classmethod
+    def load(cls, path, observation_shape, action_shape):
+        import torch
+        return cls(torch.jit.load(path), observation_shape, action_shape)
+
+def _actor_parts(model):
+    # (features extractor, latent network, action head, squash) of a PPO/SAC policy
+    policy = model.policy
+    if hasattr(policy, 'actor') and hasattr(policy.actor, 'latent_pi'):
+        actor = policy.actor
+        return actor.features_extractor, actor.latent_pi, actor.mu, True
+    if hasattr(policy, 'mlp_extractor'):
+        return policy.pi_features_extractor, policy.mlp_extractor.policy_net, policy.action_net, policy.squash_output
+    raise ValueError(f"Cannot export a {type(policy).__name__}; expected a PPO or SAC policy")
+
+def _numpy_layers(module, observation_shape):
+    from torch import nn
+    from stable_baselines3.common.torch_layers import FlattenExtractor
+
+    if isinstance(module, (FlattenExtractor, nn.Flatten, nn.Identity)):
+        return []
+    if isinstance(module, nn.Sequential):
+        return [layer for child in module for layer in _numpy_layers(child, observation_shape)]
+    if isinstance(module, nn.Linear):
+        weight = module.weight.detach().cpu().numpy().T.astype(np.float32)
+        bias = module.bias.detach().cpu().numpy().astype(np.float32)
+        return [('linear', np.ascontiguousarray(weight), bias)]
+    if isinstance(module, nn.Tanh):
+        return [('tanh',)]
+    if isinstance(module, nn.ReLU):
+        return [('relu',)]
+    if isinstance(getattr(module, 'lstm', None), nn.LSTM):
+        # Re-scanning the window step by step in NumPy is slower than model.predict
+        raise ValueError("LSTMExtractor policies trained in window mode export with backend='torchscript'; "
+                         "NumPy only runs the recurrent mode (export_recurrent_policy)")
+    raise ValueError(f"Cannot export {type(module).__name__} to NumPy; use backend='torchscript'")
+
+def _lstm_layer(lstm):
+    # ('lstm', input_dim, W_ih, W_hh, b, ...) for NumpyPolicy from a torch LSTM
+    weights = []
+    for k in range(lstm.num_layers):
+        w_ih = getattr(lstm, f"weight_ih_l{k}").detach().cpu().numpy()
+        w_hh = getattr(lstm, f"weight_hh_l{k}").detach().cpu().numpy()
+        b = (getattr(lstm, f"bias_ih_l{k}") + getattr(lstm, f"bias_hh_l{k}")).detach().cpu().numpy()
+        # torch orders the gates (i, f, g, o); reorder to (i, f, o, g) and
+        # halve the sigmoid gates for NumpyPolicy._lstm
+        h = lstm.hidden_size
+        order = np.r_[0:2 * h, 3 * h:4 * h, 2 * h:3 * h]
+        scale = np.r_[np.full(3 * h, 0.5), np.ones(h)]
+        weights += [np.ascontiguousarray((w_ih[order].T * scale).astype(np.float32)),
+                    np.ascontiguousarray((w_hh[order].T * scale).astype(np.float32)),
+                    (b[order] * scale).astype(np.float32)]
+    return ('lstm', lstm.input_size, *weights)
+
+def export_recurrent_policy(extractor, head, observation_shape, action_low, action_high, path=None):
+    """
+    NumpyPolicy running LSTMExtractor's recurrent mode followed by head (an
+    actor head of Linear/Tanh/ReLU layers), one sample per act() like
+    RecurrentActor. Saved to path (.npz) if given.
+    """
+    layers = [_lstm_layer(extractor.lstm)] + _numpy_layers(extractor.linear, observation_shape) \
+        + _numpy_layers(head, observation_shape)
+    policy = NumpyPolicy(layers, observation_shape, action_low, action_high)
+    if path is not None:
+        policy.save(path)
+        logger.info(f"Exported recurrent numpy policy to {path}")
+    return policy
+
+def export_policy(model, backend='numpy', path=None):
+    """
+    Lean deterministic actor of a trained PPO/SAC model: a NumpyPolicy (MLP
+    policies) or a TorchScriptPolicy (also LSTMExtractor policies). Saved to
+    path if given (.npz or .pt).
+    """
+    import copy
+    import warnings
+    import torch
+    from torch import nn
+
+    features, latent, head, squash = _actor_parts(model)
+    observation_shape = model.observation_space.shape
+    low, high = model.action_space.low, model.action_space.high
+
+    if backend == 'numpy':
+        layers = (_numpy_layers(features, observation_shape) + _numpy_layers(latent, observation_shape)
+                  + _numpy_layers(head, observation_shape))
+        policy = NumpyPolicy(layers, observation_shape, low, high, squash)
+    elif backend == 'torchscript':
+        class Actor(nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.features, self.latent, self.head = copy.deepcopy(features), copy.deepcopy(latent), copy.deepcopy(head)
+                self.register_buffer('low', torch.as_tensor(low, dtype=torch.float32))
+                self.register_buffer('high', torch.as_tensor(high, dtype=torch.float32))
+
+            def forward(self, observations):
+                actions = self.head(self.latent(self.features(observations)))
+                if squash:
+                    return self.low + 0.5 * (torch.tanh(actions) + 1.0) * (self.high - self.low)
+                return torch.maximum(torch.minimum(actions, self.high), self.low)
+
+        actor = Actor().cpu().eval()
+        with torch.no_grad(), warnings.catch_warnings():
+            # Recent torch releases deprecate TorchScript in favour of torch.export
+            warnings.simplefilter('ignore', FutureWarning)
+            # Shape checks inside nn.LSTM; the traced input shape is the only one used
+            warnings.simplefilter('ignore', torch.jit.TracerWarning)
+            traced = torch.jit.trace(actor, torch.zeros((1,) + observation_shape))
+            module = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+        policy = TorchScriptPolicy(module, observation_shape, low.shape)
+    else:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    if path is not None:
+        policy.save(path)
+        logger.info(f"Exported {backend} policy to {path}")
+    return policy
+
+def verify_policy(policy, model, observations, atol=1e-5):
+    """
+    Largest difference between policy.act() and model.predict(deterministic=True)
+    over the observations, one at a time and as a batch. Raises ValueError above atol.
+    """
+    observations = np.asarray(observations, dtype=np.float32)
+    expected, _ = model.predict(observations, deterministic=True)
+    batched = policy.act(observations)
+    single = np.stack([policy.act(o) for o in observations])
+    difference = float(max(np.max(np.abs(batched - expected)), np.max(np.abs(single - expected))))
+    if difference > atol:
+        raise ValueError(f"Exported policy differs from model.predict by {difference:.3g} (> {atol})")
+    return difference
+
+def measure_latency(act, observation, repeats=1000, warmup=50):
+    """
+    Wall time of act(observation) in microseconds: median, p99 and max.
+    """
+    for _ in range(warmup):
+        act(observation)
+    times = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        act(observation)
+        times[i] = time.perf_counter() - start
+    times *= 1e6
+    return {'p50': float(np.median(times)), 'p99': float(np.percentile(times, 99)), 'max': float(times.max())}
@@ -7,31 +7,136 @@ class LSTMExtractor(BaseFeaturesExtractor):
     """
     Custom Feature Extractor for Stable Baselines3 that uses an LSTM.
     Useful because the biological substrate has 'memory' and hidden states.
+
+    forward() is the window mode SB3 calls: the LSTM runs over the whole
+    observation window, from a zero state, on every call. The recurrent mode
+    instead carries the LSTM state from step to step, so acting costs one LSTM
+    step whatever the window: step() consumes only the newest sample,
+    forward_sequence() runs a batch of rollouts for training (see
+    truncated_bptt), and both reset the state of envs whose episode starts.
+    A state is a (h, c) pair shaped [num_layers, batch_size, hidden_dim].
     """
-    def __init__(self, observation_space: spaces.Box, features_dim: int = 64):
+    def __init__(self, observation_space: spaces.Box, features_dim: int = 64, hidden_dim: int = 64, num_layers: int = 2):
         super(LSTMExtractor, self).__init__(observation_space, features_dim)
-        
-        # We assume observation is a 1D array of history [t, t-1, t-2...]
-        input_dim = 1 
-        hidden_dim = 64
-        num_layers = 2
-        
+
+        # We assume observation is a history [t-n, ..., t-1, t], oldest first,
+        # with one column per recording channel when there are several
+        input_dim = observation_space.shape[1] if len(observation_space.shape) > 1 else 1
+        self.input_dim = input_dim
+        self.hidden_dim = hidden_dim
+        self.num_layers = num_layers
+
         self.lstm = nn.LSTM(input_dim, hidden_dim, num_layers, batch_first=True)
         self.linear = nn.Linear(hidden_dim, features_dim)
 
     def forward(self, observations: torch.Tensor) -> torch.Tensor:
-        # Observations shape: [batch_size, window_size]
+        # Observations shape: [batch_size, window_size] (or [batch_size, window_size, channels])
         # LSTM needs: [batch_size, seq_len, input_dim]
-        
+
         # Add the input_dim dimension
-        x = observations.unsqueeze(-1) 
-        
+        x = observations.reshape(observations.shape[0], observations.shape[1], self.input_dim)
+
         # Pass through LSTM
         lstm_out, (hn, cn) = self.lstm(x)
-        
+
         # We take the output of the last time step
         last_time_step = lstm_out[:, -1, :]
-        
+
         return self.linear(last_time_step)
 
+    def initial_state(self, batch_size: int):
+        """
+        Zero recurrent state for batch_size envs.
+        """
+        weight = self.linear.weight
+        shape = (self.num_layers, batch_size, self.hidden_dim)
+        return (torch.zeros(shape, dtype=weight.dtype, device=weight.device),
+                torch.zeros(shape, dtype=weight.dtype, device=weight.device))
+
+    @staticmethod
+    def reset_state(state, episode_starts: torch.Tensor):
+        """
+        Zero the state of the envs flagged in episode_starts ([batch_size]).
+        """
+        keep = (1.0 - episode_starts.to(state[0].dtype)).view(1, -1, 1)
+        return state[0] * keep, state[1] * keep
+
+    def step(self, samples: torch.Tensor, state, episode_starts: torch.Tensor = None):
+        """
+        Advance the recurrent state by one sample per env and return
+        (features, state). samples is [batch_size] or [batch_size, channels]:
+        the newest sample only, e.g. observations[:, -1]. episode_starts flags
+        the envs whose sample is the first of a new episode.
+        """
+        if episode_starts is not None:
+            state = self.reset_state(state, episode_starts)
+        lstm_out, state = self.lstm(samples.reshape(samples.shape[0], 1, self.input_dim), state)
+        return self.linear(lstm_out[:, 0]), state
+
+    def forward_sequence(self, samples: torch.Tensor, state, episode_starts: torch.Tensor = None):
+        """
+        Recurrent mode over a batch of rollouts: samples is [batch_size, steps]
+        (or [batch_size, steps, channels]), episode_starts is [batch_size, steps].
+        Returns (features [batch_size, steps, features_dim], final state). The
+        rollouts are cut where any env starts an episode, so the LSTM still runs
+        whole stretches at once between resets.
+        """
+        x = samples.reshape(samples.shape[0], samples.shape[1], self.input_dim)
+        if episode_starts is None:
+            cuts = []
+        else:
+            cuts = torch.nonzero(episode_starts.any(dim=0)).flatten().tolist()
+        bounds = sorted(set([0] + cuts + [x.shape[1]]))
+        outputs = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if start in cuts:
+                state = self.reset_state(state, episode_starts[:, start])
+            lstm_out, state = self.lstm(x[:, start:stop], state)
+            outputs.append(lstm_out)
+        return self.linear(torch.cat(outputs, dim=1)), state
+
+def truncated_bptt(extractor, samples, episode_starts, loss_fn, optimizer, bptt=32, state=None):
+    """
+    Train the recurrent mode on a batch of rollouts ([batch_size, steps] samples
+    and episode starts) with truncated backpropagation through time: the
+    rollouts are processed bptt steps at a time, the state carries over between
+    chunks but gradients do not. loss_fn(features, start, stop) returns the loss
+    of the chunk covering steps start..stop. Returns the mean loss and the final
+    state, to continue with the next rollouts.
+    """
+    if state is None:
+        state = extractor.initial_state(samples.shape[0])
+    steps = samples.shape[1]
+    total = 0.0
+    for start in range(0, steps, bptt):
+        stop = min(start + bptt, steps)
+        starts = None if episode_starts is None else episode_starts[:, start:stop]
+        features, state = extractor.forward_sequence(samples[:, start:stop], state, starts)
+        loss = loss_fn(features, start, stop)
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        state = (state[0].detach(), state[1].detach())
+        total += loss.item() * (stop - start)
+    return total / steps, state
+
+class RecurrentActor:
+    """
+    Incremental inference for a policy built on LSTMExtractor's recurrent mode:
+    keeps one state per env, resets it on episode starts, and feeds the LSTM only
+    the newest sample of each observation. head maps features to actions.
+    """
+    def __init__(self, extractor, head, num_envs=1):
+        self.extractor = extractor
+        self.head = head
+        self.state = extractor.initial_state(num_envs)
+
+    @torch.no_grad()
+    def act(self, observations, episode_starts=None):
+        observations = torch.as_tensor(observations, dtype=self.state[0].dtype)
+        if episode_starts is not None:
+            episode_starts = torch.as_tensor(episode_starts)
+        features, self.state = self.extractor.step(observations[:, -1], self.state, episode_starts)
+        return self.head(features)
+
 # Note: To use this in SB3, pass policy_kwargs=dict(features_extractor_class=LSTMExtractor)
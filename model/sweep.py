@@ -0,0 +1,295 @@
+import copy
+import csv
+import itertools
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing as mp
+import numpy as np
+
+SWEEP_SECTIONS = ('rl_agent', 'stimulation', 'environment')
+# Rung budgets are rounded to the base config's rollout, which these keys would change per trial
+FIXED_KEYS = ('rl_agent.algorithm', 'rl_agent.n_steps')
+RESULT_FIELDS = ['trial', 'rung', 'steps', 'timesteps', 'score', 'episodes', 'seconds', 'status', 'params']
+
+logger = logging.getLogger(__name__)
+
+def expand_search_space(parameters, method='grid', num_trials=None, seed=None):
+    """
+    Trial parameter sets from a search space keyed by dotted config paths
+    ("rl_agent.learning_rate"). A list is a set of choices; a mapping with
+    low/high is a range, sampled log-uniformly with log: true (integers with
+    int: true). grid takes every combination of the choices (ranges are not
+    allowed); random draws num_trials sets. The result only depends on the seed,
+    so a resumed sweep sees the same trials. The keys that set the rollout
+    length (FIXED_KEYS) cannot be swept, so every trial of a rung trains
+    exactly as long.
+    """
+    for key in parameters:
+        if key.split('.')[0] not in SWEEP_SECTIONS:
+            raise ValueError(f"Cannot sweep {key}: only the {', '.join(SWEEP_SECTIONS)} sections are searched")
+        if key in FIXED_KEYS:
+            raise ValueError(f"Cannot sweep {key}: it sets the rollout length the rung budgets are rounded to")
+    keys = sorted(parameters)
+    if method == 'grid':
+        ranges = [k for k in keys if not isinstance(parameters[k], list)]
+        if ranges:
+            raise ValueError(f"Grid search needs a list of values for {', '.join(ranges)}")
+        trials = [dict(zip(keys, values)) for values in itertools.product(*(parameters[k] for k in keys))]
+        return trials[:num_trials] if num_trials else trials
+    if method != 'random':
+        raise ValueError(f"Unknown search method: {method}")
+    if not num_trials:
+        raise ValueError("Random search needs num_trials")
+
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(num_trials):
+        params = {}
+        for key in keys:
+            space = parameters[key]
+            if isinstance(space, list):
+                params[key] = space[rng.integers(len(space))]
+            elif space.get('log'):
+                params[key] = float(np.exp(rng.uniform(np.log(space['low']), np.log(space['high']))))
+            else:
+                params[key] = float(rng.uniform(space['low'], space['high']))
+            if isinstance(space, dict) and space.get('int'):
+                params[key] = int(round(params[key]))
+        trials.append(params)
+    return trials
+
+def apply_params(config, params):
+    """
+    Copy of config with the dotted parameter paths overridden.
+    """
+    config = copy.deepcopy(config)
+    for key, value in params.items():
+        section = config
+        *path, name = key.split('.')
+        for part in path:
+            section = section.setdefault(part, {})
+        section[name] = value
+    return config
+
+def rollout_steps(config, num_envs=1):
+    """
+    Env steps the algorithm collects between updates. Training always runs whole
+    rollouts, so a shorter budget would be exceeded.
+    """
+    if config['rl_agent']['algorithm'] == 'PPO':
+        return config['rl_agent'].get('n_steps', 2048) * num_envs
+    return num_envs
+
+def rung_budgets(min_steps, max_steps, eta, rollout=1):
+    """
+    Cumulative training steps at every rung: min_steps, min_steps * eta, ... up to
+    max_steps, each rounded up to whole rollouts so the trials train exactly that long.
+    """
+    raw = [min_steps]
+    while raw[-1] * eta < max_steps:
+        raw.append(raw[-1] * eta)
+    if raw[-1] < max_steps:
+        raw.append(max_steps)
+    budgets = []
+    for steps in raw:
+        steps = -(-steps // rollout) * rollout
+        if not budgets or steps > budgets[-1]:
+            budgets.append(steps)
+    return budgets
+
+def _episode_rewards(path):
+    # Rewards of the episodes in a Monitor/VecMonitor csv, after its JSON comment line
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', newline='') as f:
+        f.readline()
+        return [float(row['r']) for row in csv.DictReader(f)]
+
+def run_trial(config, params, trial_dir, steps, previous_steps, score_episodes=5, num_envs=1):
+    """
+    Train one trial in simulation mode from previous_steps to steps, continuing
+    from its saved model, and score it by the mean Monitor reward of the last
+    score_episodes episodes of this segment. Returns (score, episodes, timesteps),
+    timesteps being the model's total step count afterwards.
+    """
+    from stable_baselines3.common.monitor import Monitor
+    from stable_baselines3.common.vec_env import VecMonitor
+    from src.env.bio_env import BioInterfaceEnv
+    from src.env.vec_bio_env import BioInterfaceVecEnv
+    from src.model.agent import RLAgent
+
+    config = apply_params(config, params)
+    os.makedirs(trial_dir, exist_ok=True)
+    monitor_path = os.path.join(trial_dir, f"steps_{steps}")
+    if num_envs > 1:
+        env = VecMonitor(BioInterfaceVecEnv(config, num_envs), filename=monitor_path)
+    else:
+        env = Monitor(BioInterfaceEnv(config, mode='simulation'), filename=monitor_path)
+    try:
+        agent = RLAgent(env, config)
+        model_path = os.path.join(trial_dir, "model.zip")
+        if previous_steps and os.path.exists(model_path):
+            agent.load(model_path)
+        agent.model.verbose = 0
+        agent.model.learn(total_timesteps=steps - previous_steps, reset_num_timesteps=not previous_steps)
+        # Atomic, so an interrupted save keeps the previous rung's model
+        agent.save(model_path)
+        timesteps = agent.model.num_timesteps
+    finally:
+        env.close()
+
+    rewards = _episode_rewards(monitor_path + ".monitor.csv")
+    if not rewards:
+        return float('nan'), 0, timesteps
+    return float(np.mean(rewards[-score_episodes:])), len(rewards), timesteps
+
+def _init_worker():
+    # One thread per trial; the pool provides the parallelism
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+class ResultsTable:
+    """
+    Append-only CSV of finished (trial, rung) jobs, re-read on start so an
+    interrupted sweep resumes where it stopped.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.rows = []
+        fields = RESULT_FIELDS
+        if os.path.exists(path):
+            with open(path, 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                self.rows = list(reader)
+            # Keep appending in the columns of a table written by an older version
+            fields = reader.fieldnames or RESULT_FIELDS
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.DictWriter(self.file, fields, extrasaction='ignore')
+        if new_file:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def append(self, row):
+        self.writer.writerow(row)
+        self.file.flush()
+        self.rows.append({k: str(v) for k, v in row.items()})
+
+    def close(self):
+        self.file.close()
+
+class SweepRunner:
+    """
+    Hyperparameter sweep over the rl_agent/stimulation/environment config
+    sections, run offline in simulation mode, with asynchronous successive
+    halving (ASHA) on Monitor rewards.
+
+    Every trial first trains for the smallest budget. Whenever a worker is free,
+    the best trial of the highest rung that is in the top 1/eta of its rung and
+    not promoted yet continues training to the next budget; otherwise a new
+    trial starts. Trials continue from their saved model, so a promotion only
+    costs the extra steps. Finished jobs are appended to results.csv in
+    output_dir and skipped when the sweep is run again.
+    """
+    def __init__(self, config, sweep, output_dir, workers=None, start_method=None):
+        self.config = copy.deepcopy(config)
+        self.sweep = sweep
+        self.output_dir = output_dir
+        self.workers = workers or sweep.get('workers') or os.cpu_count()
+        self.start_method = start_method
+        self.eta = sweep.get('eta', 3)
+        self.score_episodes = sweep.get('score_episodes', 5)
+        self.num_envs = sweep.get('num_envs', 1)
+        self.budgets = rung_budgets(sweep['min_steps'], sweep['max_steps'], self.eta,
+                                    rollout_steps(self.config, self.num_envs))
+        self.trials = expand_search_space(sweep['parameters'], sweep.get('method', 'random'),
+                                          sweep.get('num_trials'), sweep.get('seed'))
+        os.makedirs(output_dir, exist_ok=True)
+        self.results = ResultsTable(os.path.join(output_dir, 'results.csv'))
+        # scores[rung][trial]; failed and unscored jobs hold NaN and are never promoted
+        self.scores = [dict() for _ in self.budgets]
+        for row in self.results.rows:
+            trial, rung = int(row['trial']), int(row['rung'])
+            if trial >= len(self.trials) or json.loads(row['params']) != self.trials[trial]:
+                raise ValueError(f"{self.results.path} belongs to a different search space; use a new output directory")
+            self.scores[rung][trial] = float(row['score'])
+        self._started = [set(scores) for scores in self.scores]
+        self._next_trial = 0
+
+    def _next_job(self):
+        # Promotions first, from the highest rung down
+        for rung in range(len(self.budgets) - 2, -1, -1):
+            scored = [(score, trial) for trial, score in self.scores[rung].items() if not math.isnan(score)]
+            scored.sort(reverse=True)
+            for score, trial in scored[:len(self.scores[rung]) // self.eta]:
+                if trial not in self._started[rung + 1]:
+                    return trial, rung + 1
+        while self._next_trial < len(self.trials):
+            trial = self._next_trial
+            self._next_trial += 1
+            if trial not in self._started[0]:
+                return trial, 0
+        return None
+
+    def run(self):
+        """
+        Run until no trial can be started or promoted. Returns the results rows.
+        """
+        ctx = mp.get_context(self.start_method) if self.start_method else None
+        running = {}
+        logger.info(f"Sweeping {len(self.trials)} trials over budgets {self.budgets} with {self.workers} workers"
+                    f" ({sum(len(s) for s in self.scores)} jobs already done)")
+        with ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=_init_worker) as pool:
+            while True:
+                while len(running) < self.workers:
+                    job = self._next_job()
+                    if job is None:
+                        break
+                    trial, rung = job
+                    self._started[rung].add(trial)
+                    future = pool.submit(
+                        run_trial, self.config, self.trials[trial],
+                        os.path.join(self.output_dir, f"trial_{trial:04d}"), self.budgets[rung],
+                        self.budgets[rung - 1] if rung else 0, self.score_episodes, self.num_envs)
+                    running[future] = (trial, rung, time.monotonic())
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._record(future, *running.pop(future))
+        self.results.close()
+        return self.results.rows
+
+    def _record(self, future, trial, rung, started):
+        try:
+            score, episodes, timesteps = future.result()
+            status = 'ok'
+        except Exception as e:
+            logger.error(f"Trial {trial} failed at {self.budgets[rung]} steps: {e}")
+            score, episodes, timesteps, status = float('nan'), 0, '', 'failed'
+        self.scores[rung][trial] = score
+        self.results.append({
+            'trial': trial, 'rung': rung, 'steps': self.budgets[rung], 'timesteps': timesteps,
+            'score': score, 'episodes': episodes,
+            'seconds': round(time.monotonic() - started, 2), 'status': status,
+            'params': json.dumps(self.trials[trial], sort_keys=True),
+        })
+        logger.info(f"Trial {trial} at {self.budgets[rung]} steps: score {score:.4f} {self.trials[trial]}")
+
+    def best(self):
+        """
+        (trial, score, params) of the best trial at the highest rung reached, or None.
+        """
+        for scores in reversed(self.scores):
+            scored = [(score, trial) for trial, score in scores.items() if not math.isnan(score)]
+            if scored:
+                score, trial = max(scored)
+                return trial, score, self.trials[trial]
+        return None
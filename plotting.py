@@ -1,16 +1,41 @@
+import os
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-import seaborn as sns
+from src.utils.replay import read_log_columns
 
-def plot_training_results(log_file):
+PLOT_COLUMNS = ['step', 'frequency', 'amplitude', 'response', 'reward']
+
+def load_columns(log_file, columns=PLOT_COLUMNS, chunk_rows=1000000):
+    """
+    Read only the given columns of a log (.csv, .npy or .parquet), in chunks.
+    """
+    chunks = list(read_log_columns(log_file, columns, chunk_rows))
+    return pd.DataFrame({name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.empty(0)
+                         for name in columns})
+
+def _finish(fig, output):
+    # Show the figure, or render it to a file (e.g. PNG) without a display
+    if output is None:
+        plt.show()
+    else:
+        fig.savefig(output, dpi=100)
+        plt.close(fig)
+
+def plot_training_results(log_file, output=None):
     """
-    Plot rewards and response over time from a CSV log.
+    Plot rewards and response over time from a log, or from its columns
+    already loaded with load_columns. Every row is drawn; for long runs use
+    plot_training_results_decimated.
     """
-    try:
-        df = pd.read_csv(log_file)
-    except FileNotFoundError:
+    if isinstance(log_file, pd.DataFrame):
+        df = log_file
+    elif not os.path.exists(log_file):
         print(f"File {log_file} not found.")
         return
+    else:
+        df = load_columns(log_file)
+    import seaborn as sns
 
     fig, axes = plt.subplots(3, 1, figsize=(10, 12), sharex=True)
 
@@ -30,19 +55,207 @@ def plot_training_results(log_file):
     axes[2].set_title("RL Reward")
     
     plt.tight_layout()
-    plt.show()
+    _finish(fig, output)
 
-def plot_phase_space(log_file):
+def plot_phase_space(log_file, output=None):
     """
     Plot Phase Space (Response[t] vs Response[t-1]) to see attractors.
+    Takes a log or its columns already loaded with load_columns.
     """
-    df = pd.read_csv(log_file)
+    df = log_file if isinstance(log_file, pd.DataFrame) else load_columns(log_file, ['response'])
     response = df['response'].values
     
-    plt.figure(figsize=(8, 8))
+    fig = plt.figure(figsize=(8, 8))
     plt.plot(response[:-1], response[1:], alpha=0.5, lw=1)
     plt.title("Phase Space Reconstruction")
     plt.xlabel("Response[t]")
     plt.ylabel("Response[t+1]")
     plt.grid(True)
-    plt.show()
+    _finish(fig, output)
+
+
+def _group_reduce(keys, columns):
+    """
+    Reduce M4 aggregates over runs of equal (sorted) keys. columns holds
+    first_x, first_y, last_x, last_y, min_x, min_y, max_x and max_y arrays.
+    """
+    starts = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+    ends = np.append(starts[1:], len(keys)) - 1
+    reduced = {
+        'first_x': columns['first_x'][starts], 'first_y': columns['first_y'][starts],
+        'last_x': columns['last_x'][ends], 'last_y': columns['last_y'][ends],
+    }
+    group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(keys))))
+    for name, reduce in [('min', np.minimum), ('max', np.maximum)]:
+        extreme = reduce.reduceat(columns[f'{name}_y'], starts)
+        # Earliest element of each group holding its extreme
+        hits = np.flatnonzero(columns[f'{name}_y'] == extreme[group])
+        _, first_hit = np.unique(group[hits], return_index=True)
+        reduced[f'{name}_x'] = columns[f'{name}_x'][hits[first_hit]]
+        reduced[f'{name}_y'] = extreme
+    return keys[starts], reduced
+
+class M4Decimator:
+    """
+    Streaming M4 decimation of a series: the rows are split into at most
+    2 * buckets equal runs and only the first, last, minimum and maximum point
+    of each run are kept, so a line drawn through them at about one run per
+    pixel column looks the same as the full series, extremes included.
+
+    The length of the series need not be known: runs start one row long and
+    adjacent runs are merged whenever there are too many, so memory stays
+    O(buckets) however many chunks are added. NaNs are skipped.
+    """
+    FIELDS = ['first_x', 'first_y', 'last_x', 'last_y', 'min_x', 'min_y', 'max_x', 'max_y']
+
+    def __init__(self, buckets=1000):
+        self.buckets = buckets
+        self.width = 1
+        self.rows = 0
+        self._keys = np.empty(0, dtype=np.int64)
+        self._columns = {name: np.empty(0) for name in self.FIELDS}
+
+    def update(self, values):
+        """
+        Add the next chunk of the series; x is the row number.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        x = np.arange(self.rows, self.rows + len(values), dtype=np.float64)
+        self.rows += len(values)
+        valid = ~np.isnan(values)
+        if not valid.all():
+            x, values = x[valid], values[valid]
+        if not len(values):
+            return
+        chunk = {'first_x': x, 'first_y': values, 'last_x': x, 'last_y': values,
+                 'min_x': x, 'min_y': values, 'max_x': x, 'max_y': values}
+        keys = np.concatenate([self._keys, x.astype(np.int64) // self.width])
+        columns = {name: np.concatenate([self._columns[name], chunk[name]]) for name in self.FIELDS}
+        self._keys, self._columns = _group_reduce(keys, columns)
+        while len(self._keys) > 2 * self.buckets:
+            self.width *= 2
+            self._keys, self._columns = _group_reduce(self._keys // 2, self._columns)
+
+    def points(self):
+        """
+        x and y of the kept points, in x order.
+        """
+        columns = self._columns
+        x = np.stack([columns['first_x'], columns['min_x'], columns['max_x'], columns['last_x']], axis=1)
+        y = np.stack([columns['first_y'], columns['min_y'], columns['max_y'], columns['last_y']], axis=1)
+        order = np.argsort(x, axis=1, kind='stable')
+        x, y = np.take_along_axis(x, order, 1).ravel(), np.take_along_axis(y, order, 1).ravel()
+        keep = np.append(True, np.diff(x) > 0)
+        return x[keep], y[keep]
+
+class RollingMean:
+    """
+    Mean over the last `window` rows of a series streamed in chunks (shorter
+    windows at the start).
+    """
+    def __init__(self, window):
+        self.window = window
+        self.rows = 0
+        self._tail = np.empty(0)   # The last window - 1 rows
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        joined = np.concatenate([self._tail, values])
+        sums = np.cumsum(joined)
+        # Trailing window sums from the running total, and the rows they cover
+        lagged = np.concatenate([np.zeros(self.window), sums])[:len(joined)]
+        counts = np.minimum(self.rows - len(self._tail) + np.arange(1, len(joined) + 1), self.window)
+        means = ((sums - lagged) / counts)[len(self._tail):]
+        self.rows += len(values)
+        self._tail = joined[len(joined) - min(self.window - 1, len(joined)):]
+        return means
+
+def decimate_log(log_files, buckets=2000, reward_window=1000, chunk_rows=1000000):
+    """
+    M4-decimated frequency, amplitude, response, reward and rolling mean reward
+    of one or more logs (concatenated in order), streamed in chunks.
+    Returns {name: (x, y)} with x the row number across the logs.
+    """
+    if isinstance(log_files, str):
+        log_files = [log_files]
+    names = ['frequency', 'amplitude', 'response', 'reward']
+    decimators = {name: M4Decimator(buckets) for name in names + ['reward_mean']}
+    rolling = RollingMean(reward_window)
+    for log_file in log_files:
+        for chunk in read_log_columns(log_file, names, chunk_rows):
+            for name in names:
+                decimators[name].update(chunk[name])
+            decimators['reward_mean'].update(rolling.update(chunk['reward']))
+    return {name: decimator.points() for name, decimator in decimators.items()}
+
+def plot_training_results_decimated(log_files, output=None, buckets=2000, reward_window=1000, chunk_rows=1000000):
+    """
+    plot_training_results for runs of any length: the logs are streamed and
+    M4-decimated to about `buckets` points per series, and the reward is also
+    drawn as its mean over the last reward_window rows. x is the row number
+    across the logs, as the step counter restarts every episode.
+    """
+    series = decimate_log(log_files, buckets, reward_window, chunk_rows)
+    fig, axes = plt.subplots(3, 1, figsize=(10, 12), sharex=True)
+
+    axes[0].plot(*series['frequency'], color='blue', lw=0.5, label='Frequency (Hz)')
+    ax2 = axes[0].twinx()
+    ax2.plot(*series['amplitude'], color='orange', lw=0.5, label='Amplitude (V)')
+    axes[0].set_title("Stimulation Parameters")
+    axes[0].set_ylabel("Frequency (Hz)")
+    ax2.set_ylabel("Amplitude (V)")
+
+    axes[1].plot(*series['response'], color='green', lw=0.5)
+    axes[1].set_title("Organism Response")
+    axes[1].set_ylabel("Voltage/Resistance")
+
+    axes[2].plot(*series['reward'], color='red', lw=0.5, alpha=0.3, label='Reward')
+    axes[2].plot(*series['reward_mean'], color='darkred', lw=1.5, label=f'Mean of last {reward_window}')
+    axes[2].set_title("RL Reward")
+    axes[2].set_xlabel("Step (all episodes)")
+    axes[2].legend(loc='lower right')
+
+    plt.tight_layout()
+    _finish(fig, output)
+
+def phase_space_counts(log_files, value_range=None, bins=256, chunk_rows=1000000):
+    """
+    bins x bins histogram of (Response[t], Response[t+1]) pairs over
+    value_range (default: the response range, from an extra pass over the
+    logs), streamed in chunks. Pairs do not span separate logs. Returns
+    (counts, value_range).
+    """
+    if isinstance(log_files, str):
+        log_files = [log_files]
+    if value_range is None:
+        low, high = np.inf, -np.inf
+        for log_file in log_files:
+            for chunk in read_log_columns(log_file, ['response'], chunk_rows):
+                if len(chunk['response']):
+                    low, high = min(low, np.nanmin(chunk['response'])), max(high, np.nanmax(chunk['response']))
+        value_range = (low, high) if low < high else (low - 0.5, low + 0.5)
+    counts = np.zeros((bins, bins))
+    for log_file in log_files:
+        previous = None
+        for chunk in read_log_columns(log_file, ['response'], chunk_rows):
+            response = chunk['response'] if previous is None else np.concatenate([[previous], chunk['response']])
+            if len(response) > 1:
+                counts += np.histogram2d(response[:-1], response[1:], bins, [value_range, value_range])[0]
+            if len(response):
+                # A one-row chunk still pairs with the next one
+                previous = response[-1]
+    return counts, value_range
+
+def plot_phase_space_density(log_files, output=None, value_range=None, bins=256, chunk_rows=1000000):
+    """
+    plot_phase_space for runs of any length: the phase_space_counts histogram
+    drawn as a log-scaled density.
+    """
+    counts, value_range = phase_space_counts(log_files, value_range, bins, chunk_rows)
+    fig = plt.figure(figsize=(8, 8))
+    plt.imshow(np.log1p(counts.T), origin='lower', extent=[*value_range, *value_range], cmap='viridis', aspect='auto')
+    plt.colorbar(label='log(1 + pairs)')
+    plt.title("Phase Space Reconstruction")
+    plt.xlabel("Response[t]")
+    plt.ylabel("Response[t+1]")
+    _finish(fig, output)
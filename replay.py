@@ -0,0 +1,255 @@
+import bisect
+import glob
+import logging
+import os
+import numpy as np
+from src.utils.logger import LOG_DTYPE, NpyAppendWriter
+
+def load_log(path, chunk_rows=1000000):
+    """
+    Memory-map one ExperimentLogger log as a read-only structured array.
+    .npy logs are mapped directly. .csv and .parquet logs are converted once, in
+    chunks, to an .npy cache next to them (path + '.npy'), which is rebuilt when
+    the source is newer.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension != '.npy':
+        cache = path + '.npy'
+        if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(path):
+            _convert_log(path, extension, cache, chunk_rows)
+        path = cache
+    try:
+        log = np.load(path, mmap_mode='r')
+    except ValueError:
+        # An empty log cannot be memory-mapped
+        log = np.load(path)
+    if log.dtype != LOG_DTYPE:
+        raise ValueError(f"{path} holds {log.dtype}, expected an experiment log")
+    return log
+
+def _convert_log(path, extension, cache, chunk_rows):
+    logging.getLogger(__name__).info(f"Converting {path} to a memory-mappable cache at {cache}")
+    tmp = cache + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    writer = NpyAppendWriter(tmp, LOG_DTYPE)
+    try:
+        for chunk in _read_chunks(path, extension, chunk_rows):
+            writer.write(chunk)
+    finally:
+        writer.close()
+    os.replace(tmp, cache)
+
+def _read_chunks(path, extension, chunk_rows):
+    for columns in read_log_columns(path, LOG_DTYPE.names, chunk_rows, extension):
+        rows = np.empty(len(columns['step']), dtype=LOG_DTYPE)
+        for name in LOG_DTYPE.names:
+            rows[name] = columns[name]
+        yield rows
+
+def read_log_columns(path, columns=None, chunk_rows=1000000, extension=None):
+    """
+    Stream an ExperimentLogger log (.npy, .csv or .parquet) as dicts of column
+    arrays of up to chunk_rows rows, without loading the whole log. Only the
+    given columns (default: all) are read, which parquet does without touching
+    the others. .npy logs are memory-mapped, so their chunks are views.
+    """
+    columns = list(columns or LOG_DTYPE.names)
+    extension = extension or os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        log = load_log(path)
+        for start in range(0, len(log), chunk_rows):
+            rows = log[start:start + chunk_rows]
+            yield {name: np.asarray(rows[name]) for name in columns}
+    elif extension == '.csv':
+        import pandas as pd
+        for frame in pd.read_csv(path, usecols=columns, chunksize=chunk_rows):
+            yield {name: frame[name].to_numpy() for name in columns}
+    elif extension == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield {name: batch.column(name).to_numpy() for name in columns}
+    else:
+        raise ValueError(f"Unsupported log format '{extension}'")
+
+class ReplayLog:
+    """
+    One or more memory-mapped experiment logs read as a single sequence of rows
+    without loading them into memory. Sessions are concatenated in the given
+    order (glob patterns are expanded and sorted). An episode starts at every
+    session and wherever the logged step counter does not increase.
+
+    Rows are also indexed by (frequency, amplitude) bin, CSR style: rows_in_bin(b)
+    is a slice of one array of row numbers sorted by bin, in recording order
+    within each bin. The index is built on first use.
+    """
+    def __init__(self, paths, frequency_range, amplitude_range, frequency_bins=20, amplitude_bins=20,
+                 chunk_rows=1000000):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.paths = []
+        for pattern in paths:
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(f"No experiment log matches {pattern}")
+            self.paths.extend(matches)
+        self.logger = logging.getLogger(__name__)
+        self.chunk_rows = chunk_rows
+        self.frequency_range = frequency_range
+        self.amplitude_range = amplitude_range
+        self.frequency_bins = frequency_bins
+        self.amplitude_bins = amplitude_bins
+
+        self.sessions = [load_log(path, chunk_rows) for path in self.paths]
+        # offsets[s] is the global row number of the first row of session s
+        self.offsets = np.concatenate([[0], np.cumsum([len(s) for s in self.sessions])]).astype(np.int64)
+        self._offsets = self.offsets.tolist()
+        self._columns = {}
+        self.episode_starts = self._find_episode_starts()
+        self._order = None
+        self._indptr = None
+        self._fallback = None
+        self.logger.info(f"Replaying {len(self)} steps from {len(self.sessions)} session(s), "
+                         f"{len(self.episode_starts)} episode(s)")
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build from the replay section: logs (paths or glob patterns) and the
+        number of frequency/amplitude bins over the stimulation ranges.
+        """
+        replay = config['replay']
+        stimulation = config['stimulation']
+        return cls(
+            replay['logs'],
+            (stimulation['min_frequency'], stimulation['max_frequency']),
+            (stimulation['min_amplitude'], stimulation['max_amplitude']),
+            frequency_bins=replay.get('frequency_bins', 20),
+            amplitude_bins=replay.get('amplitude_bins', 20),
+        )
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def _chunks(self, name):
+        # (global start, values) pieces of one column, a chunk of one session at a time
+        for offset, session in zip(self._offsets, self.sessions):
+            for start in range(0, len(session), self.chunk_rows):
+                yield offset + start, session[name][start:start + self.chunk_rows]
+
+    def _find_episode_starts(self):
+        starts = []
+        for offset, session in zip(self._offsets, self.sessions):
+            if not len(session):
+                continue
+            starts.append([offset])
+            previous = None
+            for start in range(0, len(session), self.chunk_rows):
+                steps = np.asarray(session['step'][start:start + self.chunk_rows])
+                if previous is not None:
+                    steps = np.concatenate([[previous], steps])
+                    new = np.flatnonzero(np.diff(steps) <= 0) + start
+                else:
+                    new = np.flatnonzero(np.diff(steps) <= 0) + 1
+                starts.append(new + offset)
+                previous = steps[-1]
+        if not starts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(starts).astype(np.int64)
+
+    def column(self, name, session=0):
+        """
+        Zero-copy (memory-mapped) view of one column of one session.
+        """
+        columns = self._columns.get(name)
+        if columns is None:
+            # Plain ndarray views of the maps skip np.memmap's per-index overhead
+            columns = self._columns[name] = [np.asarray(s[name]) for s in self.sessions]
+        return columns[session]
+
+    def gather(self, name, rows):
+        """
+        Values of column `name` at the given global row numbers.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(self.sessions) == 1:
+            return self.column(name)[rows]
+        out = np.empty(rows.shape, dtype=LOG_DTYPE[name])
+        flat_rows, flat_out = rows.ravel(), out.reshape(-1)
+        # Group the rows by session, then read each session's share in one go
+        session_of = np.searchsorted(self.offsets, flat_rows, side='right') - 1
+        order = np.argsort(session_of, kind='stable')
+        bounds = np.searchsorted(session_of[order], np.arange(len(self.sessions) + 1))
+        for s in range(len(self.sessions)):
+            if bounds[s] == bounds[s + 1]:
+                continue
+            picked = order[bounds[s]:bounds[s + 1]]
+            flat_out[picked] = self.column(name, s)[flat_rows[picked] - self._offsets[s]]
+        return out
+
+    def value(self, name, row):
+        """
+        A single value at a global row number, without any array bookkeeping.
+        """
+        s = bisect.bisect_right(self._offsets, row) - 1
+        return self.column(name, s)[row - self._offsets[s]]
+
+    def episode_start_of(self, rows):
+        """
+        Global row number of the first step of the episode each row belongs to.
+        """
+        return self.episode_starts[np.searchsorted(self.episode_starts, rows, side='right') - 1]
+
+    def bin_of(self, frequency, amplitude):
+        """
+        Bin number of (frequency, amplitude); values outside the stimulation
+        ranges fall in the edge bins. Works element-wise on arrays.
+        """
+        f_min, f_max = self.frequency_range
+        a_min, a_max = self.amplitude_range
+        if isinstance(frequency, (float, int)) and isinstance(amplitude, (float, int)):
+            # Plain floats skip the array machinery, for per-step lookups
+            f_bin = min(max(int((frequency - f_min) / (f_max - f_min) * self.frequency_bins), 0), self.frequency_bins - 1)
+            a_bin = min(max(int((amplitude - a_min) / (a_max - a_min) * self.amplitude_bins), 0), self.amplitude_bins - 1)
+            return f_bin * self.amplitude_bins + a_bin
+        f_bin = np.clip(((np.asarray(frequency) - f_min) / (f_max - f_min) * self.frequency_bins).astype(np.int64),
+                        0, self.frequency_bins - 1)
+        a_bin = np.clip(((np.asarray(amplitude) - a_min) / (a_max - a_min) * self.amplitude_bins).astype(np.int64),
+                        0, self.amplitude_bins - 1)
+        return f_bin * self.amplitude_bins + a_bin
+
+    def _build_index(self):
+        n_bins = self.frequency_bins * self.amplitude_bins
+        bins = np.empty(len(self), dtype=np.int32)
+        for (start, frequency), (_, amplitude) in zip(self._chunks('frequency'), self._chunks('amplitude')):
+            bins[start:start + len(frequency)] = self.bin_of(frequency, amplitude)
+        self._order = np.argsort(bins, kind='stable')
+        counts = np.bincount(bins, minlength=n_bins)
+        self._indptr = np.concatenate([[0], np.cumsum(counts)])
+
+        # Empty bins borrow the rows of the nearest bin that has any
+        filled = np.flatnonzero(counts)
+        self._fallback = np.arange(n_bins)
+        if len(filled) and len(filled) < n_bins:
+            from scipy.spatial import cKDTree
+            grid = np.column_stack(np.divmod(np.arange(n_bins), self.amplitude_bins))
+            _, nearest = cKDTree(grid[filled]).query(grid)
+            self._fallback = filled[nearest]
+        self.logger.info(f"Indexed {len(self)} steps into {len(filled)}/{n_bins} non-empty bins")
+
+    def rows_in_bin(self, bin_index, nearest=False):
+        """
+        Global row numbers recorded in a bin (a view into the index). With
+        nearest=True an empty bin is replaced by the nearest non-empty one.
+        """
+        if self._order is None:
+            self._build_index()
+        if nearest:
+            bin_index = self._fallback[bin_index]
+        return self._order[self._indptr[bin_index]:self._indptr[bin_index + 1]]
+
+    def lookup(self, frequency, amplitude, nearest=False):
+        """
+        Global row numbers of every step recorded in the bin of (frequency, amplitude).
+        """
+        return self.rows_in_bin(int(self.bin_of(frequency, amplitude)), nearest=nearest)
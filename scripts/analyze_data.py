@@ -1,33 +1,77 @@
 import argparse
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
 import sys
 
 # Add project root to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.utils.plotting import plot_training_results, plot_phase_space
+from src.utils.analysis import summarize_logs
+
+# Above this many rows, auto plots are decimated
+DECIMATE_ROWS = 100000
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze MycoRL Experiment Data")
-    parser.add_argument('logfile', type=str, help='Path to the CSV log file')
+    parser.add_argument('logfiles', type=str, nargs='+', help='Experiment logs (.csv, .npy or .parquet) or glob patterns, one per session')
+    parser.add_argument('--workers', type=int, default=None, help='Processes summarizing logs in parallel (default: one per CPU)')
+    parser.add_argument('--chunk-rows', type=int, default=1000000, help='Rows read at a time')
+    parser.add_argument('--accuracy', type=float, default=0.01, help='Relative accuracy of the percentiles')
+    parser.add_argument('--episodes', type=str, default=None, help='Write per-episode reward summaries to this CSV')
+    parser.add_argument('--no-plots', action='store_true')
+    parser.add_argument('--plot-mode', default='auto', choices=['auto', 'full', 'decimated'],
+                        help=f'full draws every row; decimated keeps the extremes of ~--buckets runs (auto: over {DECIMATE_ROWS} rows)')
+    parser.add_argument('--buckets', type=int, default=2000, help='Decimated runs per series, about the plot width in pixels')
+    parser.add_argument('--reward-window', type=int, default=1000, help='Rows of the rolling mean reward (decimated)')
+    parser.add_argument('--output-dir', type=str, default=None, help='Save the plots as PNG here instead of showing them')
     args = parser.parse_args()
 
-    if not os.path.exists(args.logfile):
-        print(f"Error: File {args.logfile} does not exist.")
+    print(f"Analyzing {', '.join(args.logfiles)}...")
+    try:
+        summary = summarize_logs(args.logfiles, args.workers, args.chunk_rows, args.accuracy)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
         return
 
-    print(f"Analyzing {args.logfile}...")
-    
-    # Basic Stats
-    df = pd.read_csv(args.logfile)
-    print("\n--- Statistics ---")
-    print(df.describe())
+    # Basic Stats, streamed in a single pass over every session
+    print(f"\n--- Statistics ({len(summary.sessions)} sessions) ---")
+    print(summary.describe())
+
+    episodes = summary.episodes()
+    print(f"\n--- Episodes ({len(episodes)}) ---")
+    print(episodes[['length', 'total_reward', 'mean_reward']].describe())
+    if args.episodes:
+        episodes.to_csv(args.episodes, index=False)
+        print(f"Per-episode summaries written to {args.episodes}")
 
     # Plots
-    print("\nGenerating plots...")
-    plot_training_results(args.logfile)
-    plot_phase_space(args.logfile)
+    if args.no_plots:
+        return
+    rows = summary.stats['step'].count
+    decimated = args.plot_mode == 'decimated' or (args.plot_mode == 'auto' and rows > DECIMATE_ROWS)
+    if not decimated and len(summary.sessions) > 1:
+        print("\nFull plots need a single session, skipping them (use --plot-mode decimated).")
+        return
+    outputs = [None, None]
+    if args.output_dir:
+        # Render without a display
+        import matplotlib
+        matplotlib.use('Agg')
+        os.makedirs(args.output_dir, exist_ok=True)
+        outputs = [os.path.join(args.output_dir, name) for name in ['training_results.png', 'phase_space.png']]
+    print(f"\nGenerating {'decimated ' if decimated else ''}plots...")
+    # matplotlib and pandas load only when plotting
+    from src.utils.plotting import (load_columns, plot_phase_space, plot_phase_space_density, plot_training_results,
+                                    plot_training_results_decimated)
+    if decimated:
+        response = summary.stats['response']
+        plot_training_results_decimated(summary.sessions, outputs[0], args.buckets, args.reward_window, args.chunk_rows)
+        plot_phase_space_density(summary.sessions, outputs[1], (response.min, response.max) if response.max > response.min else None,
+                                 chunk_rows=args.chunk_rows)
+    else:
+        columns = load_columns(summary.sessions[0], chunk_rows=args.chunk_rows)
+        plot_training_results(columns, outputs[0])
+        plot_phase_space(columns, outputs[1])
+    if args.output_dir:
+        print(f"Plots written to {args.output_dir}")
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,3 @@
-import time
 import argparse
 import yaml
 import sys
@@ -6,9 +5,11 @@ import os
 import logging
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.hardware.safety_monitor import SafetyMonitor
+from src.hardware.scheduler import PeriodicTimer
 from src.hardware.stimulator import SerialStimulator, MockStimulator
 
-def calibrate(config_path, mode):
+def calibrate(config_path, mode, settle_time=1.0):
     with open(config_path, 'r') as f:
         config = yaml.safe_load(f)
 
@@ -19,6 +20,7 @@ def calibrate(config_path, mode):
         stim = SerialStimulator(config)
     else:
         stim = MockStimulator(config)
+    safety = SafetyMonitor(config)
 
     logger.info("Starting Impedance Check / Calibration...")
     
@@ -27,12 +29,16 @@ def calibrate(config_path, mode):
     freq = 10.0 # Hz
     
     results = []
+    # Responses are read exactly settle_time after each stimulation, however long logging takes
+    timer = PeriodicTimer(settle_time)
+    timer.wait()
 
     try:
         for v in test_voltages:
             logger.info(f"Applying {v}V at {freq}Hz...")
+            v = safety.enforce(freq, v)
             stim.apply_stimulation(freq, v)
-            time.sleep(1.0) # Wait for settle
+            timer.wait() # Wait for settle
             
             response = stim.read_response()
             logger.info(f"Response: {response:.4f}")
@@ -57,6 +63,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', default='config/default_config.yaml')
     parser.add_argument('--mode', default='simulation')
+    parser.add_argument('--settle', type=float, default=1.0, help='Seconds between stimulating and reading the response')
     args = parser.parse_args()
     
-    calibrate(args.config, args.mode)
+    calibrate(args.config, args.mode, args.settle)
@@ -0,0 +1,45 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.daemon import ExperimentDaemon, submit
+
+DEFAULT_SOCKET = '/tmp/mycorl.sock'
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm experiment daemon: serve jobs on a Unix socket, or submit one")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="Load the training stack once and answer jobs until shut down")
+    serve.add_argument('--config', default='config/default_config.yaml')
+    serve.add_argument('--max-envs', type=int, default=4, help="Warm envs kept, least recently used dropped first")
+    send = commands.add_parser('submit', help="Send a job and print the response")
+    send.add_argument('job', help='JSON job, e.g. \'{"command": "train", "steps": 2048, "save_path": "models/job"}\'')
+    send.add_argument('--timeout', type=float, default=None)
+    run = commands.add_parser('run', help="Run a job in this process without a daemon (a cold start)")
+    run.add_argument('job')
+    run.add_argument('--config', default='config/default_config.yaml')
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        response = submit(args.socket, json.loads(args.job), args.timeout)
+        print(json.dumps(response))
+        sys.exit(0 if response.get('status') == 'ok' else 1)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    daemon = ExperimentDaemon(config, args.socket, max_envs=getattr(args, 'max_envs', 1))
+    if args.command == 'run':
+        response = daemon.handle(args.job)
+        print(json.dumps(response))
+        sys.exit(0 if response.get('status') == 'ok' else 1)
+    daemon.warm_up()
+    daemon.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import logging
+import os
+import sys
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model.surrogate import fit_surrogate
+from src.utils.replay import ReplayLog
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a surrogate substrate model to experiment logs")
+    parser.add_argument('logs', nargs='*', help="ExperimentLogger logs or glob patterns (default: replay.logs)")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--out', help="Output .npz (default: surrogate.model_path)")
+    parser.add_argument('--hidden', type=int, nargs='*', help="MLP correction layer sizes (needs torch)")
+    parser.add_argument('--epochs', type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    settings = config['surrogate']
+    stimulation = config['stimulation']
+
+    log = ReplayLog(
+        args.logs or config['replay']['logs'],
+        (stimulation['min_frequency'], stimulation['max_frequency']),
+        (stimulation['min_amplitude'], stimulation['max_amplitude']),
+    )
+    model = fit_surrogate(
+        log, config,
+        response_lags=settings.get('response_lags', 4),
+        input_lags=settings.get('input_lags', 2),
+        degree=settings.get('degree', 3),
+        ridge=settings.get('ridge', 1e-6),
+        validation_fraction=settings.get('validation_fraction', 0.2),
+        hidden=args.hidden if args.hidden is not None else settings.get('hidden', []),
+        epochs=args.epochs or settings.get('epochs', 20),
+        seed=config['experiment'].get('seed'),
+    )
+
+    out = args.out or settings['model_path']
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    model.save(out)
+    if model.validation:
+        print(f"Validation: one-step R^2 {model.validation['r2']:.4f}, free-run NRMSE {model.validation['nrmse']:.4f}")
+    else:
+        # validation_fraction is 0, or the sessions are too short to hold out a lag window
+        print("Validation: no validation split, not scored")
+    print(f"Saved surrogate to {out}")
+
+if __name__ == "__main__":
+    main()
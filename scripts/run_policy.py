@@ -0,0 +1,44 @@
+import argparse
+import logging
+import os
+import sys
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.env.bio_env import BioInterfaceEnv
+from src.hardware.scheduler import ControlLoopScheduler
+from src.model.inference import NumpyPolicy, TorchScriptPolicy
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an exported policy in closed loop at the configured control period")
+    parser.add_argument('policy', help="Actor exported by main.py --export (.npz or .pt)")
+    parser.add_argument('--config', default='config/default_config.yaml')
+    parser.add_argument('--mode', default='hardware', choices=['simulation', 'hardware', 'replay'])
+    parser.add_argument('--steps', type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    env = BioInterfaceEnv(config, mode=args.mode)
+    if args.policy.endswith('.pt'):
+        policy = TorchScriptPolicy.load(args.policy, env.observation_space.shape, env.action_space.shape)
+    else:
+        policy = NumpyPolicy.load(args.policy)
+    # A recurrent policy starts every episode from a zero state
+    reset_policy = policy.reset if getattr(policy, 'recurrent', False) else None
+    scheduler = ControlLoopScheduler.from_config(env, policy.act, config, reset_policy=reset_policy)
+    try:
+        stats = scheduler.run(args.steps)
+    finally:
+        env.close()
+
+    print(f"{stats['ticks']} steps at {scheduler.timer.period * 1e3:.2f}ms, {stats['missed']} missed deadlines")
+    for name in ['jitter', 'latency', 'busy']:
+        summary = stats[name]
+        print(f"{name:>8}: mean {summary['mean'] * 1e6:.1f}us, p50 {summary['p50'] * 1e6:.1f}us, "
+              f"p99 {summary['p99'] * 1e6:.1f}us, max {summary['max'] * 1e6:.1f}us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import logging
+import os
+import sys
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model.sweep import SweepRunner
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline hyperparameter sweep with asynchronous successive halving")
+    parser.add_argument('--config', default='config/default_config.yaml', help="Base config with a sweep section")
+    parser.add_argument('--sweep', help="YAML file holding the sweep section instead (default: the base config's)")
+    parser.add_argument('--out', help="Sweep directory; rerun with the same one to resume (default: sweeps/<experiment name>)")
+    parser.add_argument('--workers', type=int, help="Trials trained in parallel (default: sweep.workers or one per core)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    sweep = config.get('sweep')
+    if args.sweep:
+        with open(args.sweep, 'r') as f:
+            sweep = yaml.safe_load(f)
+        sweep = sweep.get('sweep', sweep)
+    if not sweep:
+        parser.error("No sweep section in the config")
+
+    out = args.out or os.path.join('sweeps', config['experiment']['name'])
+    runner = SweepRunner(config, sweep, out, workers=args.workers)
+    runner.run()
+
+    best = runner.best()
+    if best is None:
+        print("No trial finished with a score")
+        return
+    trial, score, params = best
+    print(f"Best trial {trial}: score {score:.4f}")
+    for key, value in params.items():
+        print(f"  {key}: {value}")
+    print(f"Results in {os.path.join(out, 'results.csv')}, model in {os.path.join(out, f'trial_{trial:04d}', 'model.zip')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import numpy as np
+from src.env.bio_env import scale_action
+
+class TransitionDataset:
+    """
+    Offline RL / behaviour cloning view of a ReplayLog.
+
+    Transition t holds the observation before logged step t, the normalized
+    action taken, its reward, the observation after it and whether the episode
+    ended there. Observations are the same zero-padded observation_window
+    histories BioInterfaceEnv produces. Batches are gathered straight from the
+    memory-mapped logs, so only the rows a batch needs are read from disk.
+
+    reward_fn, if given, recomputes rewards from the logged responses (an array
+    of shape (batch,)), so reward designs can be tried without new sessions.
+    """
+    def __init__(self, log, config, reward_fn=None, seed=None):
+        self.log = log
+        self.config = config
+        self.window = config['environment']['observation_window']
+        self.reward_fn = reward_fn
+        self.rng = np.random.default_rng(seed)
+        # Relative positions of a history window plus the step itself
+        self._offsets = np.arange(-self.window, 1)
+        # An episode ends right before the next one starts, and at the end of the log
+        self._episode_ends = np.append(log.episode_starts[1:] - 1, len(log) - 1)
+
+    def __len__(self):
+        return len(self.log)
+
+    def batch(self, indices):
+        """
+        Transitions at the given global row numbers, as a dict of arrays:
+        observations, actions, rewards, next_observations, dones.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        positions = indices[:, None] + self._offsets
+        starts = self.log.episode_start_of(indices)[:, None]
+        # Steps before the episode started read as zeros, like a fresh history
+        before_start = positions < starts
+        responses = self.log.gather('response', np.maximum(positions, starts)).astype(np.float32)
+        responses[before_start] = 0.0
+
+        frequency = self.log.gather('frequency', indices)
+        amplitude = self.log.gather('amplitude', indices)
+        actions = np.stack(scale_action(frequency, amplitude, self.config), axis=-1).astype(np.float32)
+        if self.reward_fn is None:
+            rewards = self.log.gather('reward', indices)
+        else:
+            rewards = self.reward_fn(responses[:, -1])
+        dones = self._episode_ends[np.searchsorted(self._episode_ends, indices)] == indices
+
+        return {
+            "observations": responses[:, :-1],
+            "actions": actions,
+            "rewards": np.asarray(rewards, dtype=np.float32),
+            "next_observations": responses[:, 1:],
+            "dones": dones,
+        }
+
+    def sample(self, batch_size):
+        """
+        A batch of transitions drawn uniformly with replacement.
+        """
+        return self.batch(self.rng.integers(len(self), size=batch_size))
+
+    def iter_batches(self, batch_size, shuffle=True):
+        """
+        One pass over every transition. Shuffled batches read rows in random
+        order; unshuffled ones read the logs sequentially, which is fastest on disk.
+        """
+        order = self.rng.permutation(len(self)) if shuffle else np.arange(len(self))
+        for start in range(0, len(order), batch_size):
+            yield self.batch(order[start:start + batch_size])
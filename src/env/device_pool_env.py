@@ -0,0 +1,223 @@
+import copy
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
+from stable_baselines3.common.env_util import is_wrapped
+from stable_baselines3.common.vec_env import VecEnv
+from src.env.bio_env import BioInterfaceEnv, make_spaces
+
+def device_configs(config):
+    """
+    One config per entry of hardware.devices. An entry is a port name or a
+    mapping of hardware keys (port, driver, ni_device_name, protocol, ...)
+    that override the shared hardware section for that device.
+    """
+    devices = config['hardware'].get('devices') or []
+    configs = []
+    for device in devices:
+        device_config = copy.deepcopy(config)
+        device_config['hardware'].pop('devices', None)
+        device_config['hardware'].update({'port': device} if isinstance(device, str) else device)
+        configs.append(device_config)
+    return configs
+
+def _device_name(config):
+    hardware = config['hardware']
+    return hardware.get('ni_device_name') if hardware.get('driver', 'serial') == 'ni' else hardware.get('port')
+
+class DevicePoolVecEnv(VecEnv):
+    """
+    Several physical substrates as one SB3 VecEnv, one per hardware.devices
+    entry. Every device's env (a hardware-mode BioInterfaceEnv by default, or
+    whatever env_fn(device_config) builds) lives on its own thread and the
+    devices are stepped concurrently, so a pool step takes about as long as
+    the slowest device rather than the sum of all of them. Serial and DAQ I/O
+    release the GIL while they wait.
+
+    A device whose step raises, whose driver reports a failure, or which does
+    not answer within hardware.device_pool.step_timeout (one deadline shared
+    by all devices of a step) is masked out: its episode ends (truncated,
+    with info["device_failed"]) and from then on it returns zero observations
+    and rewards with info["masked"], without being touched again. `active`
+    tells which devices are still stepped. The pool raises once every device
+    has failed.
+
+    The masked transitions still reach the learner: an on-policy algorithm
+    such as PPO fits its value function to them and computes advantages from
+    them as if zero were a real observation and reward, which biases both
+    for the rest of the run. Set hardware.device_pool.stop_on_failure to
+    raise on the first failure instead.
+    """
+    def __init__(self, config, env_fn=None):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.device_configs = device_configs(config)
+        if not self.device_configs:
+            raise ValueError("hardware.devices lists no devices")
+        pool = config['hardware'].get('device_pool') or {}
+        self.step_timeout = pool.get('step_timeout', 1.0)
+        self.stop_on_failure = pool.get('stop_on_failure', False)
+        self.names = [_device_name(device_config) for device_config in self.device_configs]
+
+        num_envs = len(self.device_configs)
+        self.env_fn = env_fn if env_fn is not None else (lambda device_config: BioInterfaceEnv(device_config, mode='hardware'))
+        # A single-threaded executor per device pins its env to one thread
+        self._executors = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"device-{i}") for i in range(num_envs)]
+        self.envs = [None] * num_envs
+        self.active = np.ones(num_envs, dtype=bool)
+        self.failures = [None] * num_envs
+        # Devices connect (and negotiate their protocol) in parallel
+        futures = [executor.submit(self.env_fn, device_config)
+                   for executor, device_config in zip(self._executors, self.device_configs)]
+        for i, future in enumerate(futures):
+            try:
+                self.envs[i] = future.result()
+            except Exception as e:
+                self._fail(i, e)
+        self._check_active()
+        self.logger.info(f"Device pool: {int(self.active.sum())} of {num_envs} devices connected")
+
+        # After the envs exist, VecEnv reads their render_mode
+        action_space, observation_space, _ = make_spaces(config)
+        super().__init__(num_envs, observation_space, action_space)
+
+        # Same alternating observation buffers as BioInterfaceVecEnv
+        self._obs_buffers = np.zeros((2, self.num_envs) + observation_space.shape, dtype=np.float32)
+        self._obs_index = 0
+        self.actions = None
+
+    def _fail(self, index, error):
+        self.active[index] = False
+        self.failures[index] = f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+        self.logger.error(f"Device {index} ({self.names[index]}) failed and is masked out: {self.failures[index]}")
+        env = self.envs[index]
+        if env is not None:
+            # On the device's own thread, behind any step still stuck there
+            self._executors[index].submit(self._close_env, env)
+
+    @staticmethod
+    def _close_env(env):
+        try:
+            env.close()
+        except Exception:
+            pass
+
+    def _check_active(self):
+        if not self.active.any():
+            raise RuntimeError(f"Every device in the pool failed: {self.failures}")
+        if self.stop_on_failure and not self.active.all():
+            raise RuntimeError(f"A device failed and hardware.device_pool.stop_on_failure is set: {self.failures}")
+
+    def _gather(self, futures):
+        """
+        Results of the per-device futures (None for masked devices), masking
+        the devices that raise or do not finish within step_timeout of the call.
+        """
+        results = [None] * self.num_envs
+        # One deadline for all devices, so hung devices do not add up their timeouts
+        deadline = time.monotonic() + self.step_timeout
+        for i, future in enumerate(futures):
+            if future is None:
+                continue
+            try:
+                results[i] = future.result(timeout=max(deadline - time.monotonic(), 0.0))
+            except FutureTimeoutError:
+                self._fail(i, TimeoutError(f"no answer within {self.step_timeout}s"))
+            except Exception as e:
+                self._fail(i, e)
+        return results
+
+    @staticmethod
+    def _step_env(env, action):
+        obs, reward, terminated, truncated, info = env.step(action)
+        env.unwrapped.stimulator.check()
+        if terminated or truncated:
+            # Auto-reset on the device thread, like DummyVecEnv; the observation is a view the reset clears
+            info["terminal_observation"] = np.array(obs)
+            info["TimeLimit.truncated"] = truncated and not terminated
+            obs, _ = env.reset()
+        return obs, reward, terminated or truncated, info
+
+    @staticmethod
+    def _reset_env(env, seed, options):
+        obs, _ = env.reset(seed=seed, options=options)
+        env.unwrapped.stimulator.check()
+        return obs
+
+    def step_async(self, actions):
+        self.actions = actions
+
+    def step_wait(self):
+        actions = np.asarray(self.actions)
+        futures = [self._executors[i].submit(self._step_env, self.envs[i], actions[i]) if self.active[i] else None
+                   for i in range(self.num_envs)]
+        active = self.active.copy()
+        results = self._gather(futures)
+
+        obs = self._next_obs()
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        infos = [{} for _ in range(self.num_envs)]
+        for i, result in enumerate(results):
+            if result is not None:
+                obs[i], rewards[i], dones[i], infos[i] = result
+            elif active[i]:
+                # Failed during this step: end its episode where it stood
+                dones[i] = True
+                infos[i] = {"device_failed": True, "error": self.failures[i], "TimeLimit.truncated": True,
+                            "terminal_observation": self._obs_buffers[1 - self._obs_index][i].copy()}
+                obs[i] = 0.0
+            else:
+                infos[i] = {"masked": True}
+                obs[i] = 0.0
+        self._check_active()
+        return obs, rewards, dones, infos
+
+    def reset(self):
+        futures = [self._executors[i].submit(self._reset_env, self.envs[i], self._seeds[i], self._options[i])
+                   if self.active[i] else None for i in range(self.num_envs)]
+        results = self._gather(futures)
+        self._reset_seeds()
+        self._reset_options()
+        obs = self._next_obs()
+        for i, result in enumerate(results):
+            obs[i] = result if result is not None else 0.0
+        self._check_active()
+        return obs
+
+    def _next_obs(self):
+        self._obs_index = 1 - self._obs_index
+        return self._obs_buffers[self._obs_index]
+
+    def close(self):
+        futures = [self._executors[i].submit(self._close_env, self.envs[i]) if self.active[i] else None
+                   for i in range(self.num_envs)]
+        for future in futures:
+            if future is not None:
+                try:
+                    future.result(timeout=self.step_timeout)
+                except FutureTimeoutError:
+                    pass
+        for executor in self._executors:
+            # Threads stuck on a hung device are left behind rather than waited for
+            executor.shutdown(wait=False)
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self.envs[i].unwrapped, attr_name) if self.envs[i] is not None else None
+                for i in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        for i in self._get_indices(indices):
+            if self.envs[i] is not None:
+                setattr(self.envs[i].unwrapped, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        indices = list(self._get_indices(indices))
+        futures = [self._executors[i].submit(getattr(self.envs[i], method_name), *method_args, **method_kwargs)
+                   if self.active[i] else None for i in indices]
+        return [future.result() if future is not None else None for future in futures]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [self.envs[i] is not None and is_wrapped(self.envs[i], wrapper_class)
+                for i in self._get_indices(indices)]
@@ -0,0 +1,153 @@
+import logging
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+from src.env.bio_env import make_feature_extractor, make_response_filter, make_spaces, unscale_action
+from src.env.history import HistoryBuffer
+from src.hardware.safety_monitor import SafetyMonitor
+from src.utils.profiling import get_profiler
+from src.hardware.stimulator import BatchMockStimulator
+from src.hardware.surrogate import SurrogateStimulator
+from src.model.rewards import make_reward
+
+class BioInterfaceVecEnv(VecEnv):
+    """
+    Native vectorized version of BioInterfaceEnv for simulation mode.
+    Steps num_envs simulated substrates with one array operation per step instead
+    of one Python env per substrate, and plugs straight into SB3 as a VecEnv.
+    Episodes auto-reset on truncation, following the SB3 VecEnv conventions.
+    """
+    def __init__(self, config, num_envs, seed=None):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+
+        self.obs_window = config['environment']['observation_window']
+        action_space, observation_space, sample_shape = make_spaces(config)
+        self.render_mode = None
+        super().__init__(num_envs, observation_space, action_space)
+
+        if seed is None:
+            seed = config['experiment'].get('seed')
+        if config['environment'].get('simulator', 'mock') == 'surrogate':
+            self.stimulator = SurrogateStimulator(config, num_envs, seed=seed)
+        else:
+            self.stimulator = BatchMockStimulator(config, num_envs, seed=seed)
+
+        self.safety = SafetyMonitor(config)
+        self.history = HistoryBuffer(self.obs_window, batch_size=num_envs, sample_shape=observation_space.shape[1:])
+        self.response_filter = make_response_filter(config)
+        self.features = make_feature_extractor(config)
+        self.reward = make_reward(config, num_envs, sample_shape)
+        # SB3 keeps the previous and the current observation alive across a step,
+        # so observations are handed out from two alternating preallocated buffers
+        self._obs_buffers = np.zeros((2, num_envs) + observation_space.shape, dtype=np.float32)
+        self._obs_index = 0
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.max_steps = config['experiment']['max_steps']
+        self.actions = None
+        self.profiler = get_profiler()
+
+    def seed(self, seed=None):
+        """
+        Reseed the substrates' noise streams from one base seed, spawned per
+        env like the constructor's seed. SB3's default (seed + env index, set
+        when a model is given seed=...) would make neighbouring base seeds
+        share streams.
+        """
+        self.stimulator.seed(seed)
+        return [seed] * self.num_envs
+
+    def step_async(self, actions):
+        self.actions = actions
+
+    def step_wait(self):
+        self.steps += 1
+        profiler = self.profiler
+        if profiler is not None:
+            t = profiler.now()
+
+        actions = np.asarray(self.actions)
+        frequency, amplitude = unscale_action(actions[..., 0], actions[..., 1], self.config)
+        amplitude = self.safety.enforce(frequency, amplitude)
+        if profiler is not None:
+            t = profiler.lap('env.action', t)
+
+        self.stimulator.apply_stimulation(frequency, amplitude)
+        if profiler is not None:
+            t = profiler.lap('env.apply_stimulation', t)
+        response = self.stimulator.read_response()
+        if profiler is not None:
+            t = profiler.lap('env.read_response', t)
+        if self.response_filter is not None:
+            # Each env's response is filtered as its own channel
+            response = self.response_filter.step(response)
+            if profiler is not None:
+                t = profiler.lap('env.filter', t)
+
+        if self.features is None:
+            self.history.push(response)
+        else:
+            features = self.features.step(response)
+            observed = np.concatenate([response.reshape(features.shape[:-1] + (1,)), features], axis=-1)
+            self.history.push(observed.reshape(self.num_envs, -1))
+        if profiler is not None:
+            t = profiler.lap('env.history', t)
+
+        rewards = self._calculate_reward(response).astype(np.float32)
+        if profiler is not None:
+            profiler.lap('env.reward', t)
+
+        # There is no terminal state; episodes only end on the step limit
+        dones = self.steps >= self.max_steps
+        infos = [
+            {"frequency": f, "amplitude": a, "response": r}
+            for f, a, r in zip(frequency.tolist(), amplitude.tolist(), response.tolist())
+        ]
+        for i in np.flatnonzero(dones):
+            infos[i]["TimeLimit.truncated"] = True
+            infos[i]["terminal_observation"] = self.history.view()[i].copy()
+            self._reset_env(i)
+
+        return self._get_obs(), rewards, dones, infos
+
+    def reset(self):
+        for i, seed in enumerate(self._seeds):
+            if seed is not None:
+                self.stimulator.seed_env(i, seed)
+        self._reset_seeds()
+        self._reset_options()
+        self.steps[:] = 0
+        self.history.reset()
+        self.reward.reset()
+        return self._get_obs()
+
+    def _reset_env(self, index):
+        # Like BioInterfaceEnv.reset, this clears the observation but not the substrate
+        self.steps[index] = 0
+        self.history.reset(index)
+        self.reward.reset(index)
+
+    def _get_obs(self):
+        self._obs_index = 1 - self._obs_index
+        obs = self._obs_buffers[self._obs_index]
+        np.copyto(obs, self.history.view())
+        return obs
+
+    def close(self):
+        self.stimulator.close()
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    def _calculate_reward(self, current_response):
+        # Same reward pipeline as BioInterfaceEnv, evaluated for every env at once
+        return self.reward(current_response, self.steps)
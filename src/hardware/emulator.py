@@ -0,0 +1,225 @@
+import os
+import select
+import threading
+import time
+import tty
+import numpy as np
+from src.hardware import protocol
+from src.hardware.stimulator import electrode_coupling
+
+class PtySubstrateEmulator:
+    """
+    Fake stimulation controller on a pseudo-terminal, for exercising the serial
+    drivers without hardware. Open `emulator.port` with pyserial like a real device.
+
+    The simulated substrate follows MockStimulator (sin response, 0.9/0.1 low-pass,
+    Gaussian noise). In 'stream' mode the device emits samples continuously at
+    sample_rate; in 'reply' mode it answers every STIM command with one sample.
+
+    With binary=True the device accepts protocol negotiation and then speaks the
+    framed binary protocol, batching frame_samples samples per frame; binary=False
+    behaves like legacy ASCII-only firmware. baud_rate throttles the output like a
+    real UART (samples that do not fit are dropped) and corrupt_rate flips a byte
+    in that fraction of outgoing binary frames.
+
+    STIM commands carry one frequency/amplitude pair per stimulation electrode
+    ("STIM:F1:A1:F2:A2:..." or N float32 pairs in a binary frame). With
+    record_channels M > 1 every sample holds M values, one per recording
+    electrode, which pick up the stimulation electrodes through
+    electrode_coupling; they are sent as comma-separated lines or
+    channel-interleaved in the sample frames.
+    """
+    max_pending_bytes = 1 << 16
+
+    def __init__(self, sample_rate=1000.0, mode='stream', noise_std=0.05, seed=None,
+                 binary=True, frame_samples=32, baud_rate=None, corrupt_rate=0.0, record_channels=1):
+        if mode not in ('stream', 'reply'):
+            raise ValueError(f"Unknown emulator mode: {mode}")
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.noise_std = noise_std
+        self.rng = np.random.default_rng(seed)
+        self.binary = binary
+        self.record_channels = record_channels
+        # A frame holds at most MAX_SAMPLES values, all channels of a sample together
+        self.frame_samples = 1 if mode == 'reply' else min(frame_samples, protocol.MAX_SAMPLES // record_channels)
+        self._couplings = {}
+        self.baud_rate = baud_rate
+        self.corrupt_rate = corrupt_rate
+        self.protocol = 'ascii'
+        self._decoder = protocol.FrameDecoder()
+        self._pending_samples = []
+        self._seq = 0
+        self._byte_budget = 0.0
+        self._budget_time = time.monotonic()
+
+        self.master_fd, self.slave_fd = os.openpty()
+        # No echo or newline translation before the driver configures the port
+        tty.setraw(self.slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+        self._outbuf = b""
+
+        self.state = 0.0 if record_channels == 1 else np.zeros(record_channels)
+        self.commands_received = 0
+        self.samples_sent = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.bytes_dropped = 0
+
+        self._running = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pty-emulator", daemon=True)
+
+    def start(self):
+        self._running.set()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running.clear()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run(self):
+        buffer = b""
+        period = 1.0 / self.sample_rate
+        next_sample = time.monotonic()
+        while self._running.is_set():
+            timeout = max(0.0, next_sample - time.monotonic()) if self.mode == 'stream' else 0.05
+            readable, _, _ = select.select([self.master_fd], [], [], timeout)
+            if readable:
+                try:
+                    data = os.read(self.master_fd, 4096)
+                except BlockingIOError:
+                    data = b""
+                except OSError:
+                    break
+                self.bytes_received += len(data)
+                buffer = self._handle_input(buffer + data)
+
+            if self.mode == 'stream':
+                now = time.monotonic()
+                if now >= next_sample:
+                    # Catch up in one write if the thread was delayed
+                    count = int((now - next_sample) / period) + 1
+                    next_sample += count * period
+                    self._send_samples(count)
+
+    def _handle_input(self, buffer):
+        """
+        Consume complete commands from buffer and return the unconsumed tail.
+        """
+        while self.protocol == 'ascii':
+            line, sep, rest = buffer.partition(b"\n")
+            if not sep:
+                return buffer
+            buffer = rest
+            self._handle_command(line.strip())
+        # Everything after the negotiation ack is binary framed
+        for frame_type, _, payload in self._decoder.feed(buffer):
+            if frame_type == protocol.FRAME_STIM and payload and len(payload) % protocol.STIM_PAYLOAD.size == 0:
+                pairs = np.frombuffer(payload, dtype='<f4').reshape(-1, 2).astype(np.float64)
+                self._handle_stim(pairs[:, 0], pairs[:, 1])
+        return b""
+
+    def _handle_command(self, line):
+        if self.binary and line == protocol.PROTOCOL_REQUEST.strip():
+            self._write(protocol.PROTOCOL_ACK + b"\n", droppable=False)
+            self.protocol = 'binary'
+            return
+        # Protocol: "STIM:FREQ:AMP", with one FREQ:AMP pair per stimulation channel
+        parts = line.split(b":")
+        if len(parts) < 3 or len(parts) % 2 == 0 or parts[0] != b"STIM":
+            return
+        try:
+            pairs = np.array(parts[1:], dtype=float).reshape(-1, 2)
+        except ValueError:
+            return
+        self._handle_stim(pairs[:, 0], pairs[:, 1])
+
+    def _handle_stim(self, frequency, amplitude):
+        self.stimulate(frequency, amplitude)
+        if self.mode == 'reply':
+            self._send_samples(1)
+
+    def stimulate(self, frequency, amplitude):
+        """
+        Drive the substrate with scalars or one frequency/amplitude per stimulation channel.
+        """
+        self.commands_received += 1
+        target_response = np.sin(np.asarray(frequency, dtype=float) / 10.0) * amplitude
+        if target_response.size == 1 and self.record_channels == 1:
+            target_response = float(target_response.ravel()[0])
+        else:
+            target_response = self._coupling(target_response.size) @ target_response.ravel()
+        self.state = 0.9 * self.state + 0.1 * target_response
+
+    def _coupling(self, stim_channels):
+        # Commands may address any number of stimulation electrodes
+        if stim_channels not in self._couplings:
+            self._couplings[stim_channels] = electrode_coupling(stim_channels, self.record_channels)
+        return self._couplings[stim_channels]
+
+    def _sample(self, count):
+        if self.record_channels == 1:
+            return self.state + self.rng.normal(0, self.noise_std, count)
+        return self.state + self.rng.normal(0, self.noise_std, (count, self.record_channels))
+
+    def _send_samples(self, count):
+        values = self._sample(count)
+        self.samples_sent += count
+        if self.protocol == 'ascii':
+            if self.record_channels == 1:
+                self._write("".join(f"{value:.6f}\n" for value in values).encode())
+            else:
+                self._write("".join(",".join(f"{value:.6f}" for value in sample) + "\n" for sample in values).encode())
+            return
+        self._pending_samples.extend(values.tolist())
+        while len(self._pending_samples) >= self.frame_samples:
+            batch = self._pending_samples[:self.frame_samples]
+            del self._pending_samples[:self.frame_samples]
+            frame = protocol.encode_samples(self._seq, np.ravel(batch))
+            self._seq = (self._seq + 1) & 0xFFFF
+            if self.corrupt_rate and self.rng.random() < self.corrupt_rate:
+                frame = bytearray(frame)
+                frame[self.rng.integers(2, len(frame))] ^= 0xFF
+                frame = bytes(frame)
+            self._write(frame)
+
+    def _baud_allows(self, size):
+        # Token bucket refilled at baud_rate / 10 bytes per second (8N1 framing)
+        now = time.monotonic()
+        rate = self.baud_rate / 10.0
+        self._byte_budget = min(self._byte_budget + (now - self._budget_time) * rate, rate * 0.01 + size)
+        self._budget_time = now
+        if self._byte_budget < size:
+            return False
+        self._byte_budget -= size
+        return True
+
+    def _write(self, payload, droppable=True):
+        # Output the driver has not read yet stays queued, up to a bound; beyond
+        # that whole payloads are dropped, as a device with a full UART FIFO would.
+        # Control replies are never dropped.
+        if droppable and (len(self._outbuf) + len(payload) > self.max_pending_bytes or
+                          (self.baud_rate and not self._baud_allows(len(payload)))):
+            self.bytes_dropped += len(payload)
+        else:
+            self._outbuf += payload
+        try:
+            written = os.write(self.master_fd, self._outbuf)
+        except (BlockingIOError, OSError):
+            return
+        self.bytes_sent += written
+        self._outbuf = self._outbuf[written:]
@@ -0,0 +1,185 @@
+import logging
+import numpy as np
+from src.hardware.stimulator import StimulatorInterface
+from src.hardware.waveforms import WaveformSynthesizer
+
+# Mocking nidaqmx to allow code to exist without the heavy driver installed
+try:
+    import nidaqmx
+    import nidaqmx.constants
+    import nidaqmx.stream_readers
+    import nidaqmx.stream_writers
+except ImportError:
+    nidaqmx = None
+
+class NIDaqDriver(StimulatorInterface):
+    """
+    Driver for National Instruments DAQ devices (e.g., USB-600x series).
+    Requires 'nidaqmx' python package and NI drivers installed.
+
+    In the default 'on_demand' mode every step writes one DC level and reads one
+    sample. In 'streaming' mode both tasks run hardware-timed and continuous: each
+    action is synthesized into a step_duration-long PWM/FM/AM waveform that is
+    streamed to AO, and AI acquires continuously into the device's circular buffer,
+    which is drained in chunks. Writes block only while the output buffer is full,
+    which paces the RL loop to the hardware clock.
+
+    With several electrodes (hardware.electrodes), on-demand mode drives the
+    channel ranges ao0:C-1 and ai0:M-1 and read_response returns an (M,) array;
+    streaming is single-channel only.
+
+    daq_module replaces the nidaqmx package, e.g. with src.hardware.fake_nidaqmx.
+
+    Failed setup, writes and reads are logged and the step carries on; the last
+    error is kept in `error` and raised by check(), so a device pool masks the device.
+    """
+    def __init__(self, config, daq_module=None):
+        super().__init__(config)
+        hardware = config['hardware']
+        self.daq = daq_module if daq_module is not None else nidaqmx
+        self.device_name = hardware.get('ni_device_name', 'Dev1')
+        self.ao_channel = self._channel_range('ao', self.stim_channels)
+        self.ai_channel = self._channel_range('ai', self.record_channels)
+        self.sample_rate = hardware.get('sample_rate', 1000)
+        self.streaming = hardware.get('ni_mode', 'on_demand') == 'streaming'
+        if self.streaming and (self.stim_channels > 1 or self.record_channels > 1):
+            raise ValueError("NI streaming mode supports a single stimulation and recording channel")
+        self.io_timeout = hardware.get('timeout', 0.1)
+
+        # Streaming buffers are preallocated so steps never allocate
+        self.samples_per_step = max(1, int(round(self.sample_rate * hardware.get('step_duration', 0.05))))
+        self.ai_buffer_size = self.samples_per_step * hardware.get('ai_buffer_steps', 20)
+        self._ai_chunk = np.zeros(self.ai_buffer_size)
+        self.last_response = 0.0
+        self.error = None
+
+        if self.daq is None:
+            self.logger.warning("nidaqmx module not found. Running in fallback/mock mode.")
+            self.mock_mode = True
+        else:
+            self.mock_mode = False
+            self.task_ao = self.daq.Task()
+            self.task_ai = self.daq.Task()
+            self._setup_tasks()
+
+    def _channel_range(self, kind, count):
+        if count == 1:
+            return f"{self.device_name}/{kind}0"
+        return f"{self.device_name}/{kind}0:{count - 1}"
+
+    def _setup_tasks(self):
+        try:
+            self.task_ao.ao_channels.add_ao_voltage_chan(self.ao_channel)
+            self.task_ai.ai_channels.add_ai_voltage_chan(self.ai_channel)
+            if self.streaming:
+                self._setup_streaming()
+        except Exception as e:
+            self.error = e
+            self.logger.error(f"Failed to setup NI Tasks: {e}")
+            self.mock_mode = True
+
+    def _setup_streaming(self):
+        stimulation = self.config['stimulation']
+        self.synth = WaveformSynthesizer(
+            self.sample_rate,
+            self.samples_per_step,
+            modulation=stimulation.get('modulation', 'pwm'),
+            pulse_width=stimulation.get('pulse_width', 0.01),
+            carrier_frequency=stimulation.get('carrier_frequency'),
+        )
+        constants = self.daq.constants
+        continuous = constants.AcquisitionType.CONTINUOUS
+
+        # Room for two steps of output: one playing while the next is written
+        self.task_ao.timing.cfg_samp_clk_timing(
+            self.sample_rate, sample_mode=continuous, samps_per_chan=2 * self.samples_per_step)
+        self.task_ao.out_stream.regen_mode = constants.RegenerationMode.DONT_ALLOW_REGENERATION
+        self.task_ai.timing.cfg_samp_clk_timing(
+            self.sample_rate, sample_mode=continuous, samps_per_chan=self.ai_buffer_size)
+
+        self.writer = self.daq.stream_writers.AnalogSingleChannelWriter(self.task_ao.out_stream, auto_start=False)
+        self.reader = self.daq.stream_readers.AnalogSingleChannelReader(self.task_ai.in_stream)
+
+        # Prime the output with silence so the DAC has data before the first action
+        self.writer.write_many_sample(np.zeros(self.samples_per_step), timeout=self.io_timeout)
+        self.task_ai.start()
+        self.task_ao.start()
+        self.logger.info(f"Streaming at {self.sample_rate} S/s, {self.samples_per_step} samples per step")
+
+    def apply_stimulation(self, frequency, amplitude):
+        if self.mock_mode:
+            return
+
+        try:
+            if self.streaming:
+                profiler = self.profiler
+                if profiler is not None:
+                    t = profiler.now()
+                waveform = self.synth.synthesize(frequency, amplitude)
+                if profiler is not None:
+                    t = profiler.lap('ni.synthesize', t)
+                self.writer.write_many_sample(waveform, timeout=self.samples_per_step / self.sample_rate + self.io_timeout)
+                if profiler is not None:
+                    profiler.lap('ni.write', t)
+            else:
+                # On demand: just set a voltage level for this step (per channel)
+                self.task_ao.write(amplitude if self.stim_channels == 1 else np.ravel(amplitude).tolist())
+        except Exception as e:
+            self.error = e
+            self.logger.error(f"NI Write Error: {e}")
+
+    def read_response(self):
+        if self.mock_mode:
+            if self.record_channels > 1:
+                return np.random.random(self.record_channels)
+            return np.random.random()
+
+        if self.streaming:
+            # Mean of everything acquired since the previous step
+            samples = self.read_samples()
+            if len(samples):
+                self.last_response = float(samples.mean())
+            return self.last_response
+
+        try:
+            if self.record_channels > 1:
+                return np.asarray(self.task_ai.read())
+            return self.task_ai.read()
+        except Exception as e:
+            self.error = e
+            self.logger.error(f"NI Read Error: {e}")
+            return 0.0 if self.record_channels == 1 else np.zeros(self.record_channels)
+
+    def read_samples(self):
+        """
+        Drain the AI samples acquired since the last read (streaming mode only).
+        Returns a view of an internal buffer that the next read overwrites; if
+        more than ai_buffer_size samples are waiting, only the newest are kept.
+        """
+        count = 0
+        try:
+            available = self.task_ai.in_stream.avail_samp_per_chan
+            # The reader wants an array of exactly the requested length; the oldest
+            # samples that do not fit are read into the buffer and discarded
+            while available > self.ai_buffer_size:
+                skip = min(available - self.ai_buffer_size, self.ai_buffer_size)
+                self.reader.read_many_sample(self._ai_chunk[:skip], number_of_samples_per_channel=skip, timeout=0.0)
+                available -= skip
+            if available > 0:
+                self.reader.read_many_sample(self._ai_chunk[:available], number_of_samples_per_channel=available,
+                                             timeout=0.0)
+                count = available
+        except Exception as e:
+            self.error = e
+            self.logger.error(f"NI Read Error: {e}")
+            count = 0
+        return self._ai_chunk[:count]
+
+    def check(self):
+        if self.error is not None:
+            raise ConnectionError(f"NI DAQ {self.device_name} failed: {self.error}")
+
+    def close(self):
+        if not self.mock_mode:
+            self.task_ao.close()
+            self.task_ai.close()
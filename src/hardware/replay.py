@@ -0,0 +1,41 @@
+import numpy as np
+from src.hardware.stimulator import StimulatorInterface
+from src.utils.replay import ReplayLog
+
+class ReplayStimulator(StimulatorInterface):
+    """
+    Serves responses recorded by ExperimentLogger instead of stimulating a
+    substrate, so rewards and policies can be iterated on at disk speed.
+    Each apply_stimulation picks a logged step from the same (frequency,
+    amplitude) bin, or the nearest non-empty bin, and read_response returns the
+    response recorded at that step. replay.sample chooses that step at random
+    ('random') or cycles through the bin in recording order ('sequential').
+    """
+    def __init__(self, config, log=None):
+        super().__init__(config)
+        if self.stim_channels != 1 or self.record_channels != 1:
+            raise ValueError("Replay supports single-channel experiment logs only")
+        replay = config['replay']
+        self.log = log if log is not None else ReplayLog.from_config(config)
+        if not len(self.log):
+            raise ValueError("Cannot replay an empty experiment log")
+        self.sequential = replay.get('sample', 'random') == 'sequential'
+        self.rng = np.random.default_rng(replay.get('seed', config['experiment'].get('seed')))
+        self._cursors = np.zeros(self.log.frequency_bins * self.log.amplitude_bins, dtype=np.int64)
+        self.last_row = None
+        self.last_response = 0.0
+        self.logger.info("Initialized Replay Stimulator")
+
+    def apply_stimulation(self, frequency, amplitude):
+        bin_index = self.log.bin_of(float(frequency), float(amplitude))
+        rows = self.log.rows_in_bin(bin_index, nearest=True)
+        if self.sequential:
+            pick = self._cursors[bin_index] % len(rows)
+            self._cursors[bin_index] += 1
+        else:
+            pick = int(self.rng.random() * len(rows))
+        self.last_row = int(rows[pick])
+        self.last_response = float(self.log.value('response', self.last_row))
+
+    def read_response(self):
+        return self.last_response
@@ -0,0 +1,133 @@
+import collections
+import logging
+import threading
+import time
+import numpy as np
+from src.hardware.protocol import LineDecoder
+
+class SampleQueue:
+    """
+    Timestamped queue of response samples shared between one producer (the port
+    reader thread) and one consumer (the RL loop).
+    Built on collections.deque, whose append/popleft are atomic in CPython, so
+    neither side ever takes a lock. When the consumer falls behind, the oldest
+    samples are dropped once maxlen is reached.
+    """
+    def __init__(self, maxlen=100000):
+        self._samples = collections.deque(maxlen=maxlen)
+        self.pushed = 0
+        self.popped = 0
+
+    def push(self, timestamp, value):
+        self._samples.append((timestamp, value))
+        self.pushed += 1
+
+    def latest(self):
+        """
+        Freshest (timestamp, value) pair without consuming anything, or None.
+        """
+        try:
+            return self._samples[-1]
+        except IndexError:
+            return None
+
+    def drain(self):
+        """
+        Remove and return every queued sample as (timestamps, values) arrays.
+        """
+        samples = []
+        popleft = self._samples.popleft
+        try:
+            for _ in range(len(self._samples)):
+                samples.append(popleft())
+        except IndexError:
+            pass
+        self.popped += len(samples)
+        if not samples:
+            return np.empty(0), np.empty(0)
+        timestamps, values = zip(*samples)
+        return np.asarray(timestamps), np.asarray(values)
+
+    @property
+    def dropped(self):
+        return self.pushed - self.popped - len(self._samples)
+
+    def __len__(self):
+        return len(self._samples)
+
+class SerialIOEngine:
+    """
+    Background I/O for a serial link so the RL loop never blocks on the port.
+    A reader thread continuously drains the port, decodes response samples (ASCII
+    lines by default, or binary frames with a BinarySampleDecoder) and pushes them
+    to a SampleQueue stamped with their arrival time.monotonic(). A writer thread
+    sends commands; if several are queued before the port is free, only the most
+    recent one is written because older stimulation settings are already stale.
+    """
+    def __init__(self, ser, decoder=None, queue_size=100000):
+        self.ser = ser
+        self.decoder = decoder if decoder is not None else LineDecoder()
+        self.samples = SampleQueue(maxlen=queue_size)
+        self.logger = logging.getLogger(__name__)
+        self.commands_written = 0
+        self.commands_dropped = 0
+        # Last I/O exception; a failed reader stops for good
+        self.error = None
+
+        self._pending = None
+        self._pending_event = threading.Event()
+        self._running = threading.Event()
+        self._reader = threading.Thread(target=self._read_loop, name="serial-reader", daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name="serial-writer", daemon=True)
+
+    def start(self):
+        self._running.set()
+        self._reader.start()
+        self._writer.start()
+        return self
+
+    def stop(self):
+        self._running.clear()
+        self._pending_event.set()
+        for thread in (self._reader, self._writer):
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+
+    def send(self, data):
+        """
+        Queue raw bytes for the writer thread and return immediately.
+        """
+        if self._pending is not None:
+            self.commands_dropped += 1
+        self._pending = data
+        self._pending_event.set()
+
+    def _write_loop(self):
+        while self._running.is_set():
+            self._pending_event.wait()
+            self._pending_event.clear()
+            data, self._pending = self._pending, None
+            if data is None:
+                continue
+            try:
+                self.ser.write(data)
+                self.commands_written += 1
+            except Exception as e:
+                self.error = e
+                self.logger.error(f"Serial write failed: {e}")
+
+    def _read_loop(self):
+        while self._running.is_set():
+            try:
+                # Blocks for at most the port timeout when nothing is waiting
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
+            except Exception as e:
+                if self._running.is_set():
+                    self.error = e
+                    self.logger.error(f"Serial read failed: {e}")
+                break
+            if not chunk:
+                continue
+            timestamp = time.monotonic()
+            for value in self.decoder.feed(chunk):
+                self.samples.push(timestamp, value)
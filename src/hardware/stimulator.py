@@ -2,11 +2,61 @@ import time
 import numpy as np
 import serial
 import logging
+from src.hardware import protocol
+from src.hardware.serial_io import SerialIOEngine
+from src.utils.profiling import get_profiler
+
+def channel_counts(config):
+    """
+    Number of stimulation (C) and recording (M) electrodes from hardware.electrodes.
+    """
+    electrodes = config['hardware'].get('electrodes') or {}
+    return electrodes.get('stim_channels', 1), electrodes.get('record_channels', 1)
+
+def electrode_coupling(stim_channels, record_channels, radius=1.5, length=1.0):
+    """
+    Sparse (record_channels, stim_channels) matrix of how strongly each stimulation
+    electrode drives each recording electrode. Each kind of electrode is laid out
+    row-major on its own square grid spanning the same area, and distances are
+    measured in stimulation grid spacings. Coupling decays as exp(-d^2 / 2 length^2)
+    and is cut off beyond radius, so each row only has a few non-zeros and large
+    grids stay cheap. Rows are normalized to sum to 1.
+    """
+    from scipy import sparse
+    from scipy.spatial import cKDTree
+
+    def grid(count, scale):
+        side = int(np.ceil(np.sqrt(count)))
+        index = np.arange(count)
+        span = max(side - 1, 1)
+        return np.column_stack([index // side, index % side]) * (scale / span)
+
+    stim_side = int(np.ceil(np.sqrt(stim_channels)))
+    extent = max(stim_side - 1, 1)
+    stim = grid(stim_channels, extent)
+    record = grid(record_channels, extent)
+    distances = cKDTree(record).sparse_distance_matrix(cKDTree(stim), radius, output_type='coo_matrix')
+    coupling = sparse.csr_matrix(
+        (np.exp(-distances.data ** 2 / (2 * length ** 2)), (distances.row, distances.col)),
+        shape=(record_channels, stim_channels))
+    row_sums = np.asarray(coupling.sum(axis=1)).ravel()
+    row_sums[row_sums == 0] = 1.0
+    return sparse.diags(1.0 / row_sums) @ coupling
 
 class StimulatorInterface:
+    """
+    Base class for stimulation drivers.
+    With C stimulation and M recording electrodes (hardware.electrodes),
+    apply_stimulation takes frequency/amplitude arrays of shape (C,) and
+    read_response returns an array of shape (M,); with one of each they are
+    plain scalars as before.
+    """
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.stim_channels, self.record_channels = channel_counts(config)
+        # Drivers time their own sub-phases (encode vs. write) when profiling is on
+        self.profiler = get_profiler()
 
     def apply_stimulation(self, frequency, amplitude):
         raise NotImplementedError
@@ -14,6 +64,12 @@ class StimulatorInterface:
     def read_response(self):
         raise NotImplementedError
 
+    def check(self):
+        """
+        Raise if the device is known to have failed. Drivers that cannot tell
+        do nothing.
+        """
+
     def close(self):
         pass
 
@@ -29,17 +85,66 @@ class SerialStimulator(StimulatorInterface):
             self.logger.error(f"Failed to connect to hardware: {e}")
             raise
 
+        # 'auto' asks the firmware for the binary protocol and falls back to ASCII
+        requested = config['hardware'].get('protocol', 'ascii')
+        if requested not in ('ascii', 'binary', 'auto'):
+            raise ValueError(f"Unknown serial protocol: {requested}")
+        self.protocol = 'ascii'
+        if requested != 'ascii':
+            self.protocol = protocol.negotiate(self.ser)
+            if requested == 'binary' and self.protocol != 'binary':
+                raise RuntimeError(f"Device on {self.port} did not accept the binary protocol")
+        self.logger.info(f"Using {self.protocol} protocol")
+        self.seq = 0
+        if self.protocol == 'binary' and self.stim_channels > protocol.MAX_STIM_CHANNELS:
+            # Longer STIM frames would be dropped by the firmware's decoder
+            raise ValueError(f"The binary protocol carries at most {protocol.MAX_STIM_CHANNELS} stimulation "
+                             f"channels, got {self.stim_channels}")
+        if self.protocol == 'binary':
+            self.decoder = protocol.BinarySampleDecoder(channels=self.record_channels)
+        else:
+            self.decoder = protocol.LineDecoder(channels=self.record_channels)
+
+        # With async_io, a background engine owns the port so steps never block
+        self.io = None
+        self.last_response = 0.0 if self.record_channels == 1 else np.zeros(self.record_channels)
+        if config['hardware'].get('async_io', False):
+            self.io = SerialIOEngine(self.ser, decoder=self.decoder).start()
+            self.logger.info("Started background serial I/O")
+
     def apply_stimulation(self, frequency, amplitude):
-        # Safety checks
-        max_v = self.config['hardware']['safety_limits']['max_voltage']
-        amplitude = min(amplitude, max_v)
-        
-        # Protocol: "STIM:FREQ:AMP\n"
-        command = f"STIM:{frequency:.2f}:{amplitude:.2f}\n"
-        self.ser.write(command.encode())
+        # Amplitudes arrive already clamped by SafetyMonitor.enforce
+        profiler = self.profiler
+        if profiler is not None:
+            t = profiler.now()
+        if self.protocol == 'binary':
+            command = protocol.encode_stim(self.seq, frequency, amplitude)
+            self.seq = (self.seq + 1) & 0xFFFF
+        else:
+            # Protocol: "STIM:FREQ:AMP\n", with one FREQ:AMP pair per stimulation channel
+            pairs = ":".join(f"{f:.2f}:{a:.2f}" for f, a in zip(np.ravel(frequency), np.ravel(amplitude)))
+            command = f"STIM:{pairs}\n".encode()
+        if profiler is not None:
+            t = profiler.lap('serial.encode', t)
+        if self.io is not None:
+            self.io.send(command)
+        else:
+            self.ser.write(command)
+        if profiler is not None:
+            profiler.lap('serial.write', t)
 
     def read_response(self):
         # Expecting a float value representing voltage/resistance response
+        if self.io is not None:
+            # Freshest sample since the last step; hold the last value if none arrived
+            self.read_samples()
+            return self.last_response
+        if self.protocol == 'binary' or self.record_channels > 1:
+            if self.ser.in_waiting:
+                values = self.decoder.feed(self.ser.read(self.ser.in_waiting))
+                if values:
+                    self.last_response = values[-1]
+            return self.last_response
         if self.ser.in_waiting:
             try:
                 line = self.ser.readline().decode().strip()
@@ -48,24 +153,152 @@ class SerialStimulator(StimulatorInterface):
                 return 0.0
         return 0.0
 
+    def read_samples(self):
+        """
+        Return (timestamps, values) of every sample received since the last read,
+        values having shape (n,) or (n, M) with several recording channels.
+        Only available with async_io enabled; never blocks.
+        """
+        if self.io is None:
+            raise RuntimeError("read_samples requires hardware.async_io to be enabled")
+        timestamps, values = self.io.samples.drain()
+        if len(values):
+            self.last_response = values[-1] if values.ndim > 1 else float(values[-1])
+        return timestamps, values
+
+    def check(self):
+        # With async_io, I/O errors end up on the engine's threads, not in step()
+        if self.io is not None and self.io.error is not None:
+            raise ConnectionError(f"Serial I/O on {self.port} failed: {self.io.error}")
+
     def close(self):
+        if self.io is not None:
+            self.io.stop()
         if self.ser and self.ser.is_open:
             self.ser.close()
 
+def make_coupling(config, stim_channels, record_channels):
+    """
+    Electrode coupling for the simulated substrates, or None for a single channel.
+    """
+    if stim_channels == 1 and record_channels == 1:
+        return None
+    electrodes = config['hardware'].get('electrodes') or {}
+    return electrode_coupling(
+        stim_channels, record_channels,
+        radius=electrodes.get('coupling_radius', 1.5),
+        length=electrodes.get('coupling_length', 1.0))
+
 class MockStimulator(StimulatorInterface):
     def __init__(self, config):
         super().__init__(config)
-        self.state = 0.0
+        # Each recording electrode picks up nearby stimulation electrodes
+        self.coupling = make_coupling(config, self.stim_channels, self.record_channels)
+        self.state = 0.0 if self.coupling is None else np.zeros(self.record_channels)
         self.logger.info("Initialized Mock Stimulator")
 
     def apply_stimulation(self, frequency, amplitude):
         # Simulate a response function: 
         # The "organism" reacts to frequency changes with a delay and noise
         target_response = np.sin(frequency / 10.0) * amplitude
+        if self.coupling is not None:
+            target_response = self.coupling @ target_response
         # Simple low-pass filter to simulate biological inertia
         self.state = 0.9 * self.state + 0.1 * target_response
 
     def read_response(self):
         # Return state plus some biological noise
+        if self.coupling is not None:
+            return self.state + np.random.normal(0, 0.05, self.record_channels)
         noise = np.random.normal(0, 0.05)
         return self.state + noise
+
+
+class BlockNoise:
+    """
+    Gaussian noise for N independent envs, pre-drawn per env in blocks so that
+    drawing a step's noise is a single slice. Every env draws from its own seeded
+    generator, so a given env is reproducible regardless of how many run beside it.
+    """
+    def __init__(self, num_envs, std, sample_shape=(), block=1024, seed=None):
+        self.num_envs = num_envs
+        self.std = std
+        self.block = block
+        self._noise = np.empty((num_envs, block) + tuple(sample_shape))
+        self._pos = 0
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        """
+        Derive one independent noise stream per env from a base seed.
+        """
+        children = np.random.SeedSequence(seed).spawn(self.num_envs)
+        self._rngs = [np.random.default_rng(child) for child in children]
+        self._refill()
+
+    def seed_env(self, index, seed):
+        """
+        Reseed a single env's noise stream, e.g. on a seeded env reset.
+        """
+        self._rngs[index] = np.random.default_rng(seed)
+        remaining = (self.block - self._pos,) + self._noise.shape[2:]
+        self._noise[index, self._pos:] = self._rngs[index].normal(0, self.std, remaining)
+
+    def _refill(self):
+        for i, rng in enumerate(self._rngs):
+            self._noise[i] = rng.normal(0, self.std, self._noise.shape[1:])
+        self._pos = 0
+
+    def next(self):
+        """
+        This step's noise, shaped (num_envs, *sample_shape); a view into the block.
+        """
+        if self._pos == self.block:
+            self._refill()
+        noise = self._noise[:, self._pos]
+        self._pos += 1
+        return noise
+
+class BatchMockStimulator(StimulatorInterface):
+    """
+    Vectorized MockStimulator that simulates N independent substrates at once.
+    frequency/amplitude are arrays of shape (num_envs,), or (num_envs, C) with
+    several stimulation electrodes, and read_response returns one sample per
+    substrate, shaped (num_envs,) or (num_envs, M). Every substrate draws its noise from its own seeded
+    generator, so a given env is reproducible regardless of how many run beside it.
+    """
+    # Noise is pre-drawn per env in blocks so a step stays a single array operation
+    noise_block = 1024
+    noise_std = 0.05
+
+    def __init__(self, config, num_envs, seed=None):
+        super().__init__(config)
+        self.num_envs = num_envs
+        self.coupling = make_coupling(config, self.stim_channels, self.record_channels)
+        self.sample_shape = () if self.coupling is None else (self.record_channels,)
+        self.state = np.zeros((num_envs,) + self.sample_shape)
+        self.noise = BlockNoise(num_envs, self.noise_std, self.sample_shape, self.noise_block, seed)
+        self.logger.info(f"Initialized Batch Mock Stimulator with {num_envs} substrates")
+
+    def seed(self, seed=None):
+        """
+        Derive one independent noise stream per substrate from a base seed.
+        """
+        self.noise.seed(seed)
+
+    def seed_env(self, index, seed):
+        """
+        Reseed a single substrate's noise stream, e.g. on a seeded env reset.
+        """
+        self.noise.seed_env(index, seed)
+
+    def apply_stimulation(self, frequency, amplitude):
+        target_response = np.sin(frequency / 10.0) * amplitude
+        if self.coupling is not None:
+            # (N, C) @ (C, M) with a sparse coupling matrix
+            target_response = target_response @ self.coupling.T
+        self.state *= 0.9
+        self.state += 0.1 * target_response
+
+    def read_response(self):
+        return self.state + self.noise.next()
@@ -0,0 +1,42 @@
+import numpy as np
+from src.hardware.stimulator import BlockNoise, StimulatorInterface
+from src.model.surrogate import SurrogateModel
+
+class SurrogateStimulator(StimulatorInterface):
+    """
+    Simulated substrate driven by a SurrogateModel fitted to experiment logs
+    (scripts/fit_surrogate.py), as a drop-in replacement for MockStimulator.
+    With num_envs set it steps that many independent substrates at once and
+    takes/returns (num_envs,) arrays like BatchMockStimulator; otherwise it takes
+    and returns scalars.
+    """
+    def __init__(self, config, num_envs=None, seed=None, model=None):
+        super().__init__(config)
+        if self.stim_channels != 1 or self.record_channels != 1:
+            raise ValueError("The surrogate substrate model is single-channel")
+        self.model = model if model is not None else SurrogateModel.load(config['surrogate']['model_path'])
+        self.num_envs = num_envs
+        batch = 1 if num_envs is None else num_envs
+        if seed is None:
+            seed = config['experiment'].get('seed')
+        self.noise = BlockNoise(batch, self.model.noise_std, seed=seed)
+        self.state = self.model.initial_state(batch)
+        self.response = np.zeros(batch)
+        self.logger.info(f"Initialized Surrogate Stimulator with {batch} substrates "
+                         f"(validation {self.model.validation})")
+
+    def seed(self, seed=None):
+        self.noise.seed(seed)
+
+    def seed_env(self, index, seed):
+        self.noise.seed_env(index, seed)
+
+    def apply_stimulation(self, frequency, amplitude):
+        if self.num_envs is None:
+            frequency, amplitude = np.full(1, frequency), np.full(1, amplitude)
+        self.response = self.model.step(self.state, frequency, amplitude, self.noise.next())
+
+    def read_response(self):
+        if self.num_envs is None:
+            return float(self.response[0])
+        return self.response
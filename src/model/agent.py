@@ -1,7 +1,72 @@
 from stable_baselines3 import PPO, SAC
-from stable_baselines3.common.callbacks import CheckpointCallback
+from stable_baselines3.common.callbacks import BaseCallback, CallbackList, CheckpointCallback
+from src.model.checkpoint import AsyncCheckpointCallback, save_model_atomic
+from src.model.inference import export_policy, measure_latency, verify_policy
+from src.utils.profiling import get_profiler
+import logging
+import numpy as np
 import os
 
+class ProfilingCallback(BaseCallback):
+    """
+    Times the learning loop into a Profiler: every vectorized step
+    (agent.step), each rollout collection (agent.rollout), each gradient
+    update between rollouts (agent.update), each policy call (agent.policy)
+    and each checkpoint save (agent.checkpoint). The policy and checkpoint
+    hooks are removed again when training ends.
+    """
+    def __init__(self, profiler, checkpoint=None, verbose=0):
+        super().__init__(verbose)
+        self.profiler = profiler
+        self.checkpoint = checkpoint
+        self._step_start = None
+        self._rollout_start = None
+        self._update_start = None
+
+    def _on_training_start(self):
+        policy = self.model.policy
+        for name in ('forward', 'predict'):
+            setattr(policy, name, self.profiler.timed('agent.policy', getattr(policy, name)))
+        if self.checkpoint is not None:
+            checkpoint, on_step = self.checkpoint, self.checkpoint._on_step
+            profiler = self.profiler
+
+            def timed_on_step():
+                # Only the steps that save are worth a sample
+                if checkpoint.n_calls % checkpoint.save_freq:
+                    return on_step()
+                start = profiler.now()
+                try:
+                    return on_step()
+                finally:
+                    profiler.lap('agent.checkpoint', start)
+            checkpoint._on_step = timed_on_step
+
+    def _on_rollout_start(self):
+        now = self.profiler.now()
+        if self._update_start is not None:
+            self.profiler.record('agent.update', now - self._update_start)
+            self._update_start = None
+        self._rollout_start = self._step_start = now
+
+    def _on_step(self):
+        self._step_start = self.profiler.lap('agent.step', self._step_start)
+        return True
+
+    def _on_rollout_end(self):
+        self._update_start = self.profiler.lap('agent.rollout', self._rollout_start)
+
+    def _on_training_end(self):
+        if self._update_start is not None:
+            self.profiler.lap('agent.update', self._update_start)
+            self._update_start = None
+        policy = self.model.policy
+        for name in ('forward', 'predict'):
+            if name in policy.__dict__:
+                delattr(policy, name)
+        if self.checkpoint is not None and '_on_step' in self.checkpoint.__dict__:
+            del self.checkpoint._on_step
+
 class RLAgent:
     def __init__(self, env, config):
         self.env = env
@@ -17,7 +82,9 @@ class RLAgent:
                 verbose=1,
                 learning_rate=self.config['rl_agent']['learning_rate'],
                 gamma=self.config['rl_agent']['gamma'],
-                batch_size=self.config['rl_agent']['batch_size']
+                batch_size=self.config['rl_agent']['batch_size'],
+                n_steps=self.config['rl_agent'].get('n_steps', 2048),
+                seed=self.config['experiment'].get('seed')
             )
         elif self.model_type == "SAC":
             return SAC(
@@ -26,7 +93,8 @@ class RLAgent:
                 verbose=1,
                 learning_rate=self.config['rl_agent']['learning_rate'],
                 gamma=self.config['rl_agent']['gamma'],
-                batch_size=self.config['rl_agent']['batch_size']
+                batch_size=self.config['rl_agent']['batch_size'],
+                seed=self.config['experiment'].get('seed')
             )
         else:
             raise ValueError(f"Unknown algorithm: {self.model_type}")
@@ -34,17 +102,54 @@ class RLAgent:
     def train(self):
         total_timesteps = self.config['experiment']['max_steps'] * self.config['rl_agent']['n_epochs']
         
-        # Save checkpoints
-        checkpoint_callback = CheckpointCallback(
-            save_freq=self.config['experiment']['save_interval'],
-            save_path='./logs/',
-            name_prefix='rl_model'
-        )
+        # Save checkpoints; the callback counts vectorized steps, each worth num_envs env steps
+        save_freq = max(self.config['experiment']['save_interval'] // self.model.n_envs, 1)
+        if self.config['experiment'].get('checkpoint_async', True):
+            # Written on a background thread, so the control loop does not stall on disk I/O
+            checkpoint_callback = AsyncCheckpointCallback(
+                save_freq=save_freq,
+                save_path='./logs/',
+                name_prefix=self.config['experiment']['name'],
+                keep=self.config['experiment'].get('keep_checkpoints', 5)
+            )
+        else:
+            checkpoint_callback = CheckpointCallback(
+                save_freq=save_freq,
+                save_path='./logs/',
+                name_prefix=self.config['experiment']['name']
+            )
+        callback = checkpoint_callback
+        profiler = get_profiler()
+        if profiler is not None:
+            callback = CallbackList([checkpoint_callback, ProfilingCallback(profiler, checkpoint_callback)])
 
-        self.model.learn(total_timesteps=total_timesteps, callback=checkpoint_callback)
+        try:
+            self.model.learn(total_timesteps=total_timesteps, callback=callback)
+        finally:
+            if isinstance(checkpoint_callback, AsyncCheckpointCallback):
+                # Also on interruption, where SB3 skips the training-end hooks
+                checkpoint_callback.close()
 
     def save(self, path):
-        self.model.save(path)
+        # Atomic, so an interrupted save never leaves a truncated model behind
+        return save_model_atomic(self.model, path)
+
+    def export(self, path=None, backend="numpy", n_verify=256):
+        """
+        Export the trained actor as a lean inference object with an act(obs)
+        call (see src.model.inference), after checking that it matches
+        model.predict on observations sampled from the observation space.
+        """
+        policy = export_policy(self.model, backend, path)
+        space = self.model.observation_space
+        space.seed(self.config['experiment'].get('seed'))
+        observations = np.stack([space.sample() for _ in range(n_verify)])
+        difference = verify_policy(policy, self.model, observations)
+        latency = measure_latency(policy.act, observations[0])
+        logging.getLogger(__name__).info(
+            f"Exported {backend} policy: act() p50 {latency['p50']:.1f}us, p99 {latency['p99']:.1f}us, "
+            f"max deviation from model.predict {difference:.2g}")
+        return policy
 
     def load(self, path):
         if self.model_type == "PPO":
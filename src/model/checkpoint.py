@@ -0,0 +1,165 @@
+import copy
+import logging
+import os
+import threading
+from stable_baselines3.common.callbacks import CheckpointCallback
+from stable_baselines3.common.save_util import recursive_getattr, save_to_zip_file
+
+logger = logging.getLogger(__name__)
+
+def _clone(value):
+    """
+    A copy of a state dict (or nested dicts/lists of tensors) that training can no longer change.
+    """
+    if hasattr(value, 'detach'):
+        return value.detach().clone()
+    if isinstance(value, dict):
+        return type(value)((key, _clone(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return type(value)(_clone(item) for item in value)
+    return copy.deepcopy(value)
+
+def snapshot_model(model):
+    """
+    In-memory copy of everything model.save() writes, as (data, params,
+    pytorch_variables) for save_to_zip_file. Only tensors and small Python
+    attributes are copied; serializing and compressing them is left to
+    whoever writes the snapshot, so this is the only part that has to run on
+    the training thread.
+    """
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    for name in state_dicts_names + torch_variable_names:
+        exclude.add(name.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+    data = copy.deepcopy(data)
+    pytorch_variables = {name: _clone(recursive_getattr(model, name)) for name in torch_variable_names}
+    params = {name: _clone(state_dict) for name, state_dict in model.get_parameters().items()}
+    return data, params, pytorch_variables
+
+def write_atomic(path, data, params, pytorch_variables):
+    """
+    Write a snapshot as an SB3 zip (loadable with PPO.load / SAC.load). It is
+    written next to path and renamed over it, so readers never see a partial file.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        save_to_zip_file(f, data=data, params=params, pytorch_variables=pytorch_variables)
+    os.replace(tmp_path, path)
+
+def save_model_atomic(model, path):
+    """
+    model.save(path), atomically: an interrupted save leaves the previous file intact.
+    """
+    if not path.endswith('.zip'):
+        path += '.zip'
+    write_atomic(path, *snapshot_model(model))
+    return path
+
+class AsyncCheckpointCallback(CheckpointCallback):
+    """
+    CheckpointCallback that does not stall the training loop on disk I/O.
+
+    Every save_freq calls the model is snapshotted in memory (state dicts are
+    cloned, which takes about as long as copying the weights) and a
+    background thread serializes and writes the zip. If the writer is still
+    busy when the next checkpoint is due, the newer snapshot replaces the
+    waiting one (counted in `dropped`), so training never waits on it. Only
+    the newest `keep` checkpoint files this callback wrote are kept (None
+    keeps all); files already in save_path are left alone. Pending
+    checkpoints are written before training ends.
+    """
+    def __init__(self, save_freq, save_path, name_prefix="rl_model", keep=5, verbose=0):
+        super().__init__(save_freq, save_path, name_prefix, verbose=verbose)
+        self.keep = keep
+        self.saved = []
+        self.dropped = 0
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def _init_callback(self):
+        super()._init_callback()
+        if self._thread is None:
+            self._closed = False
+            self._thread = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+            self._thread.start()
+
+    def _on_step(self):
+        if self.n_calls % self.save_freq == 0:
+            path = self._checkpoint_path(extension="zip")
+            snapshot = snapshot_model(self.model)
+            with self._condition:
+                if self._pending is not None:
+                    # Expected with many envs per step; the newest snapshot is the one worth writing
+                    self.dropped += 1
+                    logger.debug(f"Checkpoint writer is behind, replacing {self._pending[0]}")
+                self._pending = (path, snapshot)
+                self._condition.notify()
+        return True
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                path, snapshot = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                write_atomic(path, *snapshot)
+                self._rotate(path)
+                if self.verbose >= 2:
+                    print(f"Saving model checkpoint to {path}")
+            except Exception:
+                logger.exception(f"Could not write checkpoint {path}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _rotate(self, path):
+        if path in self.saved:
+            # Written again, by a later learn() that restarted the step count
+            self.saved.remove(path)
+        self.saved.append(path)
+        if self.keep is None:
+            return
+        while len(self.saved) > self.keep:
+            old = self.saved.pop(0)
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+    def flush(self):
+        """
+        Block until every pending checkpoint has been written.
+        """
+        with self._condition:
+            while self._pending is not None or self._busy:
+                self._condition.wait()
+
+    def close(self):
+        """
+        Write pending checkpoints and stop the writer thread.
+        """
+        if self._thread is None:
+            return
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def _on_training_end(self):
+        self.close()
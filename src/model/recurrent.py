@@ -0,0 +1,189 @@
+import logging
+import os
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.distributions import Normal
+from stable_baselines3.common.vec_env import DummyVecEnv, VecEnv
+from src.model.inference import export_recurrent_policy, measure_latency
+from src.model.lstm_policy import LSTMExtractor, RecurrentActor, truncated_bptt
+
+class RecurrentActorCritic(nn.Module):
+    """
+    LSTMExtractor in its recurrent mode with a Gaussian actor head (mean and a
+    learned, state-independent log std per action dimension) and a value head.
+    """
+    def __init__(self, observation_space, action_space, features_dim=64, hidden_dim=64, num_layers=1):
+        super().__init__()
+        self.extractor = LSTMExtractor(observation_space, features_dim, hidden_dim, num_layers)
+        action_dim = int(np.prod(action_space.shape))
+        self.actor = nn.Sequential(nn.Tanh(), nn.Linear(features_dim, action_dim))
+        self.critic = nn.Sequential(nn.Tanh(), nn.Linear(features_dim, 1))
+        self.log_std = nn.Parameter(torch.zeros(action_dim))
+
+    def distribution(self, features):
+        return Normal(self.actor(features), self.log_std.exp())
+
+    def value(self, features):
+        return self.critic(features).squeeze(-1)
+
+def gae(rewards, values, next_starts, gamma, gae_lambda):
+    """
+    Generalized advantage estimates of a [num_envs, steps] rollout. values has
+    one more step (the bootstrap value after the rollout) and next_starts[:, t]
+    flags an episode that ended with step t. Returns (advantages, returns).
+    """
+    advantages = torch.zeros_like(rewards)
+    last = torch.zeros_like(rewards[:, 0])
+    for t in reversed(range(rewards.shape[1])):
+        nonterminal = 1.0 - next_starts[:, t]
+        delta = rewards[:, t] + gamma * values[:, t + 1] * nonterminal - values[:, t]
+        last = delta + gamma * gae_lambda * nonterminal * last
+        advantages[:, t] = last
+    return advantages, advantages + values[:, :-1]
+
+class RecurrentAgent:
+    """
+    Advantage actor-critic on LSTMExtractor's recurrent mode, selected with
+    rl_agent.recurrent.enabled. Acting feeds the LSTM one sample per step
+    through RecurrentActor, carrying its state instead of re-scanning the
+    observation window; every rollout_steps steps the rollout is trained with
+    truncated_bptt from the state it started in. Episode ends, including time
+    limits, are treated as terminal. Same train()/save()/export() as RLAgent.
+    """
+    def __init__(self, env, config):
+        if not isinstance(env, VecEnv):
+            env = DummyVecEnv([lambda: env])
+        self.env = env
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        agent = config['rl_agent']
+        section = agent.get('recurrent') or {}
+        self.gamma = agent['gamma']
+        self.rollout_steps = section.get('rollout_steps', 128)
+        self.bptt = section.get('bptt', 32)
+        self.gae_lambda = section.get('gae_lambda', 0.95)
+        self.value_coef = section.get('value_coef', 0.5)
+        self.entropy_coef = section.get('entropy_coef', 0.0)
+
+        seed = config['experiment'].get('seed')
+        if seed is not None:
+            torch.manual_seed(seed)
+        self.rng = np.random.default_rng(seed)
+        self.policy = RecurrentActorCritic(env.observation_space, env.action_space,
+                                           section.get('features_dim', 64), section.get('hidden_dim', 64),
+                                           section.get('num_layers', 1))
+        self.actor = RecurrentActor(self.policy.extractor, self.policy.actor, env.num_envs)
+        self.optimizer = torch.optim.Adam(self.policy.parameters(), lr=agent['learning_rate'])
+        self.num_timesteps = 0
+
+    def _collect(self, obs, episode_starts):
+        """
+        Step every env rollout_steps times. Returns the rollout tensors, the state
+        it started from, and the observation and episode starts to continue with.
+        """
+        initial_state = self.actor.state
+        std = self.policy.log_std.detach().exp().numpy()
+        low, high = self.env.action_space.low, self.env.action_space.high
+        samples, starts, actions, rewards = [], [], [], []
+        for _ in range(self.rollout_steps):
+            mean = self.actor.act(obs, episode_starts).numpy()
+            action = (mean + std * self.rng.standard_normal(mean.shape)).astype(np.float32)
+            # The newest sample is all the recurrent mode reads; the env reuses its observation buffers
+            samples.append(np.array(obs[:, -1], dtype=np.float32))
+            starts.append(episode_starts)
+            actions.append(action)
+            clipped = np.clip(action.reshape((self.env.num_envs,) + self.env.action_space.shape), low, high)
+            obs, reward, dones, _ = self.env.step(clipped)
+            rewards.append(reward)
+            episode_starts = dones.astype(np.float32)
+        samples.append(np.array(obs[:, -1], dtype=np.float32))
+        starts.append(episode_starts)
+        # [num_envs, steps + 1] for samples and starts (the step after the rollout bootstraps), [num_envs, steps] otherwise
+        rollout = [torch.as_tensor(np.stack(values, axis=1)) for values in (samples, starts, actions, rewards)]
+        self.num_timesteps += self.rollout_steps * self.env.num_envs
+        return rollout, initial_state, obs, episode_starts
+
+    def _update(self, rollout, initial_state):
+        samples, starts, actions, rewards = rollout
+        rewards = rewards.float()
+        with torch.no_grad():
+            features, _ = self.policy.extractor.forward_sequence(samples, initial_state, starts)
+            advantages, returns = gae(rewards, self.policy.value(features), starts[:, 1:], self.gamma, self.gae_lambda)
+            advantages = (advantages - advantages.mean()) / (advantages.std() + 1e-8)
+
+        def loss_fn(features, start, stop):
+            distribution = self.policy.distribution(features)
+            log_prob = distribution.log_prob(actions[:, start:stop]).sum(-1)
+            value_loss = (returns[:, start:stop] - self.policy.value(features)).pow(2).mean()
+            entropy = distribution.entropy().sum(-1).mean()
+            return (-(log_prob * advantages[:, start:stop]).mean() + self.value_coef * value_loss
+                    - self.entropy_coef * entropy)
+
+        steps = rewards.shape[1]
+        loss, _ = truncated_bptt(self.policy.extractor, samples[:, :steps], starts[:, :steps], loss_fn,
+                                 self.optimizer, bptt=self.bptt, state=initial_state)
+        return loss
+
+    def train(self, total_timesteps=None):
+        if total_timesteps is None:
+            total_timesteps = self.config['experiment']['max_steps'] * self.config['rl_agent']['n_epochs']
+        obs = self.env.reset()
+        episode_starts = np.ones(self.env.num_envs, dtype=np.float32)
+        updates = 0
+        while self.num_timesteps < total_timesteps:
+            rollout, initial_state, obs, episode_starts = self._collect(obs, episode_starts)
+            loss = self._update(rollout, initial_state)
+            updates += 1
+            if updates % 10 == 0:
+                self.logger.info(f"{self.num_timesteps} steps: loss {loss:.4f}, "
+                                 f"mean reward {float(rollout[3].mean()):.4f}")
+
+    def save(self, path):
+        """
+        Save the policy's state dict, replaced atomically. Returns the path.
+        """
+        if not path.endswith('.pt'):
+            path += '.pt'
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        torch.save({'policy': self.policy.state_dict(), 'num_timesteps': self.num_timesteps}, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        return path
+
+    def export(self, path=None, backend="numpy", n_verify=256):
+        """
+        Export the deterministic actor as a NumpyPolicy that steps the LSTM one
+        sample per act() (see export_recurrent_policy), after checking that it
+        matches RecurrentActor over observations sampled from the observation
+        space, with an episode starting halfway.
+        """
+        if backend != "numpy":
+            raise ValueError(f"Recurrent policies export with backend='numpy', not '{backend}'")
+        space, action_space = self.env.observation_space, self.env.action_space
+        policy = export_recurrent_policy(self.policy.extractor, self.policy.actor, space.shape,
+                                         action_space.low, action_space.high, path)
+        space.seed(self.config['experiment'].get('seed'))
+        observations = np.stack([space.sample() for _ in range(n_verify)])
+        reference = RecurrentActor(self.policy.extractor, self.policy.actor)
+        difference = 0.0
+        for i, observation in enumerate(observations):
+            start = i in (0, n_verify // 2)
+            if start:
+                policy.reset()
+            expected = reference.act(observation[None], np.ones(1) if start else None).numpy()
+            expected = np.clip(expected.reshape(action_space.shape), action_space.low, action_space.high)
+            difference = max(difference, float(np.max(np.abs(policy.act(observation) - expected))))
+        if difference > 1e-5:
+            raise ValueError(f"Exported policy differs from RecurrentActor by {difference:.3g}")
+        latency = measure_latency(policy.act, observations[0])
+        policy.reset()
+        self.logger.info(f"Exported recurrent {backend} policy: act() p50 {latency['p50']:.1f}us, "
+                         f"p99 {latency['p99']:.1f}us, max deviation from RecurrentActor {difference:.2g}")
+        return policy
+
+    def load(self, path):
+        checkpoint = torch.load(path)
+        self.policy.load_state_dict(checkpoint['policy'])
+        self.num_timesteps = checkpoint['num_timesteps']
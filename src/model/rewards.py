@@ -0,0 +1,237 @@
+import numpy as np
+
+class RewardFunctions:
+    """
+    Collection of reward functions for training the agent.
+    Scalar reference versions of the terms of RewardPipeline.
+    """
+
+    @staticmethod
+    def target_match(response, target=1.0, tolerance=0.1):
+        """
+        Reward based on how close the response is to a target value.
+        """
+        error = abs(response - target)
+        if error < tolerance:
+            return 1.0 - error
+        return -error
+
+    @staticmethod
+    def maximize_activity(response):
+        """
+        Reward for maximizing the electrical response (activity).
+        """
+        return response
+
+    @staticmethod
+    def sinusoidal_tracking(response, step, period=100):
+        """
+        Reward for tracking a generated sine wave.
+        """
+        target = np.sin(2 * np.pi * step / period)
+        error = (response - target) ** 2
+        return -error
+
+    @staticmethod
+    def stability(history):
+        """
+        Reward for keeping the signal stable (low variance).
+        """
+        if len(history) < 2:
+            return 0.0
+        variance = np.var(history)
+        return -variance
+
+def _channel_mean(values):
+    # Per-env mean over recording channels, if any
+    if values.ndim == 1:
+        return values
+    return values.reshape(values.shape[0], -1).mean(axis=1)
+
+class TargetMatch:
+    """
+    -|response - target|, or 1 - |response - target| within tolerance when set.
+    """
+    def __init__(self, target=1.0, tolerance=None):
+        self.target = target
+        self.tolerance = tolerance
+
+    def __call__(self, response, steps):
+        error = _channel_mean(np.abs(response - self.target))
+        if self.tolerance is None:
+            return -error
+        return np.where(error < self.tolerance, 1.0 - error, -error)
+
+    def reset(self, index=None):
+        pass
+
+class Activity:
+    """
+    The response itself, to maximize activity.
+    """
+    def __call__(self, response, steps):
+        return _channel_mean(response)
+
+    def reset(self, index=None):
+        pass
+
+class SinusoidalTracking:
+    """
+    -(response - target)^2 against offset + amplitude * sin(2 pi step / period).
+    With an integer period the target cycle is precomputed once, so a step is a
+    table lookup.
+    """
+    def __init__(self, period=100, amplitude=1.0, offset=0.0):
+        self.period = period
+        self.amplitude = amplitude
+        self.offset = offset
+        self._table = None
+        if float(period).is_integer():
+            self._table = offset + amplitude * np.sin(2 * np.pi * np.arange(int(period)) / period)
+
+    def target(self, steps):
+        if self._table is not None:
+            return self._table[np.asarray(steps) % len(self._table)]
+        return self.offset + self.amplitude * np.sin(2 * np.pi * np.asarray(steps) / self.period)
+
+    def __call__(self, response, steps):
+        target = self.target(steps)
+        error = response - target.reshape(target.shape + (1,) * (response.ndim - 1))
+        return -_channel_mean(error * error)
+
+    def reset(self, index=None):
+        pass
+
+class Stability:
+    """
+    -variance of each env's response over its last `window` steps (population
+    variance, like np.var; 0 before two samples). Mean and sum of squared
+    deviations are updated per step with a sliding Welford update, so a step is
+    O(1) whatever the window. They are recomputed exactly from the ring of
+    recent responses once per window to stop rounding errors from building up.
+    """
+    def __init__(self, num_envs, window=50, sample_shape=()):
+        self.window = window
+        shape = (num_envs,) + tuple(sample_shape)
+        self._ring = np.zeros((window,) + shape)
+        self._pos = 0
+        self.count = np.zeros(num_envs, dtype=np.int64)
+        self._mean = np.zeros(shape)
+        self._m2 = np.zeros(shape)
+
+    def _expand(self, values):
+        return values.reshape(values.shape + (1,) * (self._mean.ndim - 1))
+
+    def __call__(self, response, steps):
+        x = response
+        oldest = self._ring[self._pos]
+        full = self.count >= self.window
+        count = np.minimum(self.count + 1, self.window, out=self.count)
+        n = self._expand(count.astype(float))
+        mean = self._mean
+        # Full window: add x and drop the oldest sample; growing window: plain
+        # Welford. Envs are usually all in the same phase, which skips the select
+        if full.all():
+            new_mean = mean + (x - oldest) / n
+            self._m2 += (x - oldest) * (x - new_mean + oldest - mean)
+        elif not full.any():
+            new_mean = mean + (x - mean) / n
+            self._m2 += (x - mean) * (x - new_mean)
+        else:
+            grown = self._expand(full)
+            removed = np.where(grown, oldest, 0.0)
+            new_mean = mean + (x - removed - np.where(grown, 0.0, mean)) / n
+            self._m2 += np.where(grown, (x - removed) * (x - new_mean + removed - mean), (x - mean) * (x - new_mean))
+        self._mean = new_mean
+        self._ring[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+
+        if self._pos == 0:
+            self._refresh()
+        variance = np.maximum(self._m2, 0.0) / n
+        return np.where(count >= 2, -_channel_mean(variance), 0.0)
+
+    def _refresh(self):
+        full = self.count >= self.window
+        if full.any():
+            recent = self._ring[:, full]
+            mean = recent.mean(axis=0)
+            self._mean[full] = mean
+            self._m2[full] = ((recent - mean) ** 2).sum(axis=0)
+
+    def reset(self, index=None):
+        if index is None:
+            self.count[:] = 0
+            self._mean[:] = 0.0
+            self._m2[:] = 0.0
+        else:
+            self.count[index] = 0
+            self._mean[index] = 0.0
+            self._m2[index] = 0.0
+
+PATTERNS = ('constant', 'sinusoidal', 'activity', 'stable')
+
+class RewardPipeline:
+    """
+    Weighted sum of reward terms, evaluated for all envs at once on arrays of
+    responses shaped (num_envs,) or (num_envs, M), with the step number of each
+    env within its episode. Terms that keep per-env state (Stability) are
+    reset with the env. With num_envs=None the pipeline serves a single env and
+    takes and returns scalars.
+    """
+    def __init__(self, terms, num_envs=None):
+        self.terms = terms
+        self.num_envs = num_envs
+
+    def __call__(self, response, steps):
+        if self.num_envs is None:
+            response = np.asarray(response, dtype=float)[None]
+            steps = np.asarray([steps])
+            return float(self._evaluate(response, steps)[0])
+        return self._evaluate(np.asarray(response, dtype=float), np.asarray(steps))
+
+    def _evaluate(self, response, steps):
+        weight, term = self.terms[0]
+        reward = weight * term(response, steps)
+        for weight, term in self.terms[1:]:
+            reward = reward + weight * term(response, steps)
+        return reward
+
+    def reset(self, index=None):
+        """
+        Forget the per-env state of every env, or only of env `index`.
+        """
+        for _, term in self.terms:
+            term.reset(index)
+
+def make_reward(config, num_envs=None, sample_shape=()):
+    """
+    Reward pipeline for environment.target_response_pattern:
+    - constant: TargetMatch on reward.target (and reward.tolerance),
+    - sinusoidal: SinusoidalTracking with reward.period, amplitude and offset,
+    - activity: Activity,
+    - stable: Stability over reward.stability_window steps,
+    plus Stability weighted by reward.stability_weight when it is not zero.
+    """
+    environment = config['environment']
+    pattern = environment.get('target_response_pattern', 'constant')
+    settings = environment.get('reward') or {}
+    batch = 1 if num_envs is None else num_envs
+    window = settings.get('stability_window', environment['observation_window'])
+
+    if pattern == 'constant':
+        terms = [(1.0, TargetMatch(settings.get('target', 1.0), settings.get('tolerance')))]
+    elif pattern == 'sinusoidal':
+        terms = [(1.0, SinusoidalTracking(settings.get('period', 100), settings.get('amplitude', 1.0),
+                                          settings.get('offset', 0.0)))]
+    elif pattern == 'activity':
+        terms = [(1.0, Activity())]
+    elif pattern == 'stable':
+        terms = [(1.0, Stability(batch, window, sample_shape))]
+    else:
+        raise ValueError(f"Unknown target_response_pattern '{pattern}', expected one of {', '.join(PATTERNS)}")
+
+    stability_weight = settings.get('stability_weight', 0.0)
+    if stability_weight and pattern != 'stable':
+        terms.append((stability_weight, Stability(batch, window, sample_shape)))
+    return RewardPipeline(terms, num_envs)
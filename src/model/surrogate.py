@@ -0,0 +1,262 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SurrogateModel:
+    """
+    Substrate model identified from experiment logs, for model-based pretraining.
+
+    A Hammerstein-ARX model: each action first goes through the static input
+    nonlinearity phi(f, a) = a * [1, fn, fn^2, ..., fn^degree], fn being the
+    frequency scaled to [-1, 1], then through linear dynamics
+
+        y[t] = sum_i a_i y[t-i] + sum_k b_k . phi[t-k] + c + e[t]
+
+    over response_lags past responses and input_lags actions (the current one
+    included), fitted by ridge least squares. An optional small MLP, trained
+    with torch on the least-squares residuals, adds a nonlinear correction and
+    runs in NumPy at inference. e[t] is Gaussian with the residual std.
+
+    Regressor rows are laid out as [y[t-1..t-na], phi[t], ..., phi[t-nb+1], 1].
+    """
+    def __init__(self, coefficients, response_lags, input_lags, degree, frequency_range,
+                 noise_std=0.0, mlp_weights=(), validation=None):
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.response_lags = response_lags
+        self.input_lags = input_lags
+        self.degree = degree
+        self.frequency_range = tuple(frequency_range)
+        self.noise_std = float(noise_std)
+        # Alternating weight matrices and biases; hidden layers use tanh
+        self.mlp_weights = [np.asarray(w, dtype=float) for w in mlp_weights]
+        self.validation = dict(validation or {})
+        self.n_inputs = degree + 1
+        self.n_features = response_lags + input_lags * self.n_inputs + 1
+        self.max_lag = max(response_lags, input_lags - 1)
+
+    def input_features(self, frequency, amplitude, out=None):
+        """
+        phi(f, a), element-wise, with a trailing axis of degree + 1 features.
+        """
+        f_min, f_max = self.frequency_range
+        scaled = 2 * (np.asarray(frequency, dtype=float) - f_min) / (f_max - f_min) - 1
+        if out is None:
+            out = np.empty(scaled.shape + (self.n_inputs,))
+        # Successive products are much cheaper than a float power
+        out[..., 0] = amplitude
+        for k in range(1, self.n_inputs):
+            np.multiply(out[..., k - 1], scaled, out=out[..., k])
+        return out
+
+    def regressors(self, log, rows):
+        """
+        Regressor rows for the given global rows of a ReplayLog. Every row needs
+        max_lag earlier rows from the same session.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        na = self.response_lags
+        features = np.empty((len(rows), self.n_features))
+        for lag in range(1, na + 1):
+            features[:, lag - 1] = log.gather('response', rows - lag)
+        lagged = rows[:, None] - np.arange(self.input_lags)
+        inputs = self.input_features(log.gather('frequency', lagged), log.gather('amplitude', lagged))
+        features[:, na:-1] = inputs.reshape(len(rows), -1)
+        features[:, -1] = 1.0
+        return features
+
+    def predict(self, features):
+        """
+        Noise-free one-step prediction from regressor rows of shape (n, n_features).
+        """
+        prediction = features @ self.coefficients
+        if self.mlp_weights:
+            hidden = features
+            for i in range(0, len(self.mlp_weights) - 2, 2):
+                hidden = np.tanh(hidden @ self.mlp_weights[i] + self.mlp_weights[i + 1])
+            prediction += (hidden @ self.mlp_weights[-2] + self.mlp_weights[-1])[:, 0]
+        return prediction
+
+    def initial_state(self, num_envs):
+        """
+        Regressor rows of num_envs substrates at rest, to be advanced by step().
+        The rows are stored column-major so shifting the lags moves contiguous memory.
+        """
+        state = np.zeros((num_envs, self.n_features), order='F')
+        state[:, -1] = 1.0
+        return state
+
+    def step(self, state, frequency, amplitude, noise=None):
+        """
+        Apply one action per substrate, update the regressor rows in place and
+        return the responses.
+        """
+        na, p = self.response_lags, self.n_inputs
+        inputs = state[:, na:-1]
+        inputs[:, p:] = inputs[:, :-p]
+        self.input_features(frequency, amplitude, out=inputs[:, :p])
+        response = self.predict(state)
+        if noise is not None:
+            response += noise
+        state[:, 1:na] = state[:, :na - 1]
+        state[:, 0] = response
+        return response
+
+    def save(self, path):
+        mlp = {f"mlp_{i}": w for i, w in enumerate(self.mlp_weights)}
+        validation = {f"validation_{k}": v for k, v in self.validation.items()}
+        np.savez(path, coefficients=self.coefficients, response_lags=self.response_lags,
+                 input_lags=self.input_lags, degree=self.degree, frequency_range=self.frequency_range,
+                 noise_std=self.noise_std, **mlp, **validation)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            mlp = [data[f"mlp_{i}"] for i in range(sum(k.startswith("mlp_") for k in data.files))]
+            validation = {k[len("validation_"):]: float(data[k]) for k in data.files if k.startswith("validation_")}
+            return cls(data['coefficients'], int(data['response_lags']), int(data['input_lags']),
+                       int(data['degree']), data['frequency_range'], float(data['noise_std']), mlp, validation)
+
+def split_rows(log, max_lag, validation_fraction):
+    """
+    Per session, (start, stop) global row ranges for training (the first part)
+    and validation (the last validation_fraction), skipping rows without a full
+    lag history.
+    """
+    train, validation = [], []
+    for s in range(len(log.sessions)):
+        start, stop = int(log.offsets[s]), int(log.offsets[s + 1])
+        split = max(start + max_lag, stop - int((stop - start) * validation_fraction))
+        if split - (start + max_lag) > 0:
+            train.append((start + max_lag, split))
+        if stop - split > 0:
+            validation.append((split, stop))
+    return train, validation
+
+def _chunks(ranges, chunk_rows):
+    for start, stop in ranges:
+        for first in range(start, stop, chunk_rows):
+            yield np.arange(first, min(first + chunk_rows, stop))
+
+def fit_surrogate(log, config, response_lags=4, input_lags=2, degree=3, ridge=1e-6,
+                  validation_fraction=0.2, hidden=(), epochs=20, max_mlp_samples=500000,
+                  max_free_run=20000, chunk_rows=1000000, seed=None):
+    """
+    Fit a SurrogateModel to a ReplayLog and score it on the held-out end of
+    every session: one-step-ahead R^2 and the NRMSE of a noise-free free run.
+    The least-squares fit accumulates normal equations chunk by chunk, so logs
+    larger than memory are fine.
+    """
+    stimulation = config['stimulation']
+    frequency_range = (stimulation['min_frequency'], stimulation['max_frequency'])
+    model = SurrogateModel(np.zeros(response_lags + input_lags * (degree + 1) + 1),
+                           response_lags, input_lags, degree, frequency_range)
+    train, validation = split_rows(log, model.max_lag, validation_fraction)
+    if not train:
+        raise ValueError("Experiment logs are too short to fit a surrogate")
+
+    gram = np.zeros((model.n_features, model.n_features))
+    moment = np.zeros(model.n_features)
+    n_train = 0
+    for rows in _chunks(train, chunk_rows):
+        features = model.regressors(log, rows)
+        gram += features.T @ features
+        moment += features.T @ log.gather('response', rows)
+        n_train += len(rows)
+    # Ridge on every coefficient but the bias
+    penalty = ridge * n_train * np.eye(model.n_features)
+    penalty[-1, -1] = 0.0
+    model.coefficients = np.linalg.solve(gram + penalty, moment)
+
+    if hidden:
+        rng = np.random.default_rng(seed)
+        all_rows = np.concatenate([np.arange(start, stop) for start, stop in train])
+        if len(all_rows) > max_mlp_samples:
+            all_rows = np.sort(rng.choice(all_rows, max_mlp_samples, replace=False))
+        features = model.regressors(log, all_rows)
+        residual = log.gather('response', all_rows) - features @ model.coefficients
+        model.mlp_weights = _fit_mlp(features, residual, hidden, epochs, seed)
+
+    squared_error = 0.0
+    for rows in _chunks(train, chunk_rows):
+        squared_error += np.sum((log.gather('response', rows) - model.predict(model.regressors(log, rows))) ** 2)
+    model.noise_std = float(np.sqrt(squared_error / n_train))
+
+    if validation:
+        model.validation = score_surrogate(model, log, validation, max_free_run, chunk_rows)
+    logger.info(f"Fitted surrogate on {n_train} steps: noise std {model.noise_std:.4f}, validation {model.validation}")
+    return model
+
+def score_surrogate(model, log, ranges, max_free_run=20000, chunk_rows=1000000):
+    """
+    One-step-ahead R^2 over the given row ranges, and the NRMSE (RMSE over the
+    response std) of free runs that start from the logged history and then only
+    see the logged actions, batched over ranges.
+    """
+    squared_error, total, total_squared, count = 0.0, 0.0, 0.0, 0
+    for rows in _chunks(ranges, chunk_rows):
+        actual = log.gather('response', rows)
+        squared_error += np.sum((actual - model.predict(model.regressors(log, rows))) ** 2)
+        total += actual.sum()
+        total_squared += np.sum(actual ** 2)
+        count += len(rows)
+    variance = total_squared / count - (total / count) ** 2
+    r2 = 1.0 - squared_error / (count * variance) if variance > 0 else float('nan')
+
+    # Free runs, one per range, padded to the longest
+    length = min(max(stop - start for start, stop in ranges), max_free_run)
+    starts = np.array([start for start, _ in ranges])
+    lengths = np.minimum(np.array([stop - start for start, stop in ranges]), length)
+    rows = np.minimum(starts[:, None] + np.arange(length), (starts + lengths - 1)[:, None])
+    frequency, amplitude = log.gather('frequency', rows), log.gather('amplitude', rows)
+    actual = log.gather('response', rows)
+    state = model.regressors(log, starts)
+    # regressors() holds the inputs up to and including each start; step() adds
+    # the current action itself, so rewind the input lags by one action
+    na, p = model.response_lags, model.n_inputs
+    state[:, na:-1 - p] = state[:, na + p:-1].copy()
+    simulated = np.empty_like(actual)
+    for t in range(length):
+        simulated[:, t] = model.step(state, frequency[:, t], amplitude[:, t])
+    valid = np.arange(length) < lengths[:, None]
+    error = (simulated - actual)[valid]
+    nrmse = float(np.sqrt(np.mean(error ** 2)) / np.std(actual[valid]))
+    return {'r2': float(r2), 'nrmse': nrmse}
+
+def _fit_mlp(features, target, hidden, epochs, seed, batch_size=1024, learning_rate=1e-3):
+    import torch
+    from torch import nn
+
+    torch.manual_seed(0 if seed is None else seed)
+    mean, std = features.mean(axis=0), features.std(axis=0)
+    std[std == 0] = 1.0
+    sizes = [features.shape[1], *hidden, 1]
+    layers = []
+    for i in range(len(sizes) - 1):
+        layers.append(nn.Linear(sizes[i], sizes[i + 1]))
+        if i < len(sizes) - 2:
+            layers.append(nn.Tanh())
+    net = nn.Sequential(*layers)
+
+    inputs = torch.as_tensor((features - mean) / std, dtype=torch.float32)
+    targets = torch.as_tensor(target, dtype=torch.float32)[:, None]
+    optimizer = torch.optim.Adam(net.parameters(), lr=learning_rate)
+    for epoch in range(epochs):
+        order = torch.randperm(len(inputs))
+        for start in range(0, len(inputs), batch_size):
+            batch = order[start:start + batch_size]
+            loss = nn.functional.mse_loss(net(inputs[batch]), targets[batch])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+        logger.info(f"Surrogate MLP epoch {epoch + 1}/{epochs}: loss {loss.item():.5f}")
+
+    weights = []
+    for layer in net:
+        if isinstance(layer, nn.Linear):
+            weights.append(layer.weight.detach().double().numpy().T)
+            weights.append(layer.bias.detach().double().numpy())
+    # Fold the input standardization into the first layer
+    weights[1] = weights[1] - (mean / std) @ weights[0]
+    weights[0] = weights[0] / std[:, None]
+    return weights
@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class ExperimentDaemon:
+    """
+    Long-lived experiment worker that answers jobs on a local Unix socket.
+
+    Heavy modules (torch, stable_baselines3, the envs) are imported once at
+    start, envs are kept per (config, mode, num_envs) and trained models per
+    file, so a job only pays for its own work. A job is one line of JSON and
+    gets one line of JSON back: {"status": "ok", ...} or {"status": "error",
+    "error": ...}. Jobs run one at a time, in order of arrival:
+    - {"command": "train", "config": {...}, "steps": n, "num_envs": n, "save_path": ...}
+    - {"command": "evaluate", "model": path, "config": {...}, "episodes": n, "deterministic": true}
+    - {"command": "ping"} and {"command": "shutdown"}
+    "config" overrides dotted paths of the daemon's config ("rl_agent.learning_rate").
+    """
+    def __init__(self, config, socket_path, max_envs=4):
+        self.config = config
+        self.socket_path = socket_path
+        self.max_envs = max_envs
+        self.envs = {}
+        self.models = {}
+        self.jobs = 0
+        self.started = time.monotonic()
+        self._server = None
+
+    def warm_up(self):
+        """
+        Import the training stack now rather than in the first job.
+        """
+        import torch
+        import stable_baselines3
+        from src.env.bio_env import BioInterfaceEnv
+        from src.env.vec_bio_env import BioInterfaceVecEnv
+        from src.model.agent import RLAgent
+        logger.info(f"Loaded torch {torch.__version__}, stable_baselines3 {stable_baselines3.__version__}")
+
+    def _remove_stale_socket(self):
+        """
+        Remove a socket file left over by a daemon that did not shut down
+        cleanly. Raises if a daemon is still answering on it.
+        """
+        if not os.path.exists(self.socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.socket_path)
+            except ConnectionRefusedError:
+                # Nobody listens on it any more
+                os.remove(self.socket_path)
+                return
+        raise RuntimeError(f"An experiment daemon is already listening on {self.socket_path}")
+
+    def serve_forever(self):
+        self._remove_stale_socket()
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    response = daemon.handle(line)
+                    self.wfile.write(json.dumps(response).encode() + b'\n')
+                    self.wfile.flush()
+                    if response.get('shutdown'):
+                        # shutdown() waits for serve_forever to return, so it cannot run on this thread
+                        threading.Thread(target=self.server.shutdown).start()
+                        return
+
+        self._server = socketserver.UnixStreamServer(self.socket_path, Handler)
+        logger.info(f"Experiment daemon listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            os.remove(self.socket_path)
+            for env in self.envs.values():
+                env.close()
+            self.envs.clear()
+            logger.info("Experiment daemon stopped")
+
+    def handle(self, line):
+        """
+        Run one JSON job and return the JSON-serializable response.
+        """
+        start = time.perf_counter()
+        try:
+            job = json.loads(line)
+            command = job.get('command')
+            if command == 'ping':
+                result = {'uptime': time.monotonic() - self.started, 'jobs': self.jobs, 'envs': len(self.envs)}
+            elif command == 'shutdown':
+                result = {'shutdown': True}
+            elif command == 'train':
+                result = self.train(job)
+            elif command == 'evaluate':
+                result = self.evaluate(job)
+            else:
+                raise ValueError(f"Unknown command: {command}")
+        except Exception as e:
+            logger.exception("Job failed")
+            return {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+        self.jobs += 1
+        result.update(status='ok', seconds=time.perf_counter() - start)
+        return result
+
+    def _job_config(self, job):
+        from src.model.sweep import apply_params
+        return apply_params(self.config, job.get('config') or {})
+
+    def _env(self, config, mode, num_envs):
+        """
+        A warm env for this config, built on first use.
+        """
+        key = (json.dumps(config, sort_keys=True), mode, num_envs)
+        env = self.envs.pop(key, None)
+        if env is None:
+            if len(self.envs) >= self.max_envs:
+                # Drop the least recently used env
+                oldest = next(iter(self.envs))
+                self.envs.pop(oldest).close()
+            if num_envs > 1:
+                from src.env.vec_bio_env import BioInterfaceVecEnv
+                env = BioInterfaceVecEnv(config, num_envs)
+            else:
+                from src.env.bio_env import BioInterfaceEnv
+                env = BioInterfaceEnv(config, mode=mode)
+        # Most recently used last
+        self.envs[key] = env
+        return env
+
+    def train(self, job):
+        from stable_baselines3.common.monitor import Monitor
+        from stable_baselines3.common.vec_env import VecMonitor
+        from src.model.agent import RLAgent
+
+        config = self._job_config(job)
+        num_envs = job.get('num_envs', 1)
+        env = self._env(config, job.get('mode', 'simulation'), num_envs)
+        # Monitors only record this job's episodes; closing them would close the warm env
+        env = VecMonitor(env) if num_envs > 1 else Monitor(env)
+        agent = RLAgent(env, config)
+        agent.model.verbose = 0
+        steps = job.get('steps') or config['experiment']['max_steps'] * config['rl_agent']['n_epochs']
+        agent.model.learn(total_timesteps=steps)
+        result = {'steps': steps}
+        rewards = env.get_episode_rewards() if num_envs == 1 else []
+        if rewards:
+            result['mean_reward'] = sum(rewards) / len(rewards)
+        if job.get('save_path'):
+            agent.save(job['save_path'])
+            result['model_path'] = job['save_path']
+        return result
+
+    def _model(self, path, config):
+        from stable_baselines3 import PPO, SAC
+        if not path.endswith('.zip'):
+            path += '.zip'
+        key = (os.path.abspath(path), os.path.getmtime(path))
+        if key not in self.models:
+            algorithm = {'PPO': PPO, 'SAC': SAC}[config['rl_agent']['algorithm']]
+            self.models.clear()
+            self.models[key] = algorithm.load(path, device='cpu')
+        return self.models[key]
+
+    def evaluate(self, job):
+        import numpy as np
+        from stable_baselines3.common.evaluation import evaluate_policy
+        from stable_baselines3.common.monitor import Monitor
+
+        config = self._job_config(job)
+        model = self._model(job['model'], config)
+        env = self._env(config, job.get('mode', 'simulation'), 1)
+        rewards, lengths = evaluate_policy(model, Monitor(env), n_eval_episodes=job.get('episodes', 5),
+                                           deterministic=job.get('deterministic', True), return_episode_rewards=True)
+        return {'mean_reward': float(np.mean(rewards)), 'std_reward': float(np.std(rewards)),
+                'episodes': len(rewards), 'mean_length': float(np.mean(lengths))}
+
+def submit(socket_path, job, timeout=None):
+    """
+    Send one job to a running ExperimentDaemon and wait for its response.
+    Only the standard library is imported, so clients start instantly.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(job).encode() + b'\n')
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError(f"No response from the daemon at {socket_path}")
+    return json.loads(line)
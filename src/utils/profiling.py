@@ -0,0 +1,327 @@
+import atexit
+import collections
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+# Sub-buckets per power of two: values are kept to within 1/64 (1.6%)
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS >> 1
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations in integer nanoseconds.
+
+    Durations below 128ns get a bucket each; above, every power of two is split
+    into 64 buckets, so any recorded value is known to within 1.6% whatever its
+    magnitude. Buckets grow on demand (about 2000 cover an hour). Histograms
+    merge by adding counts.
+    """
+    def __init__(self):
+        self.counts = np.zeros(SUB_BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def bucket_of(values):
+        """
+        Bucket index of every value (an int64 array).
+        """
+        values = np.asarray(values, dtype=np.int64)
+        # frexp's exponent is the bit length, exactly, below 2**53ns (104 days)
+        shift = np.maximum(np.frexp(values.astype(np.float64))[1] - SUB_BUCKET_BITS, 0)
+        return np.where(values < SUB_BUCKETS, values, shift * HALF_BUCKETS + (values >> shift))
+
+    @staticmethod
+    def bucket_range(index):
+        """
+        [low, high) of the values counted in bucket `index`.
+        """
+        if index < SUB_BUCKETS:
+            return index, index + 1
+        shift = index // HALF_BUCKETS - 1
+        low = (index - shift * HALF_BUCKETS) << shift
+        return low, low + (1 << shift)
+
+    def record(self, value):
+        self.record_many([value])
+
+    def record_many(self, values):
+        values = np.asarray(values, dtype=np.int64)
+        if not len(values):
+            return
+        counts = np.bincount(self.bucket_of(values))
+        if len(counts) > len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros(len(counts) - len(self.counts), dtype=np.int64)])
+        self.counts[:len(counts)] += counts
+        self.count += len(values)
+        self.total += int(values.sum())
+        low, high = int(values.min()), int(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = max(self.max, high)
+
+    def merge(self, other):
+        if len(other.counts) > len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros(len(other.counts) - len(self.counts), dtype=np.int64)])
+        self.counts[:len(other.counts)] += other.counts
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percentile):
+        """
+        Value at the given percentile, the middle of its bucket (clamped to the
+        observed range); 0 when empty.
+        """
+        if not self.count:
+            return 0
+        rank = max(int(round(percentile / 100.0 * self.count)), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        low, high = self.bucket_range(index)
+        return min(max((low + high - 1) // 2, self.min), self.max)
+
+    def summary(self):
+        """
+        count, total, mean, min, max and percentiles, in seconds.
+        """
+        summary = {
+            'count': self.count,
+            'total': self.total * 1e-9,
+            'mean': self.total / self.count * 1e-9 if self.count else 0.0,
+            'min': (self.min or 0) * 1e-9,
+            'max': self.max * 1e-9,
+        }
+        for p in PERCENTILES:
+            summary[f"p{p:g}"] = self.percentile(p) * 1e-9
+        return summary
+
+class Profiler:
+    """
+    Per-phase timers for the step loop. Instrumented code keeps the process
+    profiler from get_profiler() and, when it is not None, times phases with
+    monotonic nanosecond laps, from any thread:
+
+        t = profiler.now()
+        ...
+        t = profiler.lap('env.read_response', t)
+
+    so with profiling disabled a phase costs one `is not None` check. A lap
+    only appends the duration to a per-phase list; every `batch` of them is
+    folded into the phase's LatencyHistogram at once. Phases are written to
+    output_dir as profile.json and Prometheus text (profile.prom) every
+    dump_interval seconds by a background thread, and on close.
+    """
+    def __init__(self, output_dir=None, dump_interval=10.0, prefix='mycorl', batch=4096):
+        self.output_dir = output_dir
+        self.dump_interval = dump_interval
+        self.prefix = prefix
+        self.batch = batch
+        self.histograms = collections.defaultdict(LatencyHistogram)
+        self._pending = collections.defaultdict(list)
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.now = time.perf_counter_ns
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._dumper = None
+        self.sampler = None
+
+    def start(self):
+        if self.output_dir and self.dump_interval and self._dumper is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._dumper = threading.Thread(target=self._dump_loop, name="profiler-dump", daemon=True)
+            self._dumper.start()
+        if self.sampler is not None:
+            self.sampler.start()
+        return self
+
+    def lap(self, phase, start):
+        """
+        Record the time since start (from now()) under phase and return now.
+        """
+        end = self.now()
+        pending = self._pending[phase]
+        pending.append(end - start)
+        if len(pending) >= self.batch:
+            self._fold(phase, pending)
+        return end
+
+    def record(self, phase, nanoseconds):
+        pending = self._pending[phase]
+        pending.append(nanoseconds)
+        if len(pending) >= self.batch:
+            self._fold(phase, pending)
+
+    def _fold(self, phase, pending):
+        with self._lock:
+            values = pending[:]
+            # Only what was copied: other threads may have appended since
+            del pending[:len(values)]
+            self.histograms[phase].record_many(values)
+
+    def timed(self, phase, fn):
+        """
+        Wrap fn so every call is recorded under phase.
+        """
+        def wrapper(*args, **kwargs):
+            start = self.now()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.lap(phase, start)
+        return wrapper
+
+    def snapshot(self):
+        """
+        {phase: LatencyHistogram.summary()} for every phase seen so far,
+        including the laps not folded yet.
+        """
+        summaries = {}
+        for phase, pending in sorted(list(self._pending.items())):
+            histogram = LatencyHistogram()
+            with self._lock:
+                if phase in self.histograms:
+                    histogram.merge(self.histograms[phase])
+            # Copied, not drained: the lapping threads own the list
+            histogram.record_many(list(pending))
+            summaries[phase] = histogram.summary()
+        return summaries
+
+    def to_json(self):
+        return json.dumps({'started': self.started, 'time': time.time(), 'pid': os.getpid(), 'phases': self.snapshot()},
+                          indent=2)
+
+    def to_prometheus(self):
+        """
+        Phases as a Prometheus summary in the text exposition format.
+        """
+        name = f"{self.prefix}_phase_seconds"
+        lines = [f"# HELP {name} Time spent per step-loop phase.", f"# TYPE {name} summary"]
+        for phase, summary in self.snapshot().items():
+            for p in PERCENTILES:
+                lines.append(f'{name}{{phase="{phase}",quantile="{p / 100:g}"}} {summary[f"p{p:g}"]:.9g}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {summary["total"]:.9g}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self):
+        """
+        Write profile.json and profile.prom to output_dir, each replaced atomically.
+        """
+        if not self.output_dir:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        for filename, text in [('profile.json', self.to_json()), ('profile.prom', self.to_prometheus())]:
+            path = os.path.join(self.output_dir, filename)
+            with open(path + '.tmp', 'w') as f:
+                f.write(text)
+            os.replace(path + '.tmp', path)
+        if self.sampler is not None:
+            self.sampler.dump(os.path.join(self.output_dir, 'profile.folded'))
+
+    def _dump_loop(self):
+        while not self._stop.wait(self.dump_interval):
+            try:
+                self.dump()
+            except OSError as e:
+                self.logger.error(f"Could not write the profile: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self._dumper is not None:
+            self._dumper.join()
+            self._dumper = None
+        self.dump()
+
+class StackSampler:
+    """
+    Sampling profiler: a background thread snapshots the Python stack of one
+    thread (default: the one that started it) every `interval` seconds and
+    counts the stacks in folded form ("file:function;file:function count"),
+    the input format of flamegraph.pl and speedscope. The cost is the
+    sampling thread taking the GIL briefly at each sample; it does nothing
+    between samples.
+    """
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            if self.thread_id is None:
+                self.thread_id = threading.get_ident()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def dump(self, path):
+        with open(path + '.tmp', 'w') as f:
+            for stack, count in list(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        os.replace(path + '.tmp', path)
+
+_profiler = None
+
+def get_profiler():
+    """
+    The process-wide Profiler set up by configure_profiling, or None when
+    profiling is off.
+    """
+    return _profiler
+
+def configure_profiling(config):
+    """
+    Set up the process-wide Profiler from the profiling config section
+    (enabled, output_dir, dump_interval, sampler.enabled/interval), or turn
+    profiling off. Call it before building envs and agents, which pick the
+    profiler up when they are created. Returns the profiler or None.
+    """
+    global _profiler
+    if _profiler is not None:
+        _profiler.close()
+        _profiler = None
+    section = config.get('profiling') or {}
+    if not section.get('enabled', False):
+        return None
+    _profiler = Profiler(section.get('output_dir', 'logs/profile'), section.get('dump_interval', 10.0))
+    sampler = section.get('sampler') or {}
+    if sampler.get('enabled', False):
+        _profiler.sampler = StackSampler(sampler.get('interval', 0.005))
+    atexit.register(_profiler.close)
+    return _profiler.start()
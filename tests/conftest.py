@@ -0,0 +1,30 @@
+import copy
+import os
+import sys
+import time
+import pytest
+import yaml
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+with open(os.path.join(ROOT, 'config', 'default_config.yaml')) as f:
+    DEFAULT_CONFIG = yaml.safe_load(f)
+
+@pytest.fixture
+def config():
+    """
+    A fresh copy of the default config, free to modify.
+    """
+    return copy.deepcopy(DEFAULT_CONFIG)
+
+def wait_until(condition, timeout=2.0, interval=0.005):
+    """
+    Poll condition() until it is true; False if it never was within timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(interval)
+    return bool(condition())
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils.analysis import EpisodeTracker, QuantileSketch, RunningStats, summarize_logs
+from src.utils.logger import LOG_DTYPE, NpyAppendWriter
+
+def chunks_of(values, sizes):
+    bounds = np.cumsum([0] + list(sizes))
+    return [values[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+def test_running_stats_chunked_and_merged():
+    values = np.random.default_rng(0).normal(5.0, 2.0, 1000)
+    values[[3, 500]] = np.nan
+    first, second = RunningStats(), RunningStats()
+    for chunk in chunks_of(values[:600], [1, 99, 500]):
+        first.update(chunk)
+    second.update(values[600:])
+    first.merge(second)
+    clean = values[~np.isnan(values)]
+    assert first.count == 998
+    assert first.mean == pytest.approx(clean.mean())
+    assert first.std == pytest.approx(clean.std(ddof=1))
+    assert (first.min, first.max) == (clean.min(), clean.max())
+
+def test_quantile_sketch_relative_accuracy():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.lognormal(0.0, 3.0, 5000), -rng.lognormal(1.0, 1.0, 2000), np.zeros(300)])
+    rng.shuffle(values)
+    halves = [QuantileSketch(0.01), QuantileSketch(0.01)]
+    for half, part in zip(halves, np.array_split(values, 2)):
+        for chunk in np.array_split(part, 7):
+            half.update(chunk)
+    halves[0].merge(halves[1])
+    qs = np.linspace(0.0, 1.0, 41)
+    # The estimate at rank q * (n - 1) is within 1% of the value at that rank
+    expected = np.sort(values)[np.floor(qs * (len(values) - 1)).astype(int)]
+    np.testing.assert_allclose(halves[0].quantiles(qs), expected, rtol=0.01, atol=1e-9)
+    with pytest.raises(ValueError):
+        halves[0].merge(QuantileSketch(0.05))
+
+def naive_episodes(steps, rewards):
+    starts = [0] + [i for i in range(1, len(steps)) if steps[i] <= steps[i - 1]]
+    bounds = starts + [len(steps)]
+    return [(start, stop - start, rewards[start:stop].sum(), rewards[start:stop].min(), rewards[start:stop].max())
+            for start, stop in zip(bounds[:-1], bounds[1:])]
+
+def test_episode_tracker_across_chunks():
+    steps = np.r_[0:5, 0:1, 0:8, 3:6, 0:4]
+    rewards = np.random.default_rng(2).standard_normal(len(steps))
+    tracker = EpisodeTracker()
+    # Chunks ending mid-episode, on an episode end, and holding a one-row episode
+    sizes = [3, 2, 1, 4, 8, 3]
+    for step_chunk, reward_chunk in zip(chunks_of(steps, sizes), chunks_of(rewards, sizes)):
+        tracker.update(step_chunk, reward_chunk)
+    episodes = tracker.episodes()
+    expected = np.array(naive_episodes(steps, rewards))
+    np.testing.assert_array_equal(episodes['first_row'], expected[:, 0])
+    np.testing.assert_array_equal(episodes['length'], expected[:, 1])
+    np.testing.assert_allclose(episodes['total_reward'], expected[:, 2])
+    np.testing.assert_allclose(episodes['min_reward'], expected[:, 3])
+    np.testing.assert_allclose(episodes['max_reward'], expected[:, 4])
+    np.testing.assert_allclose(episodes['mean_reward'], expected[:, 2] / expected[:, 1])
+
+def write_log(path, steps, seed):
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(len(steps), dtype=LOG_DTYPE)
+    rows['step'] = steps
+    for name in ('frequency', 'amplitude', 'response', 'reward'):
+        rows[name] = rng.uniform(0.5, 10.0, len(steps))
+    writer = NpyAppendWriter(str(path), LOG_DTYPE)
+    writer.write(rows)
+    writer.close()
+    return rows
+
+def test_summarize_logs_matches_pandas(tmp_path):
+    first = write_log(tmp_path / 'a.npy', np.r_[0:300, 0:200], seed=0)
+    second = write_log(tmp_path / 'b.npy', np.arange(250), seed=1)
+    serial = summarize_logs([str(tmp_path / '*.npy')], workers=0, chunk_rows=64)
+    parallel = summarize_logs([str(tmp_path / 'a.npy'), str(tmp_path / 'b.npy')], workers=2, chunk_rows=1000)
+
+    expected = pd.DataFrame(np.concatenate([first, second])).describe()
+    for summary in (serial, parallel):
+        table = summary.describe()
+        assert list(table.index) == list(expected.index)
+        exact = ['count', 'mean', 'std', 'min', 'max']
+        np.testing.assert_allclose(table.loc[exact], expected.loc[exact])
+        # Percentiles come from the sketch: within its relative accuracy (and one rank)
+        np.testing.assert_allclose(table.loc[['25%', '50%', '75%']], expected.loc[['25%', '50%', '75%']], rtol=0.02)
+        episodes = summary.episodes()
+        assert list(episodes['session']) == [str(tmp_path / 'a.npy')] * 2 + [str(tmp_path / 'b.npy')]
+        assert list(episodes['length']) == [300, 200, 250]
+        assert list(episodes['first_row']) == [0, 300, 0]
@@ -0,0 +1,55 @@
+import logging
+import os
+import time
+import pytest
+from stable_baselines3 import PPO
+from src.env.bio_env import BioInterfaceEnv
+from src.model.agent import RLAgent
+import src.model.checkpoint as checkpoint
+from src.model.checkpoint import AsyncCheckpointCallback
+
+def train(config, callback, timesteps=64):
+    env = BioInterfaceEnv(config)
+    model = PPO("MlpPolicy", env, n_steps=32, batch_size=32, n_epochs=1, verbose=0, seed=0, device='cpu')
+    model.learn(total_timesteps=timesteps, callback=callback)
+    env.close()
+
+def test_rotation_only_removes_its_own_checkpoints(config, tmp_path):
+    # Left by an earlier run of the same experiment
+    earlier = [f"rl_model_{steps}_steps.zip" for steps in (100, 500, 900)]
+    for name in earlier:
+        (tmp_path / name).write_bytes(b"old")
+
+    callback = AsyncCheckpointCallback(16, str(tmp_path), keep=3)
+    train(config, callback)
+    # Four new checkpoints (16, 32, 48, 64 steps): only the first one is rotated out
+    kept = [f"rl_model_{steps}_steps.zip" for steps in (32, 48, 64)]
+    assert sorted(os.listdir(tmp_path)) == sorted(earlier + kept)
+    assert callback.saved == [str(tmp_path / name) for name in kept]
+
+@pytest.mark.parametrize('checkpoint_async', [True, False])
+def test_agent_checkpoints_are_named_after_the_experiment(config, tmp_path, monkeypatch, checkpoint_async):
+    monkeypatch.chdir(tmp_path)
+    config['experiment'].update(name='exp_a', max_steps=64, save_interval=32, checkpoint_async=checkpoint_async)
+    config['rl_agent'].update(n_epochs=1, n_steps=32, batch_size=32)
+    agent = RLAgent(BioInterfaceEnv(config), config)
+    agent.model.verbose = 0
+    agent.train()
+    assert sorted(os.listdir(tmp_path / 'logs')) == ['exp_a_32_steps.zip', 'exp_a_64_steps.zip']
+
+def test_slow_writer_replaces_snapshots_quietly(config, tmp_path, monkeypatch, caplog):
+    write_atomic = checkpoint.write_atomic
+
+    def slow_write(path, *snapshot):
+        time.sleep(0.05)
+        write_atomic(path, *snapshot)
+
+    monkeypatch.setattr(checkpoint, "write_atomic", slow_write)
+    callback = AsyncCheckpointCallback(1, str(tmp_path), keep=None)
+    with caplog.at_level(logging.DEBUG, logger=checkpoint.__name__):
+        train(config, callback)
+    assert callback.dropped > 0
+    assert len(callback.saved) + callback.dropped == 64
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+    # The last snapshot is never the one dropped
+    assert callback.saved[-1] == str(tmp_path / "rl_model_64_steps.zip")
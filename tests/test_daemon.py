@@ -0,0 +1,38 @@
+import os
+import socket
+import threading
+import pytest
+from conftest import wait_until
+from src.utils.daemon import ExperimentDaemon, submit
+
+def test_stale_socket_is_replaced(config, tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    # Bound but never listening: what a killed daemon leaves behind
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+    assert os.path.exists(path)
+
+    daemon = ExperimentDaemon(config, path)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    assert wait_until(lambda: daemon._server is not None)
+    assert submit(path, {'command': 'ping'}, timeout=2.0)['status'] == 'ok'
+    assert submit(path, {'command': 'shutdown'}, timeout=2.0)['shutdown']
+    thread.join(timeout=2.0)
+    assert not thread.is_alive()
+    assert not os.path.exists(path)
+
+def test_running_daemon_is_not_replaced(config, tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    daemon = ExperimentDaemon(config, path)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    assert wait_until(lambda: daemon._server is not None)
+    try:
+        with pytest.raises(RuntimeError, match="already listening"):
+            ExperimentDaemon(config, path).serve_forever()
+        # The running daemon still owns the socket
+        assert submit(path, {'command': 'ping'}, timeout=2.0)['status'] == 'ok'
+    finally:
+        submit(path, {'command': 'shutdown'}, timeout=2.0)
+        thread.join(timeout=2.0)
@@ -0,0 +1,156 @@
+import threading
+import time
+import gymnasium as gym
+import numpy as np
+import pytest
+from src.env.bio_env import make_spaces
+from src.env.device_pool_env import DevicePoolVecEnv
+from src.hardware.emulator import PtySubstrateEmulator
+
+class FakeStimulator:
+    def __init__(self):
+        self.error = None
+
+    def check(self):
+        if self.error is not None:
+            raise self.error
+
+class FakeDeviceEnv(gym.Env):
+    """
+    A device whose steps return its index + 1 everywhere, and which raises or
+    hangs on step once `mode` says so.
+    """
+    def __init__(self, config, value, release):
+        self.action_space, self.observation_space, _ = make_spaces(config)
+        self.value = value
+        self.release = release
+        self.mode = 'ok'
+        self.steps = 0
+        self.stimulator = FakeStimulator()
+
+    def reset(self, seed=None, options=None):
+        return np.full(self.observation_space.shape, self.value, dtype=np.float32), {}
+
+    def step(self, action):
+        if self.mode == 'raise':
+            raise OSError("device unplugged")
+        if self.mode == 'hang':
+            self.release.wait()
+        self.steps += 1
+        obs = np.full(self.observation_space.shape, self.value, dtype=np.float32)
+        return obs, float(self.value), False, False, {}
+
+@pytest.fixture
+def pool(config):
+    config['hardware']['devices'] = ['dev0', 'dev1', 'dev2']
+    config['hardware']['device_pool'] = {'step_timeout': 0.2}
+    release = threading.Event()
+    envs = {}
+
+    def make_pool(**device_pool):
+        config['hardware']['device_pool'].update(device_pool)
+
+        def env_fn(device_config):
+            index = config['hardware']['devices'].index(device_config['hardware']['port'])
+            envs[index] = FakeDeviceEnv(device_config, index + 1, release)
+            return envs[index]
+
+        created = DevicePoolVecEnv(config, env_fn)
+        created.fakes = envs
+        return created
+
+    yield make_pool
+    # Let hung steps return so the device threads exit
+    release.set()
+
+def step(pool):
+    pool.step_async(np.zeros((pool.num_envs,) + pool.action_space.shape, dtype=np.float32))
+    return pool.step_wait()
+
+@pytest.mark.parametrize('mode', ['raise', 'hang', 'check'])
+def test_failed_device_is_masked(pool, mode):
+    pool = pool()
+    pool.reset()
+    step(pool)
+    if mode == 'check':
+        pool.fakes[1].stimulator.error = ConnectionError("no response")
+    else:
+        pool.fakes[1].mode = mode
+    obs, rewards, dones, infos = step(pool)
+
+    assert list(pool.active) == [True, False, True]
+    assert dones[1] and not dones[0] and not dones[2]
+    assert infos[1]['device_failed'] and infos[1]['TimeLimit.truncated']
+    # The episode ends on the last observation the device returned
+    np.testing.assert_array_equal(infos[1]['terminal_observation'], np.full(pool.observation_space.shape, 2.0))
+    assert np.all(obs[1] == 0.0) and rewards[1] == 0.0
+    assert np.all(obs[0] == 1.0) and np.all(obs[2] == 3.0)
+    assert list(rewards[[0, 2]]) == [1.0, 3.0]
+
+    steps = pool.fakes[1].steps
+    obs, rewards, dones, infos = step(pool)
+    assert infos[1] == {'masked': True} and not dones[1]
+    assert np.all(obs[1] == 0.0) and rewards[1] == 0.0
+    assert pool.fakes[1].steps == steps
+    assert pool.fakes[0].steps == pool.fakes[2].steps == 3
+    pool.close()
+
+def test_hung_devices_share_one_timeout(pool):
+    pool = pool()
+    pool.reset()
+    pool.fakes[0].mode = pool.fakes[1].mode = 'hang'
+    start = time.monotonic()
+    step(pool)
+    elapsed = time.monotonic() - start
+    assert list(pool.active) == [False, False, True]
+    assert 0.2 <= elapsed < 0.35
+    pool.close()
+
+def test_pool_raises_once_every_device_failed(pool):
+    pool = pool()
+    pool.reset()
+    pool.fakes[0].mode = 'raise'
+    step(pool)
+    pool.fakes[1].mode = 'hang'
+    pool.fakes[2].mode = 'raise'
+    with pytest.raises(RuntimeError, match="Every device"):
+        step(pool)
+    assert not pool.active.any()
+    pool.close()
+
+def test_stop_on_failure(pool):
+    pool = pool(stop_on_failure=True)
+    pool.reset()
+    step(pool)
+    pool.fakes[2].mode = 'raise'
+    with pytest.raises(RuntimeError, match="stop_on_failure"):
+        step(pool)
+    pool.close()
+
+@pytest.mark.parametrize('async_io', [True, False])
+def test_unplugged_serial_device_is_masked(config, async_io):
+    emulators = [PtySubstrateEmulator(seed=i).start() for i in range(3)]
+    config['hardware'].update(devices=[emulator.port for emulator in emulators], async_io=async_io)
+    config['experiment']['max_steps'] = 10000
+    pool = DevicePoolVecEnv(config)
+    try:
+        pool.reset()
+        for _ in range(5):
+            step(pool)
+        assert pool.active.all()
+
+        emulators[1].stop()
+        # The serial engine notices on its own thread, so allow a few steps for check() to see it
+        for _ in range(200):
+            _, _, dones, infos = step(pool)
+            if not pool.active.all():
+                break
+            time.sleep(0.005)
+        assert list(pool.active) == [True, False, True]
+        assert dones[1] and infos[1]['device_failed']
+        _, _, dones, infos = step(pool)
+        assert infos[1] == {'masked': True} and not dones.any()
+    finally:
+        pool.close()
+        for emulator in emulators:
+            emulator.stop()
@@ -0,0 +1,67 @@
+import time
+import numpy as np
+import pytest
+import serial
+from conftest import wait_until
+from src.hardware import protocol
+from src.hardware.emulator import PtySubstrateEmulator
+from src.hardware.stimulator import SerialStimulator, electrode_coupling
+
+FREQUENCIES = np.array([10.0, 20.0, 30.0])
+AMPLITUDES = np.array([1.0, 2.0, 0.5])
+
+def expected_state(record_channels, repeats=1):
+    target = electrode_coupling(len(FREQUENCIES), record_channels) @ (np.sin(FREQUENCIES / 10.0) * AMPLITUDES)
+    return target * (1 - 0.9 ** repeats)
+
+def read_decoded(ser, decoder, count, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    samples = []
+    while len(samples) < count and time.monotonic() < deadline:
+        samples += decoder.feed(ser.read(ser.in_waiting or 1))
+    return samples
+
+def test_ascii_multi_channel_stim():
+    with PtySubstrateEmulator(mode='reply', binary=False, noise_std=0.0, record_channels=2) as emulator:
+        with serial.Serial(emulator.port, timeout=1.0) as ser:
+            pairs = ":".join(f"{f:.2f}:{a:.2f}" for f, a in zip(FREQUENCIES, AMPLITUDES))
+            ser.write(f"STIM:{pairs}\n".encode())
+            sample = np.array(ser.readline().split(b","), dtype=float)
+    np.testing.assert_allclose(sample, expected_state(2), atol=1e-6)
+
+def test_binary_multi_channel_stim():
+    with PtySubstrateEmulator(mode='reply', noise_std=0.0, record_channels=4) as emulator:
+        with serial.Serial(emulator.port, timeout=0.05) as ser:
+            assert protocol.negotiate(ser) == 'binary'
+            decoder = protocol.BinarySampleDecoder(channels=4)
+            samples = []
+            for seq in range(2):
+                ser.write(protocol.encode_stim(seq, FREQUENCIES, AMPLITUDES))
+                samples += read_decoded(ser, decoder, 1)
+    assert emulator.commands_received == 2
+    np.testing.assert_allclose(samples[0], expected_state(4), atol=1e-6)
+    np.testing.assert_allclose(samples[1], expected_state(4, repeats=2), atol=1e-6)
+
+def test_malformed_stim_is_ignored():
+    with PtySubstrateEmulator(mode='reply', binary=False, noise_std=0.0) as emulator:
+        with serial.Serial(emulator.port, timeout=0.2) as ser:
+            ser.write(b"STIM:10:1:20\nSTIM:x:1\nSTIM:10.00:1.00\n")
+            assert float(ser.readline()) == pytest.approx(0.1 * np.sin(1.0), abs=1e-6)
+    assert emulator.commands_received == 1
+
+@pytest.mark.parametrize('protocol_name', ['ascii', 'binary'])
+def test_serial_stimulator_multi_channel(config, protocol_name):
+    config['hardware'].update(protocol=protocol_name, async_io=True)
+    config['hardware']['electrodes'].update(stim_channels=3, record_channels=2)
+    with PtySubstrateEmulator(mode='reply', binary=True, noise_std=0.0, record_channels=2) as emulator:
+        config['hardware']['port'] = emulator.port
+        stimulator = SerialStimulator(config)
+        try:
+            stimulator.apply_stimulation(FREQUENCIES, AMPLITUDES)
+            assert wait_until(lambda: len(stimulator.io.samples) == 1)
+            _, values = stimulator.read_samples()
+        finally:
+            stimulator.close()
+    assert values.shape == (1, 2)
+    # ASCII commands carry two decimals
+    np.testing.assert_allclose(values[0], expected_state(2), atol=1e-3)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from src.utils.features import BandPower, FeatureExtractor, SpikeDetector
+
+# Chunks of 1 sample, shorter than, equal to and longer than the 64-sample window
+CHUNKS = [1, 40, 64, 150, 33, 1, 63, 100]
+
+def split(data, sizes):
+    bounds = np.cumsum([0] + sizes)
+    return [data[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+@pytest.fixture
+def signal():
+    rng = np.random.default_rng(0)
+    t = np.arange(sum(CHUNKS)) / 20.0
+    return np.column_stack([np.sin(2 * np.pi * 2.0 * t), 0.5 * np.sin(2 * np.pi * 6.0 * t)]) + 0.1 * rng.standard_normal((len(t), 2))
+
+def reference_band_power(data, fs, bands, window):
+    # Mean-square one-sided DFT amplitude of the zero-padded last `window` samples
+    padded = np.concatenate([np.zeros((window - 1, data.shape[1])), data])
+    frequencies = np.arange(window // 2 + 1) * fs / window
+    scale = np.where((np.arange(window // 2 + 1) == 0) | (2 * np.arange(window // 2 + 1) == window), 1.0, 2.0)
+    powers = []
+    for n in range(len(data)):
+        spectrum = np.abs(np.fft.rfft(padded[n:n + window], axis=0)) ** 2 * scale[:, None] / window ** 2
+        powers.append([[spectrum[(frequencies >= low) & (frequencies <= high), c].sum() for low, high in bands]
+                       for c in range(data.shape[1])])
+    return np.array(powers)
+
+def test_band_power_chunks_match_steps(signal):
+    bands = [[0.0, 1.0], [1.5, 2.5], [5.0, 7.0]]
+    chunked, stepped = BandPower(20.0, bands, window=64), BandPower(20.0, bands, window=64)
+    processed = np.concatenate([chunked.process(chunk) for chunk in split(signal, CHUNKS)])
+    steps = np.array([stepped.step(sample) for sample in signal])
+    assert processed.shape == (len(signal), 2, 3)
+    np.testing.assert_allclose(processed, steps, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(processed, reference_band_power(signal, 20.0, bands, 64), rtol=1e-9, atol=1e-12)
+
+def test_band_power_of_a_sine():
+    # A sine of amplitude 2 exactly on a bin: power A^2 / 2 once the window is full
+    t = np.arange(128) / 64.0
+    power = BandPower(64.0, [[7.0, 9.0]], window=64).process(2.0 * np.sin(2 * np.pi * 8.0 * t)[:, None])
+    np.testing.assert_allclose(power[63:, 0, 0], 2.0, rtol=1e-9)
+
+def test_spike_detector_chunks_match_steps(signal):
+    data = signal.copy()
+    data[[150, 152, 300], 0] += 5.0
+    chunked = SpikeDetector(20.0, threshold=4.0, time_constant=2.0, refractory=0.2)
+    stepped = SpikeDetector(20.0, threshold=4.0, time_constant=2.0, refractory=0.2)
+    processed = np.concatenate([chunked.process(chunk) for chunk in split(data, CHUNKS)])
+    steps = np.array([stepped.step(sample) for sample in data])
+    np.testing.assert_array_equal(processed, steps)
+    # The second spike falls in the refractory period of the first
+    assert processed[150, 0] and not processed[152, 0] and processed[300, 0]
+
+def test_feature_extractor_chunks_match_steps(signal):
+    settings = dict(spikes={'threshold': 4.0, 'time_constant': 2.0}, spike_rate={'time_constant': 5.0},
+                    band_power={'bands': [[1.0, 3.0]], 'window': 64})
+    chunked, stepped = FeatureExtractor(20.0, **settings), FeatureExtractor(20.0, **settings)
+    processed = np.concatenate([chunked.process(chunk, axis=0) for chunk in split(signal, CHUNKS)])
+    steps = np.array([stepped.step(sample) for sample in signal])
+    assert chunked.names == ['spikes', 'spike_rate', 'power_1-3Hz']
+    np.testing.assert_allclose(processed, steps, rtol=1e-9, atol=1e-12)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from scipy import signal
+from src.utils.filters import FilterChain
+
+def make_chain(**kwargs):
+    return FilterChain(fs=1000, **kwargs).add_low_pass(30).add_notch(50).add_moving_average(5)
+
+@pytest.fixture
+def data():
+    return np.random.default_rng(0).standard_normal((3, 700))
+
+def test_chunked_process_matches_one_pass(data):
+    chain = make_chain()
+    expected = signal.sosfilt(chain.sos, data, axis=-1)
+    # Block matrices below block_limit, sosfilt above it, and a single sample
+    sizes = [1, 7, 64, 200, 1, 128, 299]
+    bounds = np.cumsum([0] + sizes)
+    chunks = [chain.process(data[:, start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])]
+    np.testing.assert_allclose(np.concatenate(chunks, axis=-1), expected, atol=1e-10)
+
+def test_step_shares_state_with_process(data):
+    chain = make_chain()
+    expected = signal.sosfilt(chain.sos, data, axis=-1)
+    first = chain.process(data[:, :100])
+    stepped = np.column_stack([chain.step(data[:, i]) for i in range(100, 150)])
+    rest = chain.process(data[:, 150:])
+    np.testing.assert_allclose(np.concatenate([first, stepped, rest], axis=-1), expected, atol=1e-10)
+
+def test_scalar_step(data):
+    chain = make_chain()
+    expected = signal.sosfilt(chain.sos, data[0])
+    outputs = [chain.step(float(x)) for x in data[0, :50]]
+    assert isinstance(outputs[0], float)
+    np.testing.assert_allclose(outputs, expected[:50], atol=1e-10)
+
+def test_reset_one_channel(data):
+    chain = make_chain()
+    chain.process(data[:, :100])
+    chain.reset(1)
+    outputs = chain.process(data[:, 100:200])
+    fresh = make_chain().process(data[1:2, 100:200])
+    np.testing.assert_allclose(outputs[1], fresh[0], atol=1e-10)
+    assert not np.allclose(outputs[0], make_chain().process(data[0:1, 100:200])[0])
+
+def test_steady_state_starts_without_transient():
+    chain = make_chain(steady_state=True)
+    np.testing.assert_allclose(chain.process(np.full(50, 2.0)), 2.0, atol=1e-8)
+
+def test_from_config():
+    chain = FilterChain.from_config({'fs': 1000, 'low_pass': {'cutoff': 30}, 'moving_average': 1})
+    np.testing.assert_array_equal(chain.sos, FilterChain(1000).add_low_pass(30).sos)
+    assert FilterChain(1000).process([1.0, 2.0]).tolist() == [1.0, 2.0]
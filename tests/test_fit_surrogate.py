@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import yaml
+from conftest import ROOT
+from src.utils.logger import LOG_DTYPE, NpyAppendWriter
+
+def write_log(path, steps=300, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(steps, dtype=LOG_DTYPE)
+    rows['step'] = np.arange(steps)
+    rows['frequency'] = rng.uniform(1.0, 100.0, steps)
+    rows['amplitude'] = rng.uniform(0.0, 3.3, steps)
+    rows['response'] = np.sin(rows['frequency'] / 10.0) * rows['amplitude'] + rng.normal(0.0, 0.01, steps)
+    writer = NpyAppendWriter(path, LOG_DTYPE)
+    writer.write(rows)
+    writer.close()
+
+def run_script(config, tmp_path):
+    log = str(tmp_path / 'log.npy')
+    write_log(log)
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+    return subprocess.run([sys.executable, os.path.join(ROOT, 'scripts', 'fit_surrogate.py'), log,
+                           '--config', str(config_path), '--out', str(tmp_path / 'surrogate.npz')],
+                          capture_output=True, text=True, timeout=120)
+
+def test_fit_with_validation_split(config, tmp_path):
+    result = run_script(config, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert "one-step R^2" in result.stdout
+    assert os.path.exists(tmp_path / 'surrogate.npz')
+
+def test_fit_without_validation_split(config, tmp_path):
+    config['surrogate']['validation_fraction'] = 0
+    result = run_script(config, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert "no validation split" in result.stdout
+    assert os.path.exists(tmp_path / 'surrogate.npz')
@@ -0,0 +1,43 @@
+import collections
+import numpy as np
+import pytest
+from src.env.history import HistoryBuffer
+
+def test_view_is_the_last_window_oldest_first():
+    history = HistoryBuffer(4)
+    reference = collections.deque([0.0] * 4, maxlen=4)
+    for value in range(1, 11):
+        history.push(value)
+        reference.append(value)
+        assert history.view().tolist() == list(reference)
+
+def test_view_is_read_only_and_does_not_copy():
+    history = HistoryBuffer(3)
+    history.push(1.0)
+    view = history.view()
+    assert np.shares_memory(view, history._data)
+    with pytest.raises(ValueError):
+        view[0] = 5.0
+
+def test_batched_history_with_channels():
+    history = HistoryBuffer(3, batch_size=2, sample_shape=(2,))
+    samples = np.arange(5 * 2 * 2, dtype=np.float32).reshape(5, 2, 2)
+    for sample in samples:
+        history.push(sample)
+    assert history.view().shape == (2, 3, 2)
+    np.testing.assert_array_equal(history.view(), samples[2:].transpose(1, 0, 2))
+
+    history.reset([1])
+    np.testing.assert_array_equal(history.view()[0], samples[2:, 0])
+    assert not history.view()[1].any()
+
+def test_reset_keeps_the_previous_view_intact():
+    history = HistoryBuffer(3)
+    for value in (1.0, 2.0, 3.0):
+        history.push(value)
+    terminal = history.view()
+    history.reset()
+    history.push(7.0)
+    # A terminal observation handed out before the reset is still the old history
+    assert terminal.tolist() == [1.0, 2.0, 3.0]
+    assert history.view().tolist() == [0.0, 0.0, 7.0]
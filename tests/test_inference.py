@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from stable_baselines3 import PPO
+from src.env.bio_env import BioInterfaceEnv
+from src.model.inference import NumpyPolicy, export_policy, verify_policy
+from src.model.lstm_policy import LSTMExtractor, RecurrentActor
+from src.model.recurrent import RecurrentAgent
+
+@pytest.fixture
+def env(config):
+    env = BioInterfaceEnv(config)
+    yield env
+    env.close()
+
+def observations(env, count=32):
+    return np.random.default_rng(0).uniform(-2, 2, (count,) + env.observation_space.shape).astype(np.float32)
+
+def test_numpy_export_matches_predict(env):
+    model = PPO("MlpPolicy", env, seed=0, device='cpu')
+    assert verify_policy(export_policy(model, 'numpy'), model, observations(env)) < 1e-5
+
+def test_window_lstm_numpy_export_is_refused(env):
+    model = PPO("MlpPolicy", env, seed=0, device='cpu', policy_kwargs=dict(features_extractor_class=LSTMExtractor))
+    with pytest.raises(ValueError, match="torchscript"):
+        export_policy(model, 'numpy')
+    assert verify_policy(export_policy(model, 'torchscript'), model, observations(env)) < 1e-5
+
+def test_recurrent_export_steps_like_recurrent_actor(env, config, tmp_path):
+    config['rl_agent']['recurrent'] = {'num_layers': 2, 'hidden_dim': 16}
+    agent = RecurrentAgent(env, config)
+    path = str(tmp_path / "actor.npz")
+    agent.export(path)
+    policy = NumpyPolicy.load(path)
+    reference = RecurrentActor(agent.policy.extractor, agent.policy.actor)
+    low, high = env.action_space.low, env.action_space.high
+    for i, observation in enumerate(observations(env)):
+        if i == 20:
+            policy.reset()
+            reference.state = agent.policy.extractor.initial_state(1)
+        expected = np.clip(reference.act(observation[None]).numpy()[0], low, high)
+        np.testing.assert_allclose(policy.act(observation), expected, atol=1e-5)
+    with pytest.raises(ValueError):
+        policy.act(observations(env, 2))
@@ -0,0 +1,60 @@
+import gc
+import weakref
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import wait_until
+from src.utils.logger import ExperimentLogger
+
+def rows_on_disk(path):
+    with open(path) as f:
+        # The header is written along with the first rows
+        return max(sum(1 for _ in f) - 1, 0)
+
+def test_full_buffer_is_written(tmp_path):
+    with ExperimentLogger(str(tmp_path), buffer_size=4, flush_interval=None) as logger:
+        for step in range(9):
+            logger.log_step(step, (10.0, 1.0), 0.5, 0.1)
+        assert wait_until(lambda: rows_on_disk(logger.filepath) == 8)
+    assert rows_on_disk(logger.filepath) == 9
+
+def test_partial_buffer_is_written_after_flush_interval(tmp_path):
+    with ExperimentLogger(str(tmp_path), buffer_size=1024, flush_interval=0.05) as logger:
+        for step in range(3):
+            logger.log_step(step, (10.0, 1.0), 0.5, 0.1)
+        # No further rows arrive: the flusher has to pick these up on its own
+        assert wait_until(lambda: rows_on_disk(logger.filepath) == 3, timeout=1.0)
+        logger.log_step(3, (20.0, 2.0), 0.25, 0.2)
+        assert wait_until(lambda: rows_on_disk(logger.filepath) == 4, timeout=1.0)
+        data = pd.read_csv(logger.filepath)
+        np.testing.assert_array_equal(data['step'], np.arange(4))
+        assert data['frequency'].iloc[-1] == 20.0
+
+def test_npy_log_round_trip(tmp_path):
+    with ExperimentLogger(str(tmp_path), filename="data_log.npy", buffer_size=8) as logger:
+        for step in range(20):
+            logger.log_step(step, (float(step), 1.0), 0.5, -1.0)
+    data = np.load(logger.filepath)
+    np.testing.assert_array_equal(data['step'], np.arange(20))
+    np.testing.assert_array_equal(data['frequency'], np.arange(20.0))
+
+def test_log_step_after_close_raises(tmp_path):
+    logger = ExperimentLogger(str(tmp_path), flush_interval=None)
+    logger.log_step(0, (10.0, 1.0), 0.5, 0.1)
+    logger.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        logger.log_step(1, (10.0, 1.0), 0.5, 0.1)
+    assert rows_on_disk(logger.filepath) == 1
+
+def test_unreferenced_logger_is_collected_and_flushed(tmp_path):
+    logger = ExperimentLogger(str(tmp_path), flush_interval=0.01)
+    for step in range(5):
+        logger.log_step(step, (10.0, 1.0), 0.5, 0.1)
+    ref, filepath, flusher = weakref.ref(logger), logger.filepath, logger._flusher
+    del logger
+    gc.collect()
+    # The flusher may hold it for an instant while reading flush_interval
+    assert wait_until(lambda: ref() is None)
+    flusher.join(timeout=1.0)
+    assert not flusher.is_alive()
+    assert rows_on_disk(filepath) == 5
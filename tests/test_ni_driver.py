@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from src.hardware import fake_nidaqmx
+from src.hardware.ni_driver import NIDaqDriver
+
+@pytest.fixture
+def clock():
+    clock = fake_nidaqmx.SimulatedClock()
+    fake_nidaqmx.reset_devices(clock=clock, sleep=clock.sleep, seed=0)
+    return clock
+
+@pytest.fixture
+def driver(config, clock):
+    config['hardware']['ni_mode'] = 'streaming'
+    driver = NIDaqDriver(config, daq_module=fake_nidaqmx)
+    yield driver
+    driver.close()
+
+def test_read_samples_drains_what_was_acquired(driver, clock):
+    clock.sleep(3 * driver.samples_per_step / driver.sample_rate)
+    samples = driver.read_samples()
+    assert len(samples) == 3 * driver.samples_per_step
+    assert len(driver.read_samples()) == 0
+
+def test_reader_rejects_misshaped_buffer(driver, clock):
+    clock.sleep(driver.samples_per_step / driver.sample_rate)
+    with pytest.raises(fake_nidaqmx.DaqError):
+        driver.reader.read_many_sample(np.zeros(driver.ai_buffer_size), number_of_samples_per_channel=5)
+
+def test_read_samples_keeps_newest_on_overflow(driver, clock):
+    device = fake_nidaqmx.get_device(driver.device_name)
+    # A driver buffer larger than ai_buffer_size, as real devices round it up
+    device.ai_capacity = None
+    clock.sleep(2.5 * driver.ai_buffer_size / driver.sample_rate)
+    device.advance()
+    newest = device.ai_samples[-driver.ai_buffer_size:].copy()
+    samples = driver.read_samples()
+    np.testing.assert_array_equal(samples, newest)
+    assert len(device.ai_samples) == 0
+
+def unplugged(*args, **kwargs):
+    raise fake_nidaqmx.DaqError("Device not present")
+
+@pytest.mark.parametrize('ni_mode', ['on_demand', 'streaming'])
+def test_check_raises_the_last_failure(config, clock, monkeypatch, ni_mode):
+    config['hardware']['ni_mode'] = ni_mode
+    driver = NIDaqDriver(config, daq_module=fake_nidaqmx)
+    driver.apply_stimulation(10.0, 1.0)
+    clock.sleep(driver.samples_per_step / driver.sample_rate)
+    driver.read_response()
+    driver.check()
+    # The step carries on with the held or zero response, but the pool learns of it
+    reader = driver.reader if ni_mode == 'streaming' else driver.task_ai
+    monkeypatch.setattr(reader, 'read_many_sample' if ni_mode == 'streaming' else 'read', unplugged)
+    clock.sleep(driver.samples_per_step / driver.sample_rate)
+    driver.read_response()
+    with pytest.raises(ConnectionError, match="Device not present"):
+        driver.check()
+    driver.close()
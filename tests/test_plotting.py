@@ -0,0 +1,84 @@
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils.logger import LOG_DTYPE, NpyAppendWriter
+from src.utils.plotting import (M4Decimator, RollingMean, decimate_log, phase_space_counts,
+                                plot_phase_space_density, plot_training_results_decimated)
+
+def chunks_of(values, sizes):
+    bounds = np.cumsum([0] + list(sizes))
+    return [values[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+def reference_m4(values, width):
+    # First, last, minimum and maximum (earliest on ties) of every run of `width` rows
+    x, y = [], []
+    for start in range(0, len(values), width):
+        run = values[start:start + width]
+        picked = sorted({0, len(run) - 1, int(np.argmin(run)), int(np.argmax(run))})
+        x.extend(start + i for i in picked)
+        y.extend(run[i] for i in picked)
+    return np.array(x, dtype=np.float64), np.array(y)
+
+def test_m4_decimator_matches_a_one_pass_reference():
+    values = np.cumsum(np.random.default_rng(0).standard_normal(10000))
+    decimator = M4Decimator(buckets=50)
+    for chunk in chunks_of(values, [1, 999, 37, 5000, 3963]):
+        decimator.update(chunk)
+    assert len(values) / decimator.width <= 2 * 50
+    x, y = decimator.points()
+    expected_x, expected_y = reference_m4(values, decimator.width)
+    np.testing.assert_array_equal(x, expected_x)
+    np.testing.assert_array_equal(y, expected_y)
+    assert y.min() == values.min() and y.max() == values.max()
+
+def test_m4_decimator_skips_nans():
+    values = np.arange(10.0)
+    values[[0, 4]] = np.nan
+    decimator = M4Decimator(buckets=100)
+    decimator.update(values)
+    x, y = decimator.points()
+    np.testing.assert_array_equal(x, np.flatnonzero(~np.isnan(values)))
+    np.testing.assert_array_equal(y, values[~np.isnan(values)])
+
+def test_rolling_mean_matches_pandas():
+    values = np.random.default_rng(1).standard_normal(500)
+    rolling = RollingMean(window=20)
+    means = np.concatenate([rolling.update(chunk) for chunk in chunks_of(values, [1, 5, 14, 300, 180])])
+    np.testing.assert_allclose(means, pd.Series(values).rolling(20, min_periods=1).mean())
+
+def write_log(path, steps, seed):
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(steps, dtype=LOG_DTYPE)
+    rows['step'] = np.arange(steps)
+    for name in ('frequency', 'amplitude', 'response', 'reward'):
+        rows[name] = rng.standard_normal(steps)
+    writer = NpyAppendWriter(str(path), LOG_DTYPE)
+    writer.write(rows)
+    writer.close()
+    return rows
+
+@pytest.mark.parametrize('chunk_rows', [1, 7, 1000])
+def test_phase_space_counts(tmp_path, chunk_rows):
+    first = write_log(tmp_path / 'a.npy', 60, seed=0)
+    second = write_log(tmp_path / 'b.npy', 40, seed=1)
+    value_range = (-4.0, 4.0)
+    counts, _ = phase_space_counts([str(tmp_path / 'a.npy'), str(tmp_path / 'b.npy')], value_range, 16, chunk_rows)
+    expected = sum(np.histogram2d(rows['response'][:-1], rows['response'][1:], 16, [value_range, value_range])[0]
+                   for rows in (first, second))
+    # Pairs never span the two logs
+    assert counts.sum() == 59 + 39
+    np.testing.assert_array_equal(counts, expected)
+
+def test_decimated_plots_render_headless(tmp_path):
+    rows = write_log(tmp_path / 'a.npy', 5000, seed=2)
+    series = decimate_log(str(tmp_path / 'a.npy'), buckets=100, reward_window=50, chunk_rows=999)
+    assert set(series) == {'frequency', 'amplitude', 'response', 'reward', 'reward_mean'}
+    x, y = series['reward']
+    assert len(x) <= 4 * 2 * 100 and y.max() == rows['reward'].max()
+    plot_training_results_decimated(str(tmp_path / 'a.npy'), str(tmp_path / 'training.png'), buckets=100,
+                                    reward_window=50, chunk_rows=999)
+    plot_phase_space_density(str(tmp_path / 'a.npy'), str(tmp_path / 'phase.png'), bins=32)
+    assert (tmp_path / 'training.png').stat().st_size > 0
+    assert (tmp_path / 'phase.png').stat().st_size > 0
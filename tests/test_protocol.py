@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import serial
+from src.hardware.emulator import PtySubstrateEmulator
+from src.hardware.protocol import (FRAME_SAMPLES, FRAME_STIM, MAX_STIM_CHANNELS, STIM_PAYLOAD, BinarySampleDecoder,
+                                   FrameDecoder, encode_frame, encode_samples, encode_stim, negotiate)
+from src.hardware.stimulator import SerialStimulator
+
+def test_frame_round_trip():
+    decoder = FrameDecoder()
+    frames = decoder.feed(encode_stim(7, 12.5, 0.75) + encode_samples(8, [0.5, -1.25, 3.0]))
+    assert [(t, s) for t, s, _ in frames] == [(FRAME_STIM, 7), (FRAME_SAMPLES, 8)]
+    assert STIM_PAYLOAD.unpack(frames[0][2]) == (12.5, 0.75)
+    assert np.frombuffer(frames[1][2], dtype='<f4').tolist() == [0.5, -1.25, 3.0]
+    assert decoder.crc_errors == 0
+
+def test_frame_split_across_chunks():
+    decoder = BinarySampleDecoder()
+    data = encode_samples(0, [1.0, 2.0]) + encode_samples(1, [3.0])
+    values = []
+    for i in range(len(data)):
+        values += decoder.feed(data[i:i + 1])
+    assert values == [1.0, 2.0, 3.0]
+
+def test_corrupted_frame_is_rejected():
+    decoder = FrameDecoder()
+    frame = bytearray(encode_samples(0, [1.0, 2.0]))
+    frame[-3] ^= 0xFF
+    frames = decoder.feed(bytes(frame) + encode_samples(1, [3.0]))
+    assert [(t, s) for t, s, _ in frames] == [(FRAME_SAMPLES, 1)]
+    assert decoder.crc_errors >= 1
+    assert decoder.frames == 1
+
+def test_resync_after_garbage():
+    decoder = BinarySampleDecoder()
+    # Noise, including a stray half and a full sync word with an impossible header after it
+    garbage = b"\x00\xa5noise\xa5\x5a\x02\xff\xff\xff\xff" + bytes(range(40))
+    values = decoder.feed(garbage + encode_samples(0, [1.5]) + b"\x13\x37" + encode_samples(1, [2.5]))
+    assert values == [1.5, 2.5]
+    assert decoder.dropped_frames == 0
+
+def test_sequence_gap_counts_dropped_frames():
+    decoder = FrameDecoder()
+    decoder.feed(encode_samples(0, [0.0]) + encode_samples(3, [0.0]) + encode_frame(FRAME_STIM, 9, b""))
+    assert decoder.dropped_frames == 2
+
+def test_negotiate_binary_firmware():
+    with PtySubstrateEmulator(binary=True, seed=0) as emulator:
+        with serial.Serial(emulator.port, timeout=0.05) as ser:
+            assert negotiate(ser) == 'binary'
+
+def test_negotiate_falls_back_to_ascii():
+    with PtySubstrateEmulator(binary=False, seed=0) as emulator:
+        with serial.Serial(emulator.port, timeout=0.05) as ser:
+            assert negotiate(ser, timeout=0.2) == 'ascii'
+            # The legacy stream is still readable afterwards
+            ser.reset_input_buffer()
+            ser.readline()
+            float(ser.readline())
+
+def test_stim_frame_channel_limit():
+    frequency = np.arange(MAX_STIM_CHANNELS, dtype=np.float32)
+    frames = FrameDecoder().feed(encode_stim(0, frequency, frequency))
+    assert len(frames) == 1 and len(frames[0][2]) == MAX_STIM_CHANNELS * STIM_PAYLOAD.size
+    with pytest.raises(ValueError, match="stimulation channels"):
+        encode_stim(0, np.zeros(MAX_STIM_CHANNELS + 1), np.zeros(MAX_STIM_CHANNELS + 1))
+
+def test_binary_stimulator_rejects_too_many_channels(config):
+    with PtySubstrateEmulator(binary=True, seed=0) as emulator:
+        config['hardware'].update(port=emulator.port, protocol='binary')
+        config['hardware']['electrodes']['stim_channels'] = MAX_STIM_CHANNELS + 1
+        with pytest.raises(ValueError, match="at most"):
+            SerialStimulator(config)
@@ -0,0 +1,30 @@
+import numpy as np
+import torch
+from src.env.vec_bio_env import BioInterfaceVecEnv
+from src.model.recurrent import RecurrentAgent, gae
+
+def test_gae_stops_at_episode_ends():
+    rewards = torch.ones(1, 3)
+    values = torch.zeros(1, 4)
+    advantages, returns = gae(rewards, values, torch.tensor([[0.0, 1.0, 0.0]]), gamma=0.5, gae_lambda=1.0)
+    np.testing.assert_allclose(advantages.numpy(), [[1.5, 1.0, 1.0]])
+    np.testing.assert_allclose(returns.numpy(), advantages.numpy())
+
+def test_recurrent_agent_trains_and_saves(config, tmp_path):
+    config['rl_agent']['recurrent'] = {'enabled': True, 'rollout_steps': 16, 'bptt': 4, 'hidden_dim': 16,
+                                       'features_dim': 16}
+    env = BioInterfaceVecEnv(config, 3)
+    agent = RecurrentAgent(env, config)
+    before = [p.detach().clone() for p in agent.policy.parameters()]
+    agent.train(total_timesteps=100)
+    assert agent.num_timesteps == 3 * 16 * 3
+    assert all(not torch.equal(a, b) for a, b in zip(before, agent.policy.parameters()))
+
+    path = agent.save(str(tmp_path / "recurrent"))
+    restored = RecurrentAgent(env, config)
+    restored.load(path)
+    assert restored.num_timesteps == agent.num_timesteps
+    observations = torch.as_tensor(env.reset())
+    for a, b in zip(agent.policy.state_dict().values(), restored.policy.state_dict().values()):
+        assert torch.equal(a, b)
+    assert restored.actor.act(observations, np.ones(3)).shape == (3, 2)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from src.env.bio_env import scale_action
+from src.env.dataset import TransitionDataset
+from src.utils.logger import LOG_DTYPE, CsvWriter, NpyAppendWriter
+from src.utils.replay import ReplayLog
+
+def make_rows(steps, seed):
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(len(steps), dtype=LOG_DTYPE)
+    rows['step'] = steps
+    rows['frequency'] = rng.uniform(1.0, 100.0, len(steps))
+    # Only the lower half of the amplitude range is ever used, so some bins stay empty
+    rows['amplitude'] = rng.uniform(0.0, 1.5, len(steps))
+    rows['response'] = rng.standard_normal(len(steps))
+    rows['reward'] = rng.standard_normal(len(steps))
+    return rows
+
+@pytest.fixture
+def sessions(tmp_path):
+    # Two episodes in the .npy session (the step counter restarts at row 7), one in the .csv session
+    first = make_rows(np.r_[0:7, 0:6], seed=0)
+    second = make_rows(np.arange(9), seed=1)
+    for path, writer_class, rows in [(tmp_path / 'a.npy', NpyAppendWriter, first),
+                                     (tmp_path / 'b.csv', CsvWriter, second)]:
+        writer = writer_class(str(path), LOG_DTYPE)
+        writer.write(rows)
+        writer.close()
+    return [str(tmp_path / 'a.npy'), str(tmp_path / 'b.csv')], np.concatenate([first, second])
+
+@pytest.mark.parametrize('chunk_rows', [3, 1000])
+def test_sessions_read_as_one_sequence(sessions, chunk_rows):
+    paths, rows = sessions
+    log = ReplayLog(paths, (1.0, 100.0), (0.0, 3.3), chunk_rows=chunk_rows)
+    assert len(log) == 22
+    np.testing.assert_array_equal(log.episode_starts, [0, 7, 13])
+    np.testing.assert_array_equal(log.episode_start_of([0, 6, 7, 12, 13, 21]), [0, 0, 7, 7, 13, 13])
+    picked = np.array([[21, 0], [13, 12]])
+    for name in ('frequency', 'response', 'step'):
+        np.testing.assert_allclose(log.gather(name, picked), rows[name][picked])
+        assert log.value(name, 15) == pytest.approx(rows[name][15])
+
+def test_bin_index(sessions):
+    paths, rows = sessions
+    log = ReplayLog(paths, (1.0, 100.0), (0.0, 3.3), frequency_bins=4, amplitude_bins=4)
+    bins = log.bin_of(rows['frequency'], rows['amplitude'])
+    for b in range(16):
+        np.testing.assert_array_equal(log.rows_in_bin(b), np.flatnonzero(bins == b))
+    assert log.bin_of(50.0, 1.0) == log.bin_of(np.array([50.0]), np.array([1.0]))[0]
+    # Amplitudes above 1.65V were never logged: those bins borrow from the nearest filled one
+    assert not len(log.rows_in_bin(3))
+    nearest = log.rows_in_bin(3, nearest=True)
+    assert len(nearest) and np.all(bins[nearest] == 1)
+
+def naive_history(rows, start, end, window):
+    # The window of responses before row `end`, zero before the episode start
+    return np.array([rows['response'][i] if i >= start else 0.0 for i in range(end - window, end)], dtype=np.float32)
+
+def test_transition_dataset_batches(sessions, config):
+    paths, rows = sessions
+    config['environment']['observation_window'] = 4
+    log = ReplayLog(paths, (1.0, 100.0), (0.0, 3.3))
+    dataset = TransitionDataset(log, config)
+    indices = np.arange(len(log))
+    batch = dataset.batch(indices)
+    for t in indices:
+        start = max(s for s in (0, 7, 13) if s <= t)
+        np.testing.assert_allclose(batch['observations'][t], naive_history(rows, start, t, 4))
+        np.testing.assert_allclose(batch['next_observations'][t], naive_history(rows, start, t + 1, 4))
+    np.testing.assert_array_equal(np.flatnonzero(batch['dones']), [6, 12, 21])
+    np.testing.assert_allclose(batch['rewards'], rows['reward'].astype(np.float32))
+    expected = np.stack(scale_action(rows['frequency'], rows['amplitude'], config), axis=-1)
+    np.testing.assert_allclose(batch['actions'], expected, rtol=1e-6)
+
+    recomputed = TransitionDataset(log, config, reward_fn=lambda response: -np.abs(response))
+    np.testing.assert_allclose(recomputed.batch([3])['rewards'], [-abs(rows['response'][3])], rtol=1e-6)
+
+    # One shuffled pass visits every transition once
+    seen = np.concatenate([b['rewards'] for b in TransitionDataset(log, config, seed=0).iter_batches(5)])
+    np.testing.assert_allclose(np.sort(seen), np.sort(rows['reward'].astype(np.float32)))
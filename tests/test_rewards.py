@@ -0,0 +1,66 @@
+import collections
+import numpy as np
+import pytest
+from src.model.rewards import (Activity, RewardFunctions, SinusoidalTracking, Stability, TargetMatch,
+                               make_reward)
+
+@pytest.mark.parametrize('sample_shape', [(), (2,)])
+def test_stability_matches_np_var_over_the_window(sample_shape):
+    num_envs, window = 3, 8
+    stability = Stability(num_envs, window, sample_shape)
+    histories = [collections.deque(maxlen=window) for _ in range(num_envs)]
+    rng = np.random.default_rng(0)
+    # Resets at different times leave some envs growing while others are full
+    resets = {5: [1], 19: [0, 2], 40: None, 41: [1]}
+    for step in range(100):
+        index = resets.get(step, [])
+        if index is None:
+            stability.reset()
+            index = range(num_envs)
+        for i in index:
+            stability.reset(i)
+            histories[i].clear()
+        response = 100.0 + rng.standard_normal((num_envs,) + sample_shape)
+        reward = stability(response, np.full(num_envs, step))
+        for i, history in enumerate(histories):
+            history.append(response[i])
+            expected = -np.mean(np.var(np.array(history), axis=0)) if len(history) >= 2 else 0.0
+            assert reward[i] == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+def test_stability_matches_the_scalar_reference():
+    pipeline = make_reward({'environment': {'target_response_pattern': 'stable', 'observation_window': 10}})
+    history = []
+    for value in np.random.default_rng(1).uniform(0.0, 2.0, 30):
+        history = (history + [value])[-10:]
+        assert pipeline(value, len(history)) == pytest.approx(RewardFunctions.stability(history))
+
+def make_config(pattern, **reward):
+    return {'environment': {'target_response_pattern': pattern, 'observation_window': 10, 'reward': reward}}
+
+@pytest.mark.parametrize('pattern, term', [('constant', TargetMatch), ('sinusoidal', SinusoidalTracking),
+                                           ('activity', Activity), ('stable', Stability)])
+def test_make_reward_selects_the_pattern(pattern, term):
+    pipeline = make_reward(make_config(pattern), num_envs=4)
+    assert [type(t) for _, t in pipeline.terms] == [term]
+    assert pipeline(np.zeros(4), np.arange(4)).shape == (4,)
+
+def test_make_reward_adds_weighted_stability():
+    pipeline = make_reward(make_config('activity', stability_weight=0.5, stability_window=3))
+    (_, activity), (weight, stability) = pipeline.terms
+    assert isinstance(activity, Activity) and isinstance(stability, Stability)
+    assert weight == 0.5 and stability.window == 3
+    assert pipeline(1.0, 0) == 1.0
+    assert pipeline(3.0, 1) == pytest.approx(3.0 - 0.5 * np.var([1.0, 3.0]))
+    # 'stable' already is the stability term
+    assert len(make_reward(make_config('stable', stability_weight=0.5)).terms) == 1
+
+def test_make_reward_terms_match_the_scalar_references():
+    constant = make_reward(make_config('constant', target=1.0, tolerance=0.1))
+    sinusoidal = make_reward(make_config('sinusoidal', period=100))
+    for step, response in enumerate([0.95, 1.3, -0.2, 0.5]):
+        assert constant(response, step) == pytest.approx(RewardFunctions.target_match(response, 1.0, 0.1))
+        assert sinusoidal(response, step) == pytest.approx(RewardFunctions.sinusoidal_tracking(response, step, 100))
+
+def test_make_reward_rejects_unknown_patterns():
+    with pytest.raises(ValueError, match="target_response_pattern"):
+        make_reward(make_config('chaos'))
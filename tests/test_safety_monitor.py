@@ -0,0 +1,72 @@
+import logging
+import numpy as np
+import pytest
+from src.hardware.safety_monitor import SafetyMonitor
+
+def make_monitor(config, **limits):
+    config['hardware']['safety_limits'].update(limits)
+    return SafetyMonitor(config)
+
+def test_voltage_and_current_clamping(config):
+    monitor = make_monitor(config)
+    assert monitor.enforce(10.0, 7.5) == 5.0
+    assert monitor.enforce(10.0, -7.5) == -5.0
+    assert monitor.enforce(10.0, 2.0) == 2.0
+    assert monitor.clamp_counts['voltage'] == 2
+
+    # The current limit through the impedance is tighter: 0.01A * 200 Ohm = 2V
+    monitor = make_monitor(config, electrode_impedance=200.0)
+    np.testing.assert_array_equal(monitor.enforce(np.full(3, 10.0), np.array([-3.0, 1.5, 3.0])), [-2.0, 1.5, 2.0])
+
+def test_per_channel_limits(config):
+    monitor = make_monitor(config, max_voltage=[1.0, 2.0, 3.0])
+    amplitudes = np.array([[5.0, 5.0, 5.0], [-5.0, 0.5, 2.5]])
+    np.testing.assert_array_equal(monitor.enforce(np.ones((2, 3)), amplitudes),
+                                  [[1.0, 2.0, 3.0], [-1.0, 0.5, 2.5]])
+
+def test_slew_limit(config):
+    monitor = make_monitor(config, max_slew=0.5)
+    outputs = np.array([monitor.enforce(np.ones(2), np.array([4.0, -1.0])) for _ in range(10)])
+    steps = np.diff(np.vstack([np.zeros(2), outputs]), axis=0)
+    assert np.all(np.abs(steps) <= 0.5 + 1e-12)
+    np.testing.assert_allclose(outputs[0], [0.5, -0.5])
+    np.testing.assert_allclose(outputs[-1], [4.0, -1.0])
+
+def test_charge_budget_is_used_up_exactly(config):
+    monitor = make_monitor(config, electrode_impedance=1000.0, max_charge_density=100.0, max_current=1.0)
+    frequency = np.array([100.0, 0.01])
+    per_volt = monitor._charge_per_volt_hz * frequency
+    charge = np.zeros(2)
+    for step in range(20):
+        safe = monitor.enforce(frequency, np.array([5.0, 5.0]))
+        charge = charge * monitor._charge_decay + np.abs(safe) * per_volt
+        assert np.all(charge <= 100.0 + 1e-9)
+        np.testing.assert_allclose(monitor._charge, charge)
+    # The busy channel runs on exactly the budget, the slow one is never cut
+    np.testing.assert_allclose(charge[0], 100.0)
+    assert safe[1] == 5.0 and safe[0] < 5.0
+    assert monitor.clamp_counts['charge'] > 0
+
+@pytest.mark.parametrize('limits', [{}, {'max_slew': 0.3}, {'electrode_impedance': 1000.0, 'max_charge_density': 20.0,
+                                                           'max_current': 1.0, 'max_slew': 1.0}])
+def test_scalar_and_array_paths_agree(config, limits):
+    scalar, array = make_monitor(config, **limits), make_monitor(config, **limits)
+    rng = np.random.default_rng(0)
+    for frequency, amplitude in zip(rng.uniform(1, 100, 200), rng.uniform(-8, 8, 200)):
+        expected = array.enforce(frequency, np.array(amplitude))
+        assert scalar.enforce(frequency, float(amplitude)) == pytest.approx(expected, abs=1e-12)
+    assert scalar.clamp_counts == array.clamp_counts
+    assert scalar.violation_count == array.violation_count
+
+def test_warnings_are_rate_limited(config, caplog):
+    monitor = make_monitor(config, warning_interval=60.0)
+    with caplog.at_level(logging.WARNING, logger='src.hardware.safety_monitor'):
+        for _ in range(10):
+            monitor.enforce(10.0, 9.0)
+        assert len(caplog.records) == 1
+        # Once the interval has passed, the next warning reports what was held back
+        monitor._last_warning -= 60.0
+        monitor.enforce(10.0, 9.0)
+    assert len(caplog.records) == 2
+    assert "9 similar warnings suppressed" in caplog.records[1].getMessage()
+    assert monitor.violation_count == 11
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from src.hardware.scheduler import ControlLoopScheduler, PeriodicTimer, SimulatedClock
+
+PERIOD = 0.01
+STEP_TIME = 0.002
+INFERENCE_TIME = 0.003
+WAKEUP = 1e-4
+
+class TimedEnv:
+    """
+    Env whose steps take step_time of simulated time (slow_time for the steps in
+    slow_steps) and whose observation is the number of steps taken so far.
+    """
+    def __init__(self, clock, step_time=STEP_TIME, slow_steps=(), slow_time=0.0, episode_steps=1000):
+        self.clock = clock
+        self.step_time = step_time
+        self.slow_steps = slow_steps
+        self.slow_time = slow_time
+        self.episode_steps = episode_steps
+        self.n = 0
+        self.resets = 0
+        self.step_times = []
+        self.actions = []
+
+    def reset(self):
+        self.resets += 1
+        return np.array([self.n], dtype=np.float32), {}
+
+    def step(self, action):
+        self.step_times.append(self.clock.now())
+        self.actions.append(action)
+        self.clock.advance(self.slow_time if self.n in self.slow_steps else self.step_time)
+        self.n += 1
+        return np.array([self.n], dtype=np.float32), 0.0, False, self.n % self.episode_steps == 0, {}
+
+class TimedPolicy:
+    """
+    Policy that takes INFERENCE_TIME and returns the observation it was given.
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+
+    def __call__(self, obs):
+        self.calls.append(self.clock.now())
+        self.clock.advance(INFERENCE_TIME)
+        return obs.copy()
+
+def run(n_steps, pipelined, **env_kwargs):
+    clock = SimulatedClock(start=5.0, wakeup=WAKEUP)
+    env = TimedEnv(clock, **env_kwargs)
+    policy = TimedPolicy(clock)
+    scheduler = ControlLoopScheduler(env, policy, PERIOD, clock, pipelined)
+    stats = scheduler.run(n_steps)
+    return env, policy, stats
+
+def test_deadlines_stay_on_the_grid():
+    clock = SimulatedClock(start=2.0, wakeup=3e-4)
+    timer = PeriodicTimer(PERIOD, clock)
+    timer.start()
+    deadlines = []
+    for _ in range(1000):
+        deadlines.append(timer.wait())
+        clock.advance(STEP_TIME)
+    # start + k * period however late every wakeup is, so errors never accumulate
+    np.testing.assert_allclose(deadlines, 2.0 + PERIOD * np.arange(1000), rtol=0, atol=1e-9)
+    assert timer.missed == 0
+    assert timer.jitter.summary()['max'] == pytest.approx(3e-4)
+
+def test_steps_run_at_deadline_plus_wakeup_and_inference():
+    env, _, stats = run(20, pipelined=False)
+    deadlines = 5.0 + PERIOD * np.arange(20)
+    # The first tick fires immediately on start(), the others wake up WAKEUP late
+    expected = deadlines + INFERENCE_TIME + np.r_[0.0, np.full(19, WAKEUP)]
+    np.testing.assert_allclose(env.step_times, expected, rtol=0, atol=1e-9)
+    assert stats['missed'] == 0
+    assert stats['latency']['p50'] == pytest.approx(WAKEUP + INFERENCE_TIME)
+
+def test_overrun_counts_missed_deadlines_and_skips_ahead():
+    # Step 5 takes 3.5 periods: with inference the tick ends 3.81 periods after its deadline
+    env, _, stats = run(10, pipelined=False, slow_steps={5}, slow_time=0.035)
+    assert stats['missed'] == 3
+    ticks = np.round((np.array(env.step_times) - INFERENCE_TIME - 5.0) / PERIOD).astype(int)
+    assert ticks.tolist() == [0, 1, 2, 3, 4, 5, 9, 10, 11, 12]
+    # Back on the grid right away, with no burst of late ticks
+    np.testing.assert_allclose(env.step_times[6], 5.0 + 9 * PERIOD + WAKEUP + INFERENCE_TIME, atol=1e-9)
+
+def test_pipelined_observations_are_one_period_old():
+    env, policy, stats = run(20, pipelined=True)
+    # The first action is computed before the timer starts
+    deadlines = 5.0 + INFERENCE_TIME + PERIOD * np.arange(20)
+    # Inference is off the critical path: steps start right at the wakeup
+    np.testing.assert_allclose(env.step_times[1:], deadlines[1:] + WAKEUP, atol=1e-9)
+    assert stats['latency']['p50'] == pytest.approx(WAKEUP)
+    # The action of every tick comes from the observation of the tick before,
+    # computed as soon as that step returned
+    assert [float(action[0]) for action in env.actions] == list(range(20))
+    np.testing.assert_allclose(policy.calls[1:], np.array(env.step_times) + STEP_TIME, atol=1e-9)
+    # so the step that acts on an observation starts one period after the step that produced it
+    np.testing.assert_allclose(np.diff(env.step_times[1:]), PERIOD, atol=1e-9)
+    assert stats['missed'] == 0
+
+def test_policy_is_reset_with_every_episode():
+    clock = SimulatedClock()
+    env = TimedEnv(clock, episode_steps=3)
+    resets = []
+    scheduler = ControlLoopScheduler(env, lambda obs: np.zeros(2), PERIOD, clock,
+                                     reset_policy=lambda: resets.append(env.n))
+    scheduler.run(9)
+    # Before the first episode and after every one that ended
+    assert resets == [0, 3, 6, 9]
+    assert env.resets == 4
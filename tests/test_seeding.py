@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from stable_baselines3 import PPO
+from src.env.shm_vec_env import make_shared_memory_env
+from src.env.vec_bio_env import BioInterfaceVecEnv
+
+def rollout(env, steps=5):
+    env.reset()
+    # The same actions for every env, so only the noise streams tell them apart
+    actions = np.random.default_rng(0).uniform(-1, 1, (steps,) + env.action_space.shape).astype(np.float32)
+    observations = []
+    for action in actions:
+        env.step_async(np.repeat(action[None], env.num_envs, axis=0))
+        observations.append(env.step_wait()[0].copy())
+    return np.stack(observations)
+
+def test_vec_env_seed_matches_constructor_seed(config):
+    reference = rollout(BioInterfaceVecEnv(config, 4, seed=7))
+    env = BioInterfaceVecEnv(config, 4, seed=123)
+    env.seed(7)
+    np.testing.assert_array_equal(rollout(env), reference)
+
+def test_neighbouring_seeds_do_not_share_streams(config):
+    first, second = BioInterfaceVecEnv(config, 2), BioInterfaceVecEnv(config, 2)
+    first.seed(0)
+    second.seed(1)
+    # seed + env index would give env 1 of seed 0 the stream of env 0 of seed 1
+    assert not np.allclose(rollout(first)[:, 1], rollout(second)[:, 0])
+
+@pytest.fixture
+def shm_config(config):
+    config['experiment']['seed'] = 7
+    return config
+
+def test_model_seed_keeps_worker_seeds(shm_config):
+    reference_env = make_shared_memory_env(shm_config, 4, 2)
+    try:
+        reference = rollout(reference_env)
+    finally:
+        reference_env.close()
+    # Any seed given to the model goes through worker_seeds like the construction seed
+    env = make_shared_memory_env({**shm_config, 'experiment': {**shm_config['experiment'], 'seed': 1}}, 4, 2)
+    try:
+        PPO("MlpPolicy", env, n_steps=8, batch_size=8, seed=7, device='cpu')
+        np.testing.assert_array_equal(rollout(env), reference)
+    finally:
+        env.close()
@@ -0,0 +1,92 @@
+import threading
+import pytest
+import serial
+from conftest import wait_until
+from src.hardware.emulator import PtySubstrateEmulator
+from src.hardware.serial_io import SerialIOEngine
+from src.hardware.stimulator import SerialStimulator
+
+class BlockingSerial:
+    """
+    Port stand-in whose first write blocks until released, so commands queue up behind it.
+    """
+    def __init__(self):
+        self.written = []
+        self.release = threading.Event()
+        self.in_waiting = 0
+
+    def write(self, data):
+        if not self.written:
+            self.written.append(data)
+            self.release.wait(2.0)
+        else:
+            self.written.append(data)
+
+    def read(self, size=1):
+        self.release.wait(0.01)
+        return b""
+
+def test_engine_reads_samples_from_emulator():
+    with PtySubstrateEmulator(sample_rate=1000.0, binary=False, seed=0) as emulator:
+        ser = serial.Serial(emulator.port, timeout=0.05)
+        engine = SerialIOEngine(ser).start()
+        try:
+            assert wait_until(lambda: len(engine.samples) >= 20)
+            timestamps, values = engine.samples.drain()
+            assert len(values) >= 20
+            assert (timestamps[1:] >= timestamps[:-1]).all()
+            # Noise around the idle substrate state
+            assert abs(values).max() < 1.0
+        finally:
+            engine.stop()
+            ser.close()
+
+def test_engine_writes_commands_to_emulator():
+    with PtySubstrateEmulator(mode='reply', binary=False, seed=0) as emulator:
+        ser = serial.Serial(emulator.port, timeout=0.05)
+        engine = SerialIOEngine(ser).start()
+        try:
+            engine.send(b"STIM:10.00:1.00\n")
+            assert wait_until(lambda: emulator.commands_received == 1)
+            # Reply mode answers every command with one sample
+            assert wait_until(lambda: len(engine.samples) == 1)
+            assert engine.commands_written == 1
+            assert engine.error is None
+        finally:
+            engine.stop()
+            ser.close()
+
+def test_engine_coalesces_queued_commands_to_latest():
+    ser = BlockingSerial()
+    engine = SerialIOEngine(ser).start()
+    try:
+        engine.send(b"first")
+        assert wait_until(lambda: ser.written == [b"first"])
+        # The writer is stuck on the first command; only the newest of these is still worth sending
+        for command in [b"second", b"third", b"fourth"]:
+            engine.send(command)
+        ser.release.set()
+        assert wait_until(lambda: len(ser.written) == 2)
+        assert ser.written == [b"first", b"fourth"]
+        assert engine.commands_dropped == 2
+    finally:
+        ser.release.set()
+        engine.stop()
+
+def test_stimulator_check_raises_after_port_failure(config):
+    config['hardware']['protocol'] = 'ascii'
+    config['hardware']['async_io'] = True
+    emulator = PtySubstrateEmulator(sample_rate=1000.0, binary=False, seed=0).start()
+    config['hardware']['port'] = emulator.port
+    stimulator = SerialStimulator(config)
+    try:
+        assert wait_until(lambda: len(stimulator.io.samples) > 0)
+        stimulator.check()
+        # Unplugging the device ends up on the reader thread, and from there in check()
+        emulator.stop()
+        assert wait_until(lambda: stimulator.io.error is not None)
+        with pytest.raises(ConnectionError):
+            stimulator.check()
+    finally:
+        stimulator.close()
+        emulator.stop()
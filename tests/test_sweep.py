@@ -0,0 +1,36 @@
+import csv
+import os
+import pytest
+from src.model.sweep import SweepRunner, expand_search_space, rollout_steps, rung_budgets
+
+def test_rung_budgets_are_whole_rollouts():
+    assert rung_budgets(5000, 45000, 3) == [5000, 15000, 45000]
+    assert rung_budgets(5000, 45000, 3, rollout=2048) == [6144, 16384, 45056]
+    # Rungs that round to the same rollout collapse into one
+    assert rung_budgets(100, 400, 2, rollout=512) == [512]
+
+def test_rollout_steps(config):
+    config['rl_agent']['n_steps'] = 64
+    assert rollout_steps(config, num_envs=4) == 256
+    config['rl_agent']['algorithm'] = 'SAC'
+    assert rollout_steps(config, num_envs=4) == 4
+
+@pytest.mark.parametrize('key', ['rl_agent.n_steps', 'rl_agent.algorithm'])
+def test_rollout_keys_cannot_be_swept(key):
+    with pytest.raises(ValueError, match="rollout length"):
+        expand_search_space({key: [1, 2], 'rl_agent.gamma': [0.9, 0.99]})
+
+def test_sweep_records_trained_timesteps(config, tmp_path):
+    config['rl_agent'].update(n_steps=32, batch_size=32)
+    config['experiment']['max_steps'] = 20
+    sweep = {'method': 'grid', 'min_steps': 50, 'max_steps': 150, 'eta': 3, 'num_envs': 2, 'workers': 1,
+             'parameters': {'rl_agent.gamma': [0.9, 0.99, 0.995]}}
+    runner = SweepRunner(config, sweep, str(tmp_path))
+    assert runner.budgets == [64, 192]
+    runner.run()
+    with open(os.path.join(str(tmp_path), 'results.csv'), newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 4
+    for row in rows:
+        assert row['status'] == 'ok'
+        assert int(row['timesteps']) == int(row['steps'])